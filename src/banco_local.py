@@ -0,0 +1,320 @@
+import json
+import time
+import sqlite3
+import threading
+import logging as log
+from pathlib import Path
+from datetime import datetime
+from contextlib import contextmanager
+from collections.abc import Mapping
+from typing import Any, Iterable, Iterator
+
+from cache_bases import CAMPO_ID, PASTA_DADOS
+
+CAMINHO_BANCO = PASTA_DADOS / "lancar_iptu.db"
+
+# Colunas consultadas de cada base; o registro completo da API fica em `dados` (JSON)
+COLUNAS_BASE = {
+    "contratos": ("id_contrato_con", "codigo_contrato", "id_imovel_imo"),
+    "imoveis": ("id_imovel_imo", "st_identificador_imo"),
+}
+
+COLUNAS_DESPESA = ("id_despesa_desp", "id_despesa_despm",
+                   "id_contrato_con", "id_imovel_imo", "vl_valor_imod")
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS contratos (
+    posicao INTEGER PRIMARY KEY,
+    id_contrato_con TEXT,
+    codigo_contrato TEXT,
+    id_imovel_imo TEXT,
+    dados TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_contratos_codigo ON contratos (codigo_contrato);
+CREATE INDEX IF NOT EXISTS idx_contratos_id ON contratos (id_contrato_con);
+CREATE INDEX IF NOT EXISTS idx_contratos_imovel ON contratos (id_imovel_imo);
+
+CREATE TABLE IF NOT EXISTS imoveis (
+    posicao INTEGER PRIMARY KEY,
+    id_imovel_imo TEXT,
+    st_identificador_imo TEXT,
+    dados TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_imoveis_identificador ON imoveis (st_identificador_imo);
+CREATE INDEX IF NOT EXISTS idx_imoveis_id ON imoveis (id_imovel_imo);
+
+CREATE TABLE IF NOT EXISTS sincronizacoes (
+    base TEXT PRIMARY KEY,
+    atualizado_em REAL NOT NULL
+);
+
+-- Última carga completa (a incremental só vê registros novos no fim da listagem)
+CREATE TABLE IF NOT EXISTS cargas_completas (
+    base TEXT PRIMARY KEY,
+    atualizado_em REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS despesas (
+    competencia TEXT NOT NULL,
+    id_despesa_desp TEXT,
+    id_despesa_despm TEXT,
+    id_contrato_con TEXT,
+    id_imovel_imo TEXT,
+    vl_valor_imod TEXT,
+    dados TEXT NOT NULL,
+    capturado_em TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_despesas_competencia ON despesas (competencia);
+CREATE INDEX IF NOT EXISTS idx_despesas_contrato ON despesas (id_contrato_con, competencia);
+CREATE INDEX IF NOT EXISTS idx_despesas_imovel ON despesas (id_imovel_imo, competencia);
+
+CREATE TABLE IF NOT EXISTS resultados (
+    execucao TEXT NOT NULL,
+    competencia TEXT NOT NULL,
+    pdf TEXT NOT NULL,
+    codigo TEXT NOT NULL,
+    fila TEXT NOT NULL,
+    resultado TEXT NOT NULL,
+    registrado_em TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_resultados_codigo ON resultados (codigo, competencia);
+CREATE INDEX IF NOT EXISTS idx_resultados_execucao ON resultados (execucao);
+
+CREATE TABLE IF NOT EXISTS digitais (
+    competencia TEXT NOT NULL,
+    hash_pdf TEXT NOT NULL,
+    cod_barras TEXT NOT NULL,
+    pdf TEXT NOT NULL,
+    registrado_em TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_digitais_hash ON digitais (hash_pdf, competencia);
+CREATE INDEX IF NOT EXISTS idx_digitais_barras ON digitais (cod_barras);
+"""
+
+
+class BancoLocal:
+    """Banco SQLite (modo WAL) com contratos, imóveis, fotografias das despesas e resultados.
+
+    As conexões ficam num pool (uma por thread em uso); com WAL, os workers leem enquanto a
+    sincronização das bases grava e veem sempre o último estado confirmado. Toda escrita em
+    lote é uma transação.
+    """
+
+    def __init__(self, caminho: Path = CAMINHO_BANCO) -> None:
+        self.caminho = Path(caminho)
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+
+        self._livres: list[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+
+        with self._conexao() as conexao:
+            conexao.execute("PRAGMA journal_mode=WAL")
+            conexao.executescript(ESQUEMA)
+
+        self._importar_cache_json()
+
+    @contextmanager
+    def _conexao(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            conexao = self._livres.pop() if self._livres else None
+
+        if conexao is None:
+            # Espera o outro escritor em vez de falhar com "database is locked"
+            conexao = sqlite3.connect(
+                self.caminho, timeout=30, check_same_thread=False)
+            conexao.execute("PRAGMA synchronous=NORMAL")
+
+        try:
+            yield conexao
+        finally:
+            with self._lock:
+                self._livres.append(conexao)
+
+    def _consultar(self, sql: str, parametros: tuple = ()) -> list[tuple]:
+        with self._conexao() as conexao:
+            return conexao.execute(sql, parametros).fetchall()
+
+    def _importar_cache_json(self) -> None:
+        """Aproveita, uma única vez, os data/base_*.json das versões anteriores."""
+
+        for base in COLUNAS_BASE:
+            caminho_json = self.caminho.parent / f"base_{base}.json"
+            if self.idade_horas(base) is not None or not caminho_json.exists():
+                continue
+
+            try:
+                with open(caminho_json, "r", encoding="utf-8") as file:
+                    itens = json.load(file)
+            except (json.JSONDecodeError, OSError) as e:
+                log.warning(f"Cache antigo {caminho_json} ignorado: {e}")
+                continue
+
+            self.substituir_base(base, itens, caminho_json.stat().st_mtime)
+            log.info(f"Cache antigo {caminho_json} importado para {self.caminho}.")
+
+    # ---- Bases (contratos / imóveis) ----
+
+    def idade_horas(self, base: str) -> float | None:
+        """Horas desde a última sincronização da base; None se ela nunca foi sincronizada."""
+
+        linhas = self._consultar(
+            "SELECT atualizado_em FROM sincronizacoes WHERE base = ?", (base,))
+        return (time.time() - linhas[0][0]) / 3600 if linhas else None
+
+    def idade_carga_completa_horas(self, base: str) -> float | None:
+        """Horas desde a última carga completa da base; None se não há registro dela."""
+
+        linhas = self._consultar(
+            "SELECT atualizado_em FROM cargas_completas WHERE base = ?", (base,))
+        return (time.time() - linhas[0][0]) / 3600 if linhas else None
+
+    def contar(self, base: str) -> int:
+        return self._consultar(f"SELECT COUNT(*) FROM {base}")[0][0]
+
+    def id_na_posicao(self, base: str, posicao: int) -> str | None:
+        """Id do registro na posição (0-based) da listagem da API."""
+
+        linhas = self._consultar(
+            f"SELECT {CAMPO_ID[base]} FROM {base} WHERE posicao = ?", (posicao,))
+        return linhas[0][0] if linhas else None
+
+    def substituir_base(self, base: str, itens: list[dict], atualizado_em: float | None = None) -> None:
+        """Grava a base inteira em uma transação."""
+
+        self.substituir_a_partir(base, 0, itens, atualizado_em)
+
+    def substituir_a_partir(self, base: str, posicao: int, itens: list[dict], atualizado_em: float | None = None) -> None:
+        """Troca os registros a partir de `posicao` (sincronização incremental) em uma transação."""
+
+        colunas = COLUNAS_BASE[base]
+        sql = (f"INSERT INTO {base} (posicao, {', '.join(colunas)}, dados) "
+               f"VALUES (?, {', '.join('?' * len(colunas))}, ?)")
+
+        linhas = ((posicao + i, *(_texto(item.get(coluna)) for coluna in colunas),
+                   json.dumps(item, ensure_ascii=False)) for i, item in enumerate(itens))
+
+        atualizado_em = atualizado_em if atualizado_em is not None else time.time()
+
+        with self._conexao() as conexao, conexao:
+            conexao.execute(f"DELETE FROM {base} WHERE posicao >= ?", (posicao,))
+            conexao.executemany(sql, linhas)
+            conexao.execute(
+                "INSERT OR REPLACE INTO sincronizacoes (base, atualizado_em) VALUES (?, ?)",
+                (base, atualizado_em))
+            if posicao == 0:
+                conexao.execute(
+                    "INSERT OR REPLACE INTO cargas_completas (base, atualizado_em) VALUES (?, ?)",
+                    (base, atualizado_em))
+
+    def id_contrato(self, codigo: str) -> str | None:
+        """Id do contrato pelo código sem a parte após a barra ("I0000001/1" -> "I0000001")."""
+
+        # O intervalo [codigo + "/", codigo + "0") pega todo "codigo/..." usando o índice
+        linhas = self._consultar(
+            "SELECT id_contrato_con FROM contratos WHERE codigo_contrato = ? "
+            "OR (codigo_contrato >= ? AND codigo_contrato < ?) ORDER BY posicao DESC LIMIT 1",
+            (codigo, f"{codigo}/", f"{codigo}0"))
+        return linhas[0][0] if linhas else None
+
+    def id_imovel(self, identificador: str) -> str | None:
+        linhas = self._consultar(
+            "SELECT id_imovel_imo FROM imoveis WHERE st_identificador_imo = ? "
+            "ORDER BY posicao DESC LIMIT 1", (identificador,))
+        return linhas[0][0] if linhas else None
+
+    def codigos(self, base: str) -> Iterator[str]:
+        if base == "contratos":
+            sql = "SELECT DISTINCT codigo_contrato FROM contratos"
+        else:
+            sql = "SELECT DISTINCT st_identificador_imo FROM imoveis"
+
+        vistos = set()
+        for (codigo,) in self._consultar(sql):
+            codigo = str(codigo).split("/")[0] if base == "contratos" else codigo
+            if codigo not in vistos:
+                vistos.add(codigo)
+                yield codigo
+
+    # ---- Despesas e resultados ----
+
+    def salvar_despesas(self, competencia: str, despesas: Iterable[dict]) -> None:
+        """Fotografia das despesas IPTU da competência (substitui a anterior) em uma transação."""
+
+        capturado_em = datetime.now().isoformat(timespec="seconds")
+        sql = (f"INSERT INTO despesas (competencia, {', '.join(COLUNAS_DESPESA)}, dados, capturado_em) "
+               f"VALUES (?, {', '.join('?' * len(COLUNAS_DESPESA))}, ?, ?)")
+
+        with self._conexao() as conexao, conexao:
+            conexao.execute(
+                "DELETE FROM despesas WHERE competencia = ?", (competencia,))
+            conexao.executemany(sql, (
+                (competencia, *(_texto(despesa.get(coluna)) for coluna in COLUNAS_DESPESA),
+                 json.dumps(despesa, ensure_ascii=False), capturado_em)
+                for despesa in despesas))
+
+    def registrar_resultados(self, execucao: str, resultados: Iterable[tuple[str, str, str, str, str]], digitais: Iterable[tuple[str, str, str, str]] = ()) -> None:
+        """Grava (competência, pdf, código, fila, resultado) de um lote em uma transação.
+
+        `digitais` (competência, hash, código de barras, pdf) são os carnês lançados com sucesso,
+        consultados por `lancamento_anterior` para barrar cópias em lotes seguintes.
+        """
+
+        registrado_em = datetime.now().isoformat(timespec="seconds")
+
+        with self._conexao() as conexao, conexao:
+            conexao.executemany(
+                "INSERT INTO resultados (execucao, competencia, pdf, codigo, fila, resultado, registrado_em) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                ((execucao, *resultado, registrado_em) for resultado in resultados))
+            conexao.executemany(
+                "INSERT INTO digitais (competencia, hash_pdf, cod_barras, pdf, registrado_em) "
+                "VALUES (?, ?, ?, ?, ?)",
+                ((*digital, registrado_em) for digital in digitais))
+
+    def lancamento_anterior(self, competencia: str, hash_pdf: str, cod_barras: str, desde: str) -> str | None:
+        """Pdf já lançado desde `desde` (ISO) com o mesmo conteúdo na competência ou o mesmo código de barras."""
+
+        linhas = self._consultar(
+            "SELECT pdf FROM digitais WHERE registrado_em >= ? AND "
+            "((hash_pdf = ? AND competencia = ?) OR (cod_barras <> '' AND cod_barras = ?)) "
+            "ORDER BY registrado_em LIMIT 1",
+            (desde, hash_pdf, competencia, cod_barras))
+        return linhas[0][0] if linhas else None
+
+    def fechar(self) -> None:
+        with self._lock:
+            for conexao in self._livres:
+                conexao.close()
+            self._livres.clear()
+
+
+def _texto(valor: Any) -> str | None:
+    return None if valor is None else str(valor)
+
+
+class RelacaoIds(Mapping[str, str]):
+    """Relação código -> id consultada no banco pelo índice, sem carregar a base na memória."""
+
+    def __init__(self, banco: BancoLocal, base: str) -> None:
+        self.banco = banco
+        self.base = base
+
+    def __getitem__(self, codigo: str) -> str:
+        id_dono = self.banco.id_contrato(
+            codigo) if self.base == "contratos" else self.banco.id_imovel(codigo)
+        if id_dono is None:
+            raise KeyError(codigo)
+        return id_dono
+
+    def __contains__(self, codigo: object) -> bool:
+        try:
+            self[str(codigo)]
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self) -> Iterator[str]:
+        return self.banco.codigos(self.base)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
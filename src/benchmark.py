@@ -0,0 +1,333 @@
+"""Benchmark ponta a ponta do lançador de IPTU contra o simulador local da API.
+
+Gera carnês sintéticos de 12 páginas no layout que `extrair_dados_pdf` espera, sobe o
+simulador com a mesma carteira, executa `main()` e grava um JSON com pdfs/s, p50/p95 por
+etapa, pico de RSS e requisições por endpoint:
+
+    python src/benchmark.py --pdfs 2000 --workers 8 --latencia-ms 50 --saida bench/atual.json
+    python src/benchmark.py --pdfs 2000 --workers 8 --comparar bench/atual.json
+
+Com --extracao, mede só a leitura das páginas: o caminho rápido (content stream) contra o
+extract_text por linhas fixas, em ms por página, sem simulador nem API:
+
+    python src/benchmark.py --extracao --pdfs 200
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from pathlib import Path
+from datetime import datetime
+from typing import Any
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None  # type: ignore[assignment]
+
+from extracao_rapida import modulo_10
+from simulador_api import Falhas, SimuladorSuperlogica, config_teste, gerar_portfolio, iniciar_servidor, valor_iptu
+
+# Linhas do texto da página lidas por extrair_dados_pdf
+LINHA_VENCIMENTO = 12
+LINHA_VALOR = 31
+LINHA_CODIGO_BARRAS = 33
+LINHAS_POR_PAGINA = 40
+
+
+def linha_digitavel_arrecadacao(valor: str, semente: int) -> str:
+    """Linha digitável de 48 dígitos (4 blocos de 11 + DV) de um boleto de prefeitura, módulo 10."""
+
+    centavos = int(valor.replace(".", ""))
+    # 8 = arrecadação, 1 = prefeituras, 6 = valor efetivo com DV módulo 10
+    sem_dv = f"816{centavos:011d}{semente:029d}"[:43]
+    codigo = sem_dv[:3] + str(modulo_10(sem_dv)) + sem_dv[3:]
+
+    blocos = [codigo[i:i + 11] for i in range(0, 44, 11)]
+    return " ".join(f"{bloco} {modulo_10(bloco)}" for bloco in blocos)
+
+
+def valor_brasileiro(valor: str) -> str:
+    """"1094.20" -> "1.094,20", como impresso no carnê."""
+
+    inteiro, centavos = valor.split(".")
+    return f"{int(inteiro):,}".replace(",", ".") + f",{centavos}"
+
+
+def _escapar(texto: str) -> str:
+    return texto.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def gerar_carne_pdf(caminho: Path, parcelas: list[tuple[str, str, str]]) -> None:
+    """Grava um carnê com uma página por parcela (vencimento, valor, linha digitável).
+
+    O PDF é montado à mão (Helvetica, uma linha de texto por linha da página) para não
+    depender de bibliotecas de geração.
+    """
+
+    objetos = [b"<< /Type /Catalog /Pages 2 0 R >>"]
+    kids = " ".join(f"{4 + 2 * i} 0 R" for i in range(len(parcelas)))
+    objetos.append(
+        f"<< /Type /Pages /Kids [{kids}] /Count {len(parcelas)} >>".encode())
+    objetos.append(
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+
+    for i, (vencimento, valor, codigo_barras) in enumerate(parcelas):
+        linhas = [f"Carne IPTU - linha {n}" for n in range(LINHAS_POR_PAGINA)]
+        linhas[LINHA_VENCIMENTO] = vencimento
+        linhas[LINHA_VALOR] = valor
+        linhas[LINHA_CODIGO_BARRAS] = codigo_barras
+
+        conteudo = "BT /F1 9 Tf 40 800 Td 11 TL\n" + "\n".join(
+            f"({_escapar(linha)}) Tj T*" for linha in linhas) + "\nET"
+        stream = conteudo.encode("latin-1")
+
+        objetos.append((f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                        f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>").encode())
+        objetos.append(b"<< /Length %d >>\nstream\n" %
+                       len(stream) + stream + b"\nendstream")
+
+    saida = bytearray(b"%PDF-1.4\n")
+    posicoes = []
+    for numero, objeto in enumerate(objetos, start=1):
+        posicoes.append(len(saida))
+        saida += f"{numero} 0 obj\n".encode() + objeto + b"\nendobj\n"
+
+    inicio_xref = len(saida)
+    saida += f"xref\n0 {len(objetos) + 1}\n0000000000 65535 f \n".encode()
+    for posicao in posicoes:
+        saida += f"{posicao:010d} 00000 n \n".encode()
+    saida += (f"trailer\n<< /Size {len(objetos) + 1} /Root 1 0 R >>\n"
+              f"startxref\n{inicio_xref}\n%%EOF\n").encode()
+
+    caminho.write_bytes(bytes(saida))
+
+
+def gerar_carnes(pasta: Path, prefixo: str, sementes: list[int], ano: int) -> None:
+    pasta.mkdir(parents=True, exist_ok=True)
+
+    for n, semente in enumerate(sementes, start=1):
+        valor = valor_iptu(semente)
+        parcelas = [
+            (f"10/{mes:02d}/{ano}", valor_brasileiro(valor),
+             linha_digitavel_arrecadacao(valor, semente * 100 + mes))
+            for mes in range(1, 13)
+        ]
+        gerar_carne_pdf(pasta / f"{prefixo}{n:07d}.pdf", parcelas)
+
+
+def rss_pico_mb() -> float | None:
+    """Pico de memória residente do processo e dos filhos (pool de extração), em MB."""
+
+    if resource is None:
+        return None
+
+    proprio = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    filhos = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(max(proprio, filhos) / divisor, 1)
+
+
+def executar_benchmark(args: argparse.Namespace) -> dict[str, Any]:
+    diretorio = Path(args.diretorio or tempfile.mkdtemp(prefix="bench_iptu_"))
+    diretorio.mkdir(parents=True, exist_ok=True)
+    os.chdir(diretorio)
+
+    # O log do lançador é relativo ao diretório atual: configurar só depois do chdir
+    import main as lancador
+    from registro import iniciar_log
+    iniciar_log()
+
+    _, ano = lancador.obter_competencia_atual()
+
+    qtd_vazios = args.pdfs * args.percentual_vazios // 100
+    qtd_ativos = args.pdfs - qtd_vazios
+
+    portfolio = gerar_portfolio(
+        max(args.contratos, qtd_ativos), qtd_vazios, ano)
+    simulador = SimuladorSuperlogica(portfolio, Falhas(
+        args.latencia_ms, args.jitter_ms, args.taxa_erro, args.taxa_429, 0.0, args.retry_after))
+    servidor = iniciar_servidor(simulador)
+
+    pastas = {
+        "iptu_a_lancar_ativos": "entrada/ativos",
+        "iptu_a_lancar_vazios": "entrada/vazios",
+        "iptu_ativo_ok": "saida/ok_ativos",
+        "iptu_vazio_ok": "saida/ok_vazios",
+        "iptu_erro": "saida/erro",
+    }
+    config = config_teste(f"http://127.0.0.1:{servidor.server_port}", pastas)
+    config["[EXECUCAO]"] = {"workers": args.workers,
+                            "despesas_em_lote": args.despesas_em_lote}
+    with open("config.json", "w", encoding="utf-8") as file:
+        json.dump(config, file, indent=4, ensure_ascii=False)
+
+    inicio_geracao = time.perf_counter()
+    gerar_carnes(Path(pastas["iptu_a_lancar_ativos"]), "I",
+                 list(range(1, qtd_ativos + 1)), ano)
+    gerar_carnes(Path(pastas["iptu_a_lancar_vazios"]), "V",
+                 [900000 + j for j in range(1, qtd_vazios + 1)], ano)
+    tempo_geracao = time.perf_counter() - inicio_geracao
+
+    inicio = time.perf_counter()
+    resumo = lancador.main(workers=args.workers, atualizar_bases=True)
+    tempo_total = time.perf_counter() - inicio
+
+    servidor.shutdown()
+    estatisticas = simulador.estatisticas()
+
+    resultados: dict[str, int] = {}
+    for resultado in resumo["resultados"].values():
+        resultados[str(resultado)] = resultados.get(str(resultado), 0) + 1
+
+    return {
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "parametros": {k: v for k, v in vars(args).items() if k not in ("saida", "comparar")},
+        "pdfs": args.pdfs,
+        "tempo_geracao_s": round(tempo_geracao, 3),
+        "tempo_total_s": round(tempo_total, 3),
+        "pdfs_por_segundo": round(args.pdfs / tempo_total, 2) if tempo_total else None,
+        "etapas": {**resumo["relatorio"]["etapas"], **resumo["relatorio"]["endpoints"]},
+        "rss_pico_mb": rss_pico_mb(),
+        "requisicoes_por_endpoint": estatisticas["requisicoes"],
+        "respostas_por_status": estatisticas["respostas"],
+        "lancamentos_duplicados": estatisticas["lancamentos_duplicados"],
+        "resultados": resultados,
+    }
+
+
+def executar_benchmark_extracao(args: argparse.Namespace) -> dict[str, Any]:
+    """Tempo por página do caminho rápido e do extract_text sobre os mesmos carnês sintéticos."""
+
+    from pypdf import PdfReader
+    from extracao import _extrair_pagina_texto
+    from extracao_rapida import extrair_pagina_rapida
+
+    diretorio = Path(args.diretorio or tempfile.mkdtemp(prefix="bench_extracao_"))
+    gerar_carnes(diretorio, "I", list(range(1, args.pdfs + 1)), datetime.now().year)
+    pdfs = sorted(diretorio.glob("*.pdf"))
+
+    def medir(ler: Any) -> tuple[float, list[Any]]:
+        # Leitor novo por pdf: nenhum dos dois caminhos aproveita o stream já decodificado pelo outro
+        lidos: list[Any] = []
+        inicio = time.perf_counter()
+        for pdf in pdfs:
+            lidos.extend(ler(pagina) for pagina in PdfReader(pdf).pages)
+        return time.perf_counter() - inicio, lidos
+
+    tempo_texto, pelo_texto = medir(_extrair_pagina_texto)
+    tempo_rapido, rapidos = medir(extrair_pagina_rapida)
+
+    paginas = len(pelo_texto)
+    return {
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "pdfs": len(pdfs),
+        "paginas": paginas,
+        "texto_ms_por_pagina": round(1000 * tempo_texto / paginas, 3),
+        "rapida_ms_por_pagina": round(1000 * tempo_rapido / paginas, 3),
+        "aceleracao": round(tempo_texto / tempo_rapido, 1) if tempo_rapido else None,
+        # Páginas em que o caminho rápido desistiu (iriam para o extract_text)
+        "sem_leitura_rapida": sum(1 for dados in rapidos if dados is None),
+        # Por campo, contra o extract_text (vencimento da linha 12, valor da 31, código da 33)
+        "divergencias": {
+            campo: sum(1 for dados, texto in zip(rapidos, pelo_texto)
+                       if dados is not None and dados[i] != texto[i])
+            for i, campo in enumerate(("vencimento", "codigo_barras", "valor"))
+        },
+    }
+
+
+def comparar(atual: dict[str, Any], anterior: dict[str, Any], tolerancia: float) -> list[str]:
+    """Lista as regressões acima de `tolerancia` (fração) em throughput e no p95 de cada etapa."""
+
+    regressoes = []
+
+    if atual["pdfs_por_segundo"] < anterior["pdfs_por_segundo"] * (1 - tolerancia):
+        regressoes.append(
+            f"pdfs/s: {anterior['pdfs_por_segundo']} -> {atual['pdfs_por_segundo']}")
+
+    for etapa, dados in atual["etapas"].items():
+        antes = anterior.get("etapas", {}).get(etapa)
+        if not antes or not antes.get("p95_ms"):
+            continue
+        if dados["p95_ms"] > antes["p95_ms"] * (1 + tolerancia):
+            regressoes.append(
+                f"{etapa} p95: {antes['p95_ms']} ms -> {dados['p95_ms']} ms")
+
+    return regressoes
+
+
+def comparar_extracao(atual: dict[str, Any], anterior: dict[str, Any], tolerancia: float) -> list[str]:
+    """Regressões do `--extracao`: ms por página do caminho rápido acima de `tolerancia` e qualquer
+    página a mais sem leitura rápida ou divergente do extract_text."""
+
+    regressoes = []
+
+    antes = anterior.get("rapida_ms_por_pagina")
+    if antes and atual["rapida_ms_por_pagina"] > antes * (1 + tolerancia):
+        regressoes.append(
+            f"leitura rápida: {antes} -> {atual['rapida_ms_por_pagina']} ms por página")
+
+    if atual["sem_leitura_rapida"] > anterior.get("sem_leitura_rapida", 0):
+        regressoes.append(
+            f"sem leitura rápida: {anterior.get('sem_leitura_rapida', 0)} -> {atual['sem_leitura_rapida']} páginas")
+
+    for campo, quantidade in atual["divergencias"].items():
+        antes_campo = anterior.get("divergencias", {}).get(campo, 0)
+        if quantidade > antes_campo:
+            regressoes.append(f"divergências de {campo}: {antes_campo} -> {quantidade}")
+
+    return regressoes
+
+
+def ler_argumentos() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pdfs", type=int, default=500)
+    parser.add_argument("--percentual-vazios", type=int, default=10)
+    parser.add_argument("--contratos", type=int, default=0,
+                        help="Tamanho da carteira (padrão: um contrato por pdf ativo).")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--despesas-em-lote", action="store_true")
+    parser.add_argument("--latencia-ms", type=float, default=30.0)
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--taxa-erro", type=float, default=0.0)
+    parser.add_argument("--taxa-429", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=0.5)
+    parser.add_argument("--diretorio",
+                        help="Pasta de trabalho (padrão: temporária).")
+    parser.add_argument("--saida", help="Arquivo JSON com o resultado.")
+    parser.add_argument(
+        "--comparar", help="JSON de uma execução anterior para detectar regressões.")
+    parser.add_argument("--tolerancia", type=float, default=0.10)
+    parser.add_argument("--extracao", action="store_true",
+                        help="Mede só a leitura das páginas (caminho rápido x extract_text).")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = ler_argumentos()
+    for caminho in ("saida", "comparar"):
+        if getattr(args, caminho):
+            setattr(args, caminho, str(Path(getattr(args, caminho)).resolve()))
+
+    # Os dois modos passam pelo mesmo --saida / --comparar; cada um com sua comparação
+    if args.extracao:
+        resultado, comparacao = executar_benchmark_extracao(args), comparar_extracao
+    else:
+        resultado, comparacao = executar_benchmark(args), comparar
+    print(json.dumps(resultado, indent=4, ensure_ascii=False))
+
+    if args.saida:
+        Path(args.saida).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.saida, "w", encoding="utf-8") as file:
+            json.dump(resultado, file, indent=4, ensure_ascii=False)
+
+    if args.comparar:
+        with open(args.comparar, "r", encoding="utf-8") as file:
+            regressoes = comparacao(resultado, json.load(file), args.tolerancia)
+        for regressao in regressoes:
+            print(f"REGRESSÃO: {regressao}")
+        sys.exit(1 if regressoes else 0)
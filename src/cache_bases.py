@@ -0,0 +1,15 @@
+from pathlib import Path
+
+PASTA_DADOS = Path("data")
+
+# Campo que identifica unicamente cada registro das bases
+CAMPO_ID = {
+    "contratos": "id_contrato_con",
+    "imoveis": "id_imovel_imo",
+}
+
+
+def pagina_de_retomada(qtd_itens: int, itens_por_pagina: int) -> int:
+    """Última página já presente no cache; a sincronização incremental recomeça por ela."""
+
+    return max(1, -(-qtd_itens // itens_por_pagina))
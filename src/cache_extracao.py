@@ -0,0 +1,176 @@
+import json
+import os
+import time
+import hashlib
+import threading
+import logging as log
+from pathlib import Path
+from typing import Any
+
+CAMINHO_CACHE_EXTRACAO = Path("data/cache_extracao.json")
+
+
+def hash_arquivo(caminho: Path) -> str:
+    """SHA-256 do conteúdo do arquivo (independe do nome com que o carnê foi salvo)."""
+
+    sha = hashlib.sha256()
+    with open(caminho, "rb") as file:
+        for bloco in iter(lambda: file.read(1024 * 1024), b""):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+
+class CacheExtracao:
+    """Cache persistente dos dados extraídos dos carnês, por hash do conteúdo e índice da página.
+
+    Um carnê anual reaparece todo mês (outra página) e também volta das pastas de erro
+    (mesma página): nos dois casos só a página ainda não lida passa pelo pypdf.
+
+    Formato: {hash: {"qtd_paginas": int, "paginas": {indice: [venc, barras, valor]}, "usado_em": ts}}
+
+    Limites, aplicados ao salvar e descartando primeiro as entradas usadas há mais tempo:
+    `max_idade_dias`, `max_arquivos` e `max_mb` (tamanho do arquivo; 0 = sem limite).
+    """
+
+    def __init__(self, caminho: Path = CAMINHO_CACHE_EXTRACAO, max_arquivos: int = 5000, max_idade_dias: float = 400, max_mb: float = 50) -> None:
+        self.caminho = Path(caminho)
+        self.max_arquivos = max_arquivos
+        self.max_idade_dias = max_idade_dias
+        self.max_mb = max_mb
+
+        self._entradas: dict[str, dict[str, Any]] = {}
+        self._alterado = False
+        self._lock = threading.Lock()
+
+        self._carregar()
+
+    def _carregar(self) -> None:
+        try:
+            with open(self.caminho, "r", encoding="utf-8") as file:
+                self._entradas = json.load(file)
+        except FileNotFoundError:
+            self._entradas = {}
+        except (json.JSONDecodeError, OSError) as e:
+            log.error(f"Cache de extração ilegível, será recriado: {e}")
+            self._entradas = {}
+
+    def qtd_paginas(self, hash_pdf: str) -> int | None:
+        with self._lock:
+            entrada = self._entradas.get(hash_pdf)
+            return entrada["qtd_paginas"] if entrada else None
+
+    def buscar(self, hash_pdf: str, indice_pagina: int) -> tuple[str, str, str] | None:
+        with self._lock:
+            entrada = self._entradas.get(hash_pdf)
+            if entrada is None:
+                return None
+
+            dados = entrada["paginas"].get(str(indice_pagina))
+            if dados is None:
+                return None
+
+            entrada["usado_em"] = time.time()
+            self._alterado = True
+
+        return dados[0], dados[1], dados[2]
+
+    def gravar(self, hash_pdf: str, qtd_paginas: int, indice_pagina: int, dados: tuple[str, str, str]) -> None:
+        with self._lock:
+            entrada = self._entradas.setdefault(
+                hash_pdf, {"qtd_paginas": qtd_paginas, "paginas": {}})
+            entrada["paginas"][str(indice_pagina)] = list(dados)
+            entrada["usado_em"] = time.time()
+            self._alterado = True
+
+    def _expirar(self) -> int:
+        """Remove entradas mais velhas que `max_idade_dias` e as menos usadas acima de `max_arquivos` ou de `max_mb`."""
+
+        limite = time.time() - self.max_idade_dias * 86400
+        antes = len(self._entradas)
+
+        entradas = {h: e for h, e in self._entradas.items()
+                    if e.get("usado_em", 0) >= limite}
+
+        if len(entradas) > self.max_arquivos:
+            mais_recentes = sorted(
+                entradas, key=lambda h: entradas[h]["usado_em"], reverse=True)
+            entradas = {h: entradas[h]
+                        for h in mais_recentes[:self.max_arquivos]}
+
+        if self.max_mb > 0:
+            entradas = self._limitar_tamanho(entradas, int(self.max_mb * 1024 * 1024))
+
+        self._entradas = entradas
+        return antes - len(entradas)
+
+    @staticmethod
+    def _limitar_tamanho(entradas: dict[str, dict[str, Any]], max_bytes: int) -> dict[str, dict[str, Any]]:
+        """Mantém as entradas mais recentes cujo JSON somado cabe em `max_bytes`."""
+
+        # "hash": {...}, -> chave entre aspas, dois-pontos, espaço e vírgula do json.dump
+        tamanhos = {h: len(h) + 6 + len(json.dumps(e, ensure_ascii=False).encode("utf-8"))
+                    for h, e in entradas.items()}
+        total = sum(tamanhos.values()) + 2
+        if total <= max_bytes:
+            return entradas
+
+        mantidas = dict(entradas)
+        for h in sorted(entradas, key=lambda h: entradas[h].get("usado_em", 0)):
+            if total <= max_bytes:
+                break
+            total -= tamanhos[h]
+            del mantidas[h]
+        return mantidas
+
+    def salvar(self) -> None:
+        with self._lock:
+            removidas = self._expirar()
+            if not self._alterado and not removidas:
+                return
+
+            self.caminho.parent.mkdir(parents=True, exist_ok=True)
+            temporario = self.caminho.with_suffix(".tmp")
+            with open(temporario, "w", encoding="utf-8") as file:
+                json.dump(self._entradas, file, ensure_ascii=False)
+            os.replace(temporario, self.caminho)
+
+            self._alterado = False
+
+        if removidas:
+            log.info(f"Cache de extração: {removidas} entradas expiradas.")
+
+    def resumo(self) -> dict[str, Any]:
+        with self._lock:
+            usos = [e.get("usado_em", 0) for e in self._entradas.values()]
+            return {
+                "arquivo": str(self.caminho),
+                "tamanho_bytes": self.caminho.stat().st_size if self.caminho.exists() else 0,
+                "arquivos": len(self._entradas),
+                "paginas": sum(len(e["paginas"]) for e in self._entradas.values()),
+                "uso_mais_antigo": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(min(usos))) if usos else None,
+                "uso_mais_recente": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(max(usos))) if usos else None,
+                "max_arquivos": self.max_arquivos,
+                "max_idade_dias": self.max_idade_dias,
+                "max_mb": self.max_mb,
+            }
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._entradas = {}
+            self._alterado = False
+            self.caminho.unlink(missing_ok=True)
+
+        log.info("Cache de extração limpo.")
+
+
+def criar_cache_extracao(config: dict[str, Any], caminho: Path = CAMINHO_CACHE_EXTRACAO) -> CacheExtracao:
+    """Cria o cache a partir da seção [CACHE] do config.json (opcional)."""
+
+    config_cache = config.get("[CACHE]", {})
+
+    return CacheExtracao(
+        caminho=caminho,
+        max_arquivos=int(config_cache.get("max_arquivos_extracao", 5000)),
+        max_idade_dias=float(config_cache.get("max_idade_dias_extracao", 400)),
+        max_mb=float(config_cache.get("max_mb_extracao", 50)),
+    )
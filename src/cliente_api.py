@@ -0,0 +1,269 @@
+import random
+import threading
+import time
+import logging as log
+from contextlib import AbstractContextManager, nullcontext
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Any
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+def percentil(valores: list[float], p: float) -> float:
+    """Percentil por interpolação linear (valores não precisam estar ordenados)."""
+
+    ordenados = sorted(valores)
+    posicao = (len(ordenados) - 1) * p / 100
+    inferior = int(posicao)
+    superior = min(inferior + 1, len(ordenados) - 1)
+    return ordenados[inferior] + (ordenados[superior] - ordenados[inferior]) * (posicao - inferior)
+
+
+def resumir_duracoes(valores: list[float]) -> dict[str, float]:
+    """Quantidade e estatísticas (em ms, total em s) de uma lista de durações em segundos."""
+
+    if not valores:
+        return {"chamadas": 0, "total_s": 0.0, "media_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+
+    return {
+        "chamadas": len(valores),
+        "total_s": round(sum(valores), 3),
+        "media_ms": round(sum(valores) / len(valores) * 1000, 1),
+        "p50_ms": round(percentil(valores, 50) * 1000, 1),
+        "p95_ms": round(percentil(valores, 95) * 1000, 1),
+        "max_ms": round(max(valores) * 1000, 1),
+    }
+
+
+class LimitadorTaxa:
+    """Limite global de requisições por segundo, compartilhado por todas as threads."""
+
+    def __init__(self, requisicoes_por_segundo: float) -> None:
+        self.intervalo = 1 / requisicoes_por_segundo if requisicoes_por_segundo > 0 else 0.0
+        self._proximo = 0.0
+        self._lock = threading.Lock()
+
+    def aguardar(self) -> None:
+        if not self.intervalo:
+            return
+
+        with self._lock:
+            agora = time.monotonic()
+            self._proximo = max(self._proximo, agora)
+            espera = self._proximo - agora
+            self._proximo += self.intervalo
+
+        if espera > 0:
+            time.sleep(espera)
+
+
+class LimitadorConcorrencia:
+    """Limite adaptativo de requisições simultâneas (AIMD).
+
+    Cada resposta 429 corta o limite pela metade; cada resposta normal o recupera aos poucos
+    (+1 a cada `limite` sucessos), até o máximo configurado.
+    """
+
+    def __init__(self, maximo: int) -> None:
+        self.maximo = max(maximo, 1)
+        self.limite = float(self.maximo)
+        self._em_uso = 0
+        self._condicao = threading.Condition()
+
+    def adquirir(self) -> None:
+        with self._condicao:
+            while self._em_uso >= int(self.limite):
+                self._condicao.wait()
+            self._em_uso += 1
+
+    def liberar(self, estrangulado: bool) -> None:
+        with self._condicao:
+            self._em_uso -= 1
+
+            if estrangulado:
+                novo_limite = max(1.0, self.limite / 2)
+                if int(novo_limite) < int(self.limite):
+                    log.warning(
+                        f"API limitando requisições (429). Concorrência reduzida para {int(novo_limite)}.")
+                self.limite = novo_limite
+            else:
+                self.limite = min(float(self.maximo),
+                                  self.limite + 1 / self.limite)
+
+            self._condicao.notify_all()
+
+
+@dataclass(frozen=True)
+class PoliticaRetentativa:
+    """Quantas vezes e quanto esperar antes de repetir uma requisição que falhou de forma transitória."""
+
+    tentativas: int = 4
+    espera_base: float = 0.5
+    espera_maxima: float = 30.0
+    status_retentaveis: frozenset[int] = frozenset({429, 500, 502, 503, 504})
+
+    def espera(self, tentativa: int, response: requests.Response | None) -> float:
+        """Respeita o Retry-After; senão, backoff exponencial com jitter completo."""
+
+        if response is not None:
+            retry_after = _segundos_retry_after(
+                response.headers.get("Retry-After"))
+            if retry_after is not None:
+                return min(retry_after, self.espera_maxima)
+
+        teto = min(self.espera_maxima, self.espera_base * 2 ** tentativa)
+        return random.uniform(0, teto)
+
+
+def _segundos_retry_after(valor: str | None) -> float | None:
+    """Retry-After vem em segundos ou como data HTTP."""
+
+    if not valor:
+        return None
+
+    try:
+        return max(float(valor), 0.0)
+    except ValueError:
+        pass
+
+    try:
+        return max(parsedate_to_datetime(valor).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class ClienteSuperlogica:
+    """Sessão HTTP única (keep-alive) compartilhada por todas as chamadas à API Superlógica.
+
+    `limite_global` (modo multi-inquilino) é um semáforo compartilhado pelos clientes de todos
+    os inquilinos: limita as requisições em andamento no processo inteiro.
+    """
+
+    def __init__(self, pool_maxsize: int = 10, timeout_conexao: float = 5, timeout_leitura: float = 60, requisicoes_por_segundo: float = 0, paginas_simultaneas: int = 4, politica: PoliticaRetentativa | None = None, concorrencia_maxima: int | None = None, limite_global: threading.Semaphore | None = None) -> None:
+        self.sessao = requests.Session()
+
+        adaptador = HTTPAdapter(
+            pool_connections=pool_maxsize, pool_maxsize=pool_maxsize)
+        self.sessao.mount("https://", adaptador)
+        self.sessao.mount("http://", adaptador)
+
+        self.timeout = (timeout_conexao, timeout_leitura)
+        self.limitador = LimitadorTaxa(requisicoes_por_segundo)
+        self.paginas_simultaneas = paginas_simultaneas
+        self.politica = politica or PoliticaRetentativa()
+        self.concorrencia = LimitadorConcorrencia(
+            concorrencia_maxima or pool_maxsize)
+        self.limite_global: AbstractContextManager = limite_global or nullcontext()
+
+        self._latencias: dict[str, list[float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, url: str, headers: dict, params: dict | None = None) -> requests.Response:
+        return self._requisitar("GET", url, True, headers=headers, params=params)
+
+    def put(self, url: str, headers: dict, data: dict | None = None, idempotente: bool = False) -> requests.Response:
+        """PUT não idempotente (ex.: lançar despesa) só é repetido quando a API com certeza não o processou."""
+
+        return self._requisitar("PUT", url, idempotente, headers=headers, data=data)
+
+    def _requisitar(self, metodo: str, url: str, idempotente: bool, **kwargs: Any) -> requests.Response:
+        endpoint = f"{metodo} {urlsplit(url).path}"
+
+        for tentativa in range(self.politica.tentativas + 1):
+            self.limitador.aguardar()
+            self.concorrencia.adquirir()
+
+            response = None
+            erro: requests.exceptions.RequestException | None = None
+
+            with self.limite_global:
+                inicio = time.perf_counter()
+                try:
+                    response = self.sessao.request(
+                        metodo, url, timeout=self.timeout, **kwargs)
+                except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                    erro = e
+                finally:
+                    self.registrar_latencia(
+                        endpoint, time.perf_counter() - inicio)
+                    self.concorrencia.liberar(
+                        estrangulado=response is not None and response.status_code == 429)
+
+            if response is not None and response.status_code not in self.politica.status_retentaveis:
+                return response
+
+            # 429 e falha de conexão garantem que nada foi processado; o resto só se for idempotente
+            nao_processada = (response is not None and response.status_code == 429) or isinstance(
+                erro, requests.exceptions.ConnectTimeout)
+
+            if tentativa == self.politica.tentativas or not (idempotente or nao_processada):
+                break
+
+            espera = self.politica.espera(tentativa, response)
+            motivo = response.status_code if response is not None else repr(erro)
+            log.warning(
+                f"{endpoint}: {motivo}. Nova tentativa ({tentativa + 1}/{self.politica.tentativas}) em {espera:.1f} s.")
+            time.sleep(espera)
+
+        if response is not None:
+            return response
+        assert erro is not None
+        raise erro
+
+    def registrar_latencia(self, endpoint: str, segundos: float) -> None:
+        with self._lock:
+            self._latencias.setdefault(endpoint, []).append(segundos)
+
+    def latencias(self) -> dict[str, list[float]]:
+        """Cópia das latências (em segundos) registradas por endpoint."""
+
+        with self._lock:
+            return {k: list(v) for k, v in self._latencias.items()}
+
+    def reiniciar_latencias(self) -> None:
+        """Descarta as latências registradas (o modo vigia relata cada lote separadamente)."""
+
+        with self._lock:
+            self._latencias = {}
+
+    def resumo_latencias(self) -> dict[str, dict[str, float]]:
+        """Retorna, por endpoint, a quantidade de chamadas e as latências total, média, p50, p95 e máxima."""
+
+        return {endpoint: resumir_duracoes(valores) for endpoint, valores in self.latencias().items()}
+
+    def logar_latencias(self) -> None:
+        for endpoint, dados in self.resumo_latencias().items():
+            log.info(
+                f"Latência {endpoint}: {dados['chamadas']} chamadas, "
+                f"média {dados['media_ms']} ms, máx {dados['max_ms']} ms, total {dados['total_s']} s")
+
+    def fechar(self) -> None:
+        self.sessao.close()
+
+
+def criar_cliente(config: dict[str, Any], workers: int = 1, limite_global: threading.Semaphore | None = None) -> ClienteSuperlogica:
+    """Cria o cliente a partir da seção [HTTP] do config.json (opcional).
+
+    O pool nunca é menor que o número de workers, para que nenhuma thread abra conexão avulsa.
+    """
+
+    config_http = config.get("[HTTP]", {})
+
+    return ClienteSuperlogica(
+        pool_maxsize=max(int(config_http.get("pool_maxsize", 10)), workers),
+        timeout_conexao=float(config_http.get("timeout_conexao", 5)),
+        timeout_leitura=float(config_http.get("timeout_leitura", 60)),
+        requisicoes_por_segundo=float(
+            config_http.get("requisicoes_por_segundo", 0)),
+        paginas_simultaneas=int(config_http.get("paginas_simultaneas", 4)),
+        politica=PoliticaRetentativa(
+            tentativas=int(config_http.get("tentativas", 4)),
+            espera_base=float(config_http.get("espera_base", 0.5)),
+            espera_maxima=float(config_http.get("espera_maxima", 30)),
+        ),
+        concorrencia_maxima=int(config_http.get("concorrencia_maxima", 0)) or None,
+        limite_global=limite_global,
+    )
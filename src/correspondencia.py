@@ -0,0 +1,119 @@
+from collections import defaultdict
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+from typing import Callable
+
+FORM_ALTERAR = "FormAlterarValorDespesaPrincipal"
+FORM_LANCAR = "FormLancarDespesaPrincipal"
+
+DEBITO_PROPRIETARIO = "1"
+DEBITO_LOCATARIO = "2"
+
+CENTAVOS = Decimal("0.01")
+
+
+def normalizar_valor(valor: object) -> Decimal | None:
+    """Converte o valor ("94.2", "94.20", 94.2) para Decimal com 2 casas; None se não for numérico."""
+
+    try:
+        return Decimal(str(valor).strip()).quantize(CENTAVOS)
+    except (InvalidOperation, ValueError):
+        return None
+
+
+@dataclass(frozen=True)
+class RegraCorrespondencia:
+    """Diferenças entre as filas de imóveis ativos e vazios na escolha da despesa."""
+
+    debito: str
+    mensagem_debito: str
+    prefixo_mensagem: str = ""
+    # Vazios só usam o formulário de alteração quando a despesa tem os dois ids
+    alterar_exige_despm: bool = False
+
+
+REGRA_ATIVOS = RegraCorrespondencia(
+    debito=DEBITO_LOCATARIO,
+    mensagem_debito="Débito não está para o locatário",
+)
+
+REGRA_VAZIOS = RegraCorrespondencia(
+    debito=DEBITO_PROPRIETARIO,
+    mensagem_debito="Vazio Débito não está para o proprietário",
+    prefixo_mensagem="Vazio ",
+    alterar_exige_despm=True,
+)
+
+
+@dataclass
+class Correspondencia:
+    """Despesa escolhida para o carnê e o formulário do PUT, ou as mensagens de erro."""
+
+    despesa: dict | None = None
+    tipo_form: str | None = None
+    mensagem: list[str] = field(default_factory=list)
+
+
+class IndiceCorrespondencia:
+    """Índice hash das despesas por (dono, produto, valor, lado do débito).
+
+    Serve tanto para a lista de despesas de um contrato (sem `chave_dono`) quanto para a
+    listagem da competência inteira, em que `chave_dono` extrai o contrato/imóvel da despesa.
+    """
+
+    def __init__(self, despesas: list[dict], chave_dono: Callable[[dict], str] | None = None) -> None:
+        self._indice: dict[tuple[str, str, Decimal, str], list[dict]] = defaultdict(list)
+        self._por_dono: dict[str, list[dict]] = defaultdict(list)
+        self._debitos: dict[tuple[str, str, Decimal], set[str]] = defaultdict(set)
+
+        for despesa in despesas:
+            dono = chave_dono(despesa) if chave_dono else ""
+            self._por_dono[dono].append(despesa)
+
+            valor = normalizar_valor(despesa["vl_valor_imod"])
+            if valor is None:
+                continue
+
+            chave = (dono, despesa["st_descricao_prd"], valor)
+            self._indice[(*chave, despesa["id_debito_imod"])].append(despesa)
+            self._debitos[chave].add(despesa["id_debito_imod"])
+
+    def possui(self, dono: str) -> bool:
+        return dono in self._por_dono
+
+    def corresponder(self, valor_total: str, regra: RegraCorrespondencia, dono: str = "") -> Correspondencia:
+        valor = normalizar_valor(valor_total)
+
+        if valor is not None:
+            for despesa in self._indice.get((dono, "IPTU", valor, regra.debito), []):
+                id_despesa_desp = despesa["id_despesa_desp"]
+                id_despesa_despm = despesa["id_despesa_despm"]
+
+                if id_despesa_desp and (id_despesa_despm or not regra.alterar_exige_despm):
+                    return Correspondencia(despesa, FORM_ALTERAR)
+                if id_despesa_despm:
+                    return Correspondencia(despesa, FORM_LANCAR)
+
+            for debito in self._debitos.get((dono, "IPTU", valor), set()) - {regra.debito}:
+                despesas = self._indice[(dono, "IPTU", valor, debito)]
+                if any(d["id_despesa_desp"] or d["id_despesa_despm"] for d in despesas):
+                    # Despesa com lançamento válido, mas com o débito do lado errado
+                    return Correspondencia(mensagem=[regra.mensagem_debito])
+
+        return Correspondencia(mensagem=self._mensagens_erro(valor, regra, dono))
+
+    def _mensagens_erro(self, valor: Decimal | None, regra: RegraCorrespondencia, dono: str) -> list[str]:
+        """Um motivo por despesa do dono, como no registro do arquivo movido para iptu_erro."""
+
+        mensagem = []
+        for despesa in self._por_dono.get(dono, []):
+            valor_lancamento = normalizar_valor(despesa["vl_valor_imod"])
+
+            if valor_lancamento != valor:
+                mensagem.append(f"{regra.prefixo_mensagem}Valor lançamento incorreto")
+            elif despesa["st_descricao_prd"] == "IPTU":
+                mensagem.append(f"{regra.prefixo_mensagem}Sem id lançamento")
+            else:
+                mensagem.append(f"{regra.prefixo_mensagem}Sem lançamento")
+
+        return mensagem
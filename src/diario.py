@@ -0,0 +1,136 @@
+import json
+import os
+import time
+import threading
+import logging as log
+from pathlib import Path
+from typing import Any
+
+import requests
+
+from cache_extracao import hash_arquivo
+
+CAMINHO_DIARIO = Path("data/diario_execucao.jsonl")
+
+# Ordem em que cada pdf avança; "movido" encerra o registro do pdf
+ETAPAS = ("extraido", "correspondido", "info_obtida",
+          "put_enviado", "put_feito", "movido")
+
+
+class LancamentoNaoConfirmado(requests.exceptions.HTTPError):
+    """PUT de lançamento enviado em uma execução interrompida antes da confirmação."""
+
+
+class DiarioExecucao:
+    """Diário append-only (JSONL com fsync) das etapas concluídas de cada pdf.
+
+    Se o processo morrer no meio do lote, a próxima execução retoma cada pdf da última etapa
+    registrada: não refaz consultas já feitas e nunca reenvia um PUT já confirmado. A chave
+    inclui a competência e o hash do conteúdo, então um arquivo diferente com o mesmo nome
+    começa do zero.
+    """
+
+    def __init__(self, competencia: str, caminho: Path = CAMINHO_DIARIO) -> None:
+        self.competencia = competencia
+        self.caminho = Path(caminho)
+
+        self._pendentes: dict[str, dict[str, Any]] = {}
+        self._chaves: dict[Path, str] = {}
+        self._lock = threading.Lock()
+
+        self._carregar()
+
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        self._arquivo = open(self.caminho, "a", encoding="utf-8")
+
+    def _carregar(self) -> None:
+        """Lê o diário e o reescreve só com os pdfs ainda não concluídos."""
+
+        try:
+            with open(self.caminho, "r", encoding="utf-8") as file:
+                linhas = file.readlines()
+        except FileNotFoundError:
+            return
+
+        for linha in linhas:
+            try:
+                registro = json.loads(linha)
+            except json.JSONDecodeError:
+                # Última linha cortada por uma queda no meio da escrita
+                continue
+
+            chave, etapa = registro["chave"], registro["etapa"]
+            if etapa == "movido":
+                self._pendentes.pop(chave, None)
+            else:
+                self._pendentes.setdefault(chave, {})[etapa] = registro.get("dados")
+
+        if self._pendentes:
+            log.info(
+                f"Diário de execução: {len(self._pendentes)} pdfs interrompidos serão retomados.")
+
+        self._reescrever()
+
+    def _reescrever(self) -> None:
+        temporario = self.caminho.with_suffix(".tmp")
+        with open(temporario, "w", encoding="utf-8") as file:
+            for chave, etapas in self._pendentes.items():
+                for etapa, dados in etapas.items():
+                    file.write(json.dumps(
+                        {"chave": chave, "etapa": etapa, "dados": dados}, ensure_ascii=False) + "\n")
+        os.replace(temporario, self.caminho)
+
+    def chave(self, pdf: Path, hash_pdf: str | None = None) -> str:
+        """Chave do pdf no diário; calculada enquanto o arquivo ainda está na pasta de entrada.
+
+        `hash_pdf` evita reler o arquivo quando o chamador já tem o hash do conteúdo.
+        """
+
+        with self._lock:
+            if pdf not in self._chaves:
+                if hash_pdf is None:
+                    try:
+                        hash_pdf = hash_arquivo(pdf)
+                    except OSError:
+                        hash_pdf = ""
+                self._chaves[pdf] = f"{self.competencia}|{pdf.name}|{hash_pdf}"
+            return self._chaves[pdf]
+
+    def estado(self, pdf: Path) -> dict[str, Any]:
+        """Etapas já concluídas do pdf e seus dados (vazio se o pdf não foi interrompido)."""
+
+        chave = self.chave(pdf)
+        with self._lock:
+            return dict(self._pendentes.get(chave, {}))
+
+    def registrar(self, pdf: Path, etapa: str, dados: Any = None) -> None:
+        chave = self.chave(pdf)
+        linha = json.dumps({"chave": chave, "etapa": etapa, "dados": dados,
+                            "ts": time.strftime("%Y-%m-%d %H:%M:%S")}, ensure_ascii=False)
+
+        with self._lock:
+            self._arquivo.write(linha + "\n")
+            self._arquivo.flush()
+            os.fsync(self._arquivo.fileno())
+
+            if etapa == "movido":
+                self._pendentes.pop(chave, None)
+                self._chaves.pop(pdf, None)
+            else:
+                self._pendentes.setdefault(chave, {})[etapa] = dados
+
+    def compactar(self) -> None:
+        """Reescreve o diário só com os pdfs ainda não concluídos, sem fechar a competência.
+
+        No modo vigia o diário fica aberto enquanto o processo viver; compactar depois de cada
+        lote impede que ele cresça com os pdfs já movidos.
+        """
+
+        with self._lock:
+            self._arquivo.close()
+            self._reescrever()
+            self._arquivo = open(self.caminho, "a", encoding="utf-8")
+
+    def fechar(self) -> None:
+        with self._lock:
+            self._arquivo.close()
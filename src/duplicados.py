@@ -0,0 +1,102 @@
+import re
+import threading
+from pathlib import Path
+from datetime import datetime, timedelta
+from typing import Any
+
+from banco_local import BancoLocal
+from filas import SUFIXO_COPIA
+
+# Linha digitável de arrecadação tem 48 dígitos (44 sem os DVs); menos que isso é lixo da extração
+MIN_DIGITOS_BARRAS = 44
+
+
+def normalizar_barras(cod_barras: str) -> str:
+    """Só os dígitos do código de barras; vazio se não parecer um código de barras."""
+
+    digitos = re.sub(r"\D", "", cod_barras or "")
+    return digitos if len(digitos) >= MIN_DIGITOS_BARRAS else ""
+
+
+def prioridade_original(pdf: Path) -> tuple[bool, str, str]:
+    """Ordem estável entre cópias do mesmo carnê: o nome sem " (n)" primeiro, depois o nome."""
+
+    return bool(SUFIXO_COPIA.search(pdf.stem)), pdf.name.lower(), pdf.name
+
+
+class Deduplicador:
+    """Reconhece cópias do mesmo carnê antes de qualquer chamada à API.
+
+    A impressão digital de um pdf é o hash do conteúdo e o código de barras da parcela: o
+    mesmo arquivo salvo com outro nome tem o mesmo hash, e o mesmo carnê baixado de novo tem
+    o mesmo código de barras. A primeira cópia que chega é planejada (a API é consultada uma
+    vez por carnê); as demais, no mesmo lote ou já lançadas nos últimos `dias_historico` dias
+    (banco local), não.
+
+    A ordem de chegada depende da extração, então no fim do planejamento `grupos` diz quais
+    cópias o lote teve e o original definitivo sai de `prioridade_original`, não de quem
+    terminou primeiro.
+    """
+
+    def __init__(self, competencia: str, banco: BancoLocal | None = None, dias_historico: float = 120) -> None:
+        self.competencia = competencia
+        self.banco = banco
+        self.desde = (datetime.now() - timedelta(days=dias_historico)
+                      ).isoformat(timespec="seconds")
+
+        self._vistos: dict[str, Path] = {}
+        # Primeiro pdf de cada carnê repetido no lote -> as cópias que chegaram depois
+        self._copias: dict[Path, list[Path]] = {}
+        self._lock = threading.Lock()
+
+    def original(self, pdf: Path, hash_pdf: str, cod_barras: str) -> str | None:
+        """Nome do pdf de que este é cópia; None se ele for o primeiro (e passa a ser o original)."""
+
+        chaves = [f"hash:{hash_pdf}"] if hash_pdf else []
+        barras = normalizar_barras(cod_barras)
+        if barras:
+            chaves.append(f"barras:{barras}")
+
+        if not chaves:
+            return None
+
+        with self._lock:
+            for chave in chaves:
+                if chave in self._vistos:
+                    primeiro = self._vistos[chave]
+                    self._copias.setdefault(primeiro, []).append(pdf)
+                    return primeiro.name
+            for chave in chaves:
+                self._vistos[chave] = pdf
+
+        if self.banco is not None:
+            return self.banco.lancamento_anterior(self.competencia, hash_pdf, barras, self.desde)
+        return None
+
+    def grupos(self) -> dict[Path, list[Path]]:
+        """Carnês com cópias no lote: primeiro pdf a chegar (o planejado) -> todos os pdfs do carnê."""
+
+        with self._lock:
+            return {primeiro: [primeiro, *copias] for primeiro, copias in self._copias.items()}
+
+
+def ignorar_historico(config: dict[str, Any]) -> None:
+    """Só nesta execução: carnês já lançados voltam a ser planejados (cópias no lote continuam barradas)."""
+
+    config.setdefault("[EXECUCAO]", {})["historico_duplicados"] = False
+
+
+def criar_deduplicador(config: dict[str, Any], competencia: str, banco: BancoLocal | None) -> Deduplicador | None:
+    """Deduplicador da seção [EXECUCAO] do config.json (ligado por padrão).
+
+    Com `historico_duplicados` falso, só as cópias dentro do lote são barradas.
+    """
+
+    config_execucao = config.get("[EXECUCAO]", {})
+    if not config_execucao.get("deduplicar", True):
+        return None
+
+    if not config_execucao.get("historico_duplicados", True):
+        banco = None
+
+    return Deduplicador(competencia, banco, float(config_execucao.get("dias_historico_duplicados", 120)))
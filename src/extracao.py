@@ -0,0 +1,246 @@
+import os
+import time
+import logging as log
+from pathlib import Path
+from typing import Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+
+from pypdf import PageObject, PdfReader
+
+from cache_extracao import CacheExtracao, hash_arquivo
+from extracao_rapida import extrair_pagina_rapida
+from registro import config_log_atual, fila_log_filhos, iniciar_log_filho
+
+DadosPdf = tuple[str, str, str]
+
+
+def indice_pagina_competencia(qtd_paginas: int, mes_lancamento: int) -> int:
+    """Índice da página do mês no carnê (carnês com menos de 12 páginas começam depois de janeiro)."""
+
+    corretor_indice = 12 - qtd_paginas
+
+    return int(mes_lancamento-corretor_indice)
+
+
+def _extrair_pagina(reader: PdfReader, indice_pagina: int) -> DadosPdf:
+    pagina = reader.pages[indice_pagina]
+
+    # Caminho rápido: campos validados direto do content stream, sem o layout do extract_text
+    try:
+        dados = extrair_pagina_rapida(pagina)
+    except Exception as e:
+        log.debug("Leitura rápida falhou na página %d: %s", indice_pagina, e)
+        dados = None
+    if dados is not None:
+        return dados
+
+    return _extrair_pagina_texto(pagina)
+
+
+def _extrair_pagina_texto(pagina: PageObject) -> DadosPdf:
+    """Leitura pelas linhas fixas do texto da página (12, 31 e 33 no layout atual do carnê)."""
+
+    texto_pagina = pagina.extract_text().split("\n")
+
+    data_vencimento = texto_pagina[12]
+    cod_barras = texto_pagina[33].replace(".", "").replace(" ", "")
+    valor_total = texto_pagina[31].replace(".", "").replace(",", ".")
+
+    return data_vencimento, cod_barras, valor_total
+
+
+def extrair_dados_pdf(caminho_pdf: Path, mes_lancamento: int) -> DadosPdf:
+    """Extrai do pdf a data de vencimento, código de barras e valor total."""
+
+    return _extrair_com_paginacao(caminho_pdf, mes_lancamento)[1]
+
+
+def _extrair_com_paginacao(caminho_pdf: Path, mes_lancamento: int) -> tuple[int, DadosPdf]:
+    """Como `extrair_dados_pdf`, devolvendo também a quantidade de páginas (para o cache)."""
+
+    reader = PdfReader(caminho_pdf)
+
+    qtd_paginas = reader.get_num_pages()
+
+    dados = _extrair_pagina(
+        reader, indice_pagina_competencia(qtd_paginas, mes_lancamento))
+
+    log.debug("Dados extraídos do pdf %s.", caminho_pdf.name)
+    return qtd_paginas, dados
+
+
+def extrair_parcelas_pdf(caminho_pdf: Path, meses: Iterable[int]) -> tuple[int, dict[int, DadosPdf]]:
+    """Abre o carnê uma só vez e extrai a parcela de cada mês de `meses` que tenha página.
+
+    Meses anteriores à primeira página (carnês com menos de 12 páginas) ficam de fora.
+    """
+
+    reader = PdfReader(caminho_pdf)
+
+    qtd_paginas = reader.get_num_pages()
+
+    parcelas = {}
+    for mes in meses:
+        indice_pagina = indice_pagina_competencia(qtd_paginas, mes)
+        if 0 <= indice_pagina < qtd_paginas:
+            parcelas[mes] = _extrair_pagina(reader, indice_pagina)
+
+    log.debug("Parcelas extraídas do pdf %s: %d.",
+              caminho_pdf.name, len(parcelas))
+    return qtd_paginas, parcelas
+
+
+def _extrair_cronometrado(caminho_pdf: Path, mes_lancamento: int) -> tuple[int, dict[int, DadosPdf], float]:
+    inicio = time.perf_counter()
+    qtd_paginas, dados = _extrair_com_paginacao(caminho_pdf, mes_lancamento)
+    return qtd_paginas, {mes_lancamento: dados}, time.perf_counter() - inicio
+
+
+def _extrair_parcelas_cronometrado(caminho_pdf: Path, meses: tuple[int, ...]) -> tuple[int, dict[int, DadosPdf], float]:
+    inicio = time.perf_counter()
+    qtd_paginas, parcelas = extrair_parcelas_pdf(caminho_pdf, meses)
+    return qtd_paginas, parcelas, time.perf_counter() - inicio
+
+
+class EstagioExtracao:
+    """Extrai os dados de todos os pdfs em um pool de processos, em paralelo às chamadas de API.
+
+    A extração de texto do pypdf é puro Python e limitada por CPU, então roda fora das threads
+    de rede. `pdfs` (em geral a varredura da pasta, ainda em andamento) é consumido aos poucos:
+    no máximo `em_andamento` pdfs ficam entre o envio ao pool e a entrega do resultado, então
+    a memória não cresce com o tamanho da entrada. Os primeiros já vão para o pool na criação,
+    e `concluidos` entrega os resultados conforme ficam prontos, enviando os próximos. Com
+    `cache`, pdfs cuja página do mês já foi lida antes (mesmo conteúdo, qualquer nome) não
+    passam pelo pypdf.
+
+    Cada resultado vem com o hash do conteúdo, calculado uma única vez aqui e reaproveitado
+    pelo planejamento (duplicados, diário).
+
+    Com `meses` (modo anual), cada carnê é lido uma vez para todos esses meses e `parcelas`
+    entrega o mapa mês -> dados de cada pdf.
+    """
+
+    def __init__(self, pdfs: Iterable[Path], mes_lancamento: int, processos: int | None = None, cache: CacheExtracao | None = None, meses: Iterable[int] | None = None, em_andamento: int | None = None) -> None:
+        self.mes_lancamento = mes_lancamento
+        self.meses = tuple(meses) if meses is not None else None
+        self.cache = cache
+
+        self._executor = ProcessPoolExecutor(
+            max_workers=processos, initializer=iniciar_log_filho,
+            initargs=(config_log_atual(), fila_log_filhos()))
+        # Folga de alguns pdfs por processo para o pool nunca ficar ocioso esperando o consumidor
+        self._limite = em_andamento or 4 * (processos or os.cpu_count() or 1)
+        self._pdfs = iter(pdfs)
+        self._esgotado = False
+        self._pendentes: dict[Future[tuple[int, dict[int, DadosPdf], float]], tuple[Path, str]] = {}
+
+        # Tempo de extração de cada pdf que passou pelo pypdf (acertos de cache não entram)
+        self.duracoes: list[float] = []
+
+        try:
+            self._abastecer()
+        except BaseException:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            raise
+
+    def _abastecer(self) -> None:
+        """Envia pdfs da entrada até o limite de extrações em andamento."""
+
+        while not self._esgotado and len(self._pendentes) < self._limite:
+            pdf = next(self._pdfs, None)
+            if pdf is None:
+                self._esgotado = True
+                return
+
+            try:
+                hash_pdf = hash_arquivo(pdf)
+            except OSError:
+                # Sumiu da entrada; a extração falha e o planejamento registra o erro
+                hash_pdf = ""
+
+            self._pendentes[self._agendar(pdf, hash_pdf)] = (pdf, hash_pdf)
+
+    def _buscar_no_cache(self, hash_pdf: str) -> tuple[int, dict[int, DadosPdf]] | None:
+        """Parcelas já lidas do carnê; None se faltar alguma página pedida."""
+
+        assert self.cache is not None
+
+        qtd_paginas = self.cache.qtd_paginas(hash_pdf)
+        if qtd_paginas is None:
+            return None
+
+        if self.meses is None:
+            meses = {self.mes_lancamento: indice_pagina_competencia(
+                qtd_paginas, self.mes_lancamento)}
+        else:
+            meses = {mes: indice_pagina_competencia(qtd_paginas, mes) for mes in self.meses}
+            meses = {mes: indice for mes, indice in meses.items()
+                     if 0 <= indice < qtd_paginas}
+
+        parcelas = {}
+        for mes, indice_pagina in meses.items():
+            dados = self.cache.buscar(hash_pdf, indice_pagina)
+            if dados is None:
+                return None
+            parcelas[mes] = dados
+
+        return qtd_paginas, parcelas
+
+    def _agendar(self, pdf: Path, hash_pdf: str) -> Future[tuple[int, dict[int, DadosPdf], float]]:
+        if self.cache is not None and hash_pdf:
+            em_cache = self._buscar_no_cache(hash_pdf)
+            if em_cache is not None:
+                futuro: Future[tuple[int, dict[int, DadosPdf], float]] = Future()
+                futuro.set_result((*em_cache, 0.0))
+                return futuro
+
+        if self.meses is not None:
+            return self._executor.submit(_extrair_parcelas_cronometrado, pdf, self.meses)
+        return self._executor.submit(_extrair_cronometrado, pdf, self.mes_lancamento)
+
+    def parcelas(self) -> Iterator[tuple[Path, str, dict[int, DadosPdf] | Exception]]:
+        """Gera (pdf, hash, {mês: dados}) na ordem em que as extrações terminam; falhas vêm como a exceção."""
+
+        while self._pendentes:
+            prontos, _ = wait(self._pendentes, return_when=FIRST_COMPLETED)
+
+            for futuro in prontos:
+                pdf, hash_pdf = self._pendentes.pop(futuro)
+                try:
+                    qtd_paginas, parcelas, duracao = futuro.result()
+                except Exception as e:
+                    yield pdf, hash_pdf, e
+                    continue
+
+                # Duração 0: veio do cache, não há o que medir nem gravar
+                if duracao:
+                    self.duracoes.append(duracao)
+
+                    if self.cache is not None and hash_pdf:
+                        for mes, dados in parcelas.items():
+                            self.cache.gravar(
+                                hash_pdf, qtd_paginas, indice_pagina_competencia(qtd_paginas, mes), dados)
+
+                yield pdf, hash_pdf, parcelas
+
+            self._abastecer()
+
+    def concluidos(self) -> Iterator[tuple[Path, str, DadosPdf | Exception]]:
+        """Gera (pdf, hash, dados) na ordem em que as extrações terminam; falhas vêm como a exceção."""
+
+        for pdf, hash_pdf, parcelas in self.parcelas():
+            if isinstance(parcelas, Exception):
+                yield pdf, hash_pdf, parcelas
+            else:
+                yield pdf, hash_pdf, parcelas[self.mes_lancamento]
+
+    def encerrar(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        if self.cache is not None:
+            self.cache.salvar()
+
+    def __enter__(self) -> "EstagioExtracao":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.encerrar()
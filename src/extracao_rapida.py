@@ -0,0 +1,172 @@
+import re
+from datetime import date
+
+from pypdf import PageObject
+
+# Operandos de texto do content stream: array de TJ, ou string de Tj / ' / "
+_LITERAL = rb"\((?:[^()\\]|\\.|\((?:[^()\\]|\\.)*\))*\)"
+_HEXA = rb"<[0-9A-Fa-f\s]*>"
+_TEXTO = re.compile(
+    rb"\[(?P<array>(?:" + _LITERAL + rb"|" + _HEXA + rb"|[^\]()<])*)\]\s*TJ"
+    rb"|(?P<string>" + _LITERAL + rb"|" + _HEXA + rb")\s*(?:Tj|'|\")",
+    re.DOTALL)
+_STRING = re.compile(_LITERAL + rb"|" + _HEXA, re.DOTALL)
+
+_ESCAPES = {b"n": b"\n", b"r": b"\r", b"t": b"\t", b"b": b"\b", b"f": b"\f"}
+_ESCAPE = re.compile(rb"\\([0-7]{1,3}|\r\n|[\r\n]|.)", re.DOTALL)
+
+_DATA = re.compile(r"(?<!\d)(\d{2})/(\d{2})/(\d{4})(?!\d)")
+# Valor no formato brasileiro: 1.094,20 / 94,20
+_VALOR = re.compile(r"(?<![\d.,])(\d{1,3}(?:\.\d{3})*|\d+),(\d{2})(?![\d,])")
+# Linha digitável de arrecadação: 4 blocos de 11 dígitos + DV, com ou sem separadores
+_SEP = r"[\s.\-]*"
+_LINHA_DIGITAVEL = re.compile(
+    r"(?<!\d)" + _SEP.join([r"(\d{11})" + _SEP + r"(\d)"] * 4) + r"(?!\d)")
+
+
+def _escape(correspondencia: re.Match) -> bytes:
+    sequencia = correspondencia.group(1)
+    if sequencia[:1].isdigit():
+        return bytes([int(sequencia, 8) & 0xFF])
+    if sequencia in (b"\r\n", b"\r", b"\n"):
+        return b""
+    return _ESCAPES.get(sequencia, sequencia)
+
+
+def _decodificar_string(token: bytes) -> str:
+    if token.startswith(b"<"):
+        hexa = re.sub(rb"\s", b"", token[1:-1])
+        bruto = bytes.fromhex((hexa + b"0" * (len(hexa) % 2)).decode())
+    else:
+        bruto = _ESCAPE.sub(_escape, token[1:-1])
+    # Fontes padrão (WinAnsi/Standard) têm dígitos e pontuação em ASCII
+    return bruto.decode("latin-1")
+
+
+def textos_da_pagina(conteudo: bytes) -> list[str]:
+    """Strings mostradas pelos operadores de texto, na ordem do content stream (sem layout)."""
+
+    textos = []
+    for operador in _TEXTO.finditer(conteudo):
+        if operador.group("array") is not None:
+            partes = _STRING.findall(operador.group("array"))
+            textos.append("".join(_decodificar_string(parte) for parte in partes))
+        else:
+            textos.append(_decodificar_string(operador.group("string")))
+    return textos
+
+
+def modulo_10(digitos: str) -> int:
+    """DV módulo 10 da FEBRABAN (pesos 2, 1, 2, 1... da direita para a esquerda)."""
+
+    soma = 0
+    for i, digito in enumerate(reversed(digitos)):
+        produto = int(digito) * (2 if i % 2 == 0 else 1)
+        soma += produto // 10 + produto % 10
+    return (10 - soma % 10) % 10
+
+
+def modulo_11(digitos: str) -> int:
+    """DV módulo 11 da FEBRABAN para arrecadação (pesos 2 a 9; resto 0 ou 1 dá 0)."""
+
+    soma = sum(int(digito) * (2 + i % 8)
+               for i, digito in enumerate(reversed(digitos)))
+    resto = soma % 11
+    return 0 if resto in (0, 1) else 11 - resto
+
+
+def validar_linha_digitavel(blocos: tuple[str, ...]) -> str | None:
+    """48 dígitos da linha digitável de arrecadação se todos os DVs conferem; senão None.
+
+    O terceiro dígito do código diz o módulo (6/7 -> 10, 8/9 -> 11); cada bloco de 11 dígitos
+    tem seu DV e o código de 44 dígitos tem o DV geral na quarta posição.
+    """
+
+    codigo = "".join(blocos[0::2])
+    if codigo[0] != "8" or codigo[2] not in "6789":
+        return None
+
+    modulo = modulo_10 if codigo[2] in "67" else modulo_11
+
+    for bloco, dv in zip(blocos[0::2], blocos[1::2]):
+        if modulo(bloco) != int(dv):
+            return None
+    if modulo(codigo[:3] + codigo[4:]) != int(codigo[3]):
+        return None
+
+    return "".join(blocos)
+
+
+def _codigo_barras(texto: str) -> str | None:
+    for candidato in _LINHA_DIGITAVEL.finditer(texto):
+        linha = validar_linha_digitavel(candidato.groups())
+        if linha is not None:
+            return linha
+    return None
+
+
+def _valor(texto: str, linha_digitavel: str) -> str | None:
+    candidatos = {f"{inteiro.replace('.', '')}.{centavos}"
+                  for inteiro, centavos in _VALOR.findall(texto)}
+
+    codigo = "".join(linha_digitavel[i:i + 11] for i in range(0, 48, 12))
+    if codigo[2] in "68":
+        # Valor efetivo: está no próprio código de barras (posições 5 a 15, em centavos)
+        no_codigo = f"{int(codigo[4:15]) // 100}.{int(codigo[4:15]) % 100:02d}"
+        return no_codigo if no_codigo in candidatos else None
+
+    # Valor de referência: só aceita se o carnê imprime um único valor
+    return candidatos.pop() if len(candidatos) == 1 else None
+
+
+def _data_valida(dia: str, mes: str, ano: str) -> bool:
+    try:
+        date(int(ano), int(mes), int(dia))
+    except ValueError:
+        return False
+    return True
+
+
+def _datas(textos: list[str]) -> set[str]:
+    return {f"{dia}/{mes}/{ano}" for texto in textos
+            for dia, mes, ano in _DATA.findall(texto) if _data_valida(dia, mes, ano)}
+
+
+def _vencimento(textos: list[str]) -> str | None:
+    # Datas logo depois de cada rótulo "Vencimento"; sem rótulo, a única data da página.
+    # Duas datas candidatas diferentes (ex.: "Vencimento" ao lado de "Emissão") é ambíguo:
+    # None, e a página vai para o extract_text, que lê o vencimento na linha 12.
+    rotuladas: set[str] = set()
+    for i, texto in enumerate(textos):
+        if "venc" in texto.lower():
+            rotuladas |= _datas(textos[i:i + 4])
+
+    datas = rotuladas or _datas(textos)
+    return datas.pop() if len(datas) == 1 else None
+
+
+def extrair_pagina_rapida(pagina: PageObject) -> tuple[str, str, str] | None:
+    """Vencimento, linha digitável e valor lidos direto do content stream, sem montar o layout.
+
+    Só aceita o resultado quando os três campos são inequívocos: linha digitável com todos
+    os DVs corretos, valor igual ao do código de barras (ou único na página) e uma única data
+    junto ao rótulo de vencimento (ou única data na página). Qualquer dúvida retorna None e o chamador usa o extract_text.
+    """
+
+    conteudo = pagina.get_contents()
+    if conteudo is None:
+        return None
+
+    textos = textos_da_pagina(conteudo.get_data())
+    texto = "\n".join(textos)
+
+    linha_digitavel = _codigo_barras(texto)
+    if linha_digitavel is None:
+        return None
+
+    valor = _valor(texto, linha_digitavel)
+    vencimento = _vencimento(textos)
+    if valor is None or vencimento is None:
+        return None
+
+    return vencimento, linha_digitavel, valor
@@ -0,0 +1,74 @@
+import re
+from dataclasses import dataclass
+
+from correspondencia import REGRA_ATIVOS, REGRA_VAZIOS, RegraCorrespondencia
+
+# Sufixo que o Windows/navegador acrescenta a cópias: "I0001234 (1).pdf"
+SUFIXO_COPIA = re.compile(r" \(\d+\)$")
+
+
+@dataclass(frozen=True)
+class FilaLancamento:
+    """Parâmetros que distinguem a fila de imóveis ativos (contratos) da de imóveis vazios.
+
+    `relacao`, `pasta_entrada` e `pasta_ok` são nomes de atributos do ContextoExecucao;
+    `indice` é o atributo correspondente de IndiceDespesas.
+    """
+
+    nome: str
+    regra: RegraCorrespondencia
+    # Parâmetro da listagem de despesas que filtra pelo dono (contrato ou imóvel)
+    chave_filtro: str
+    relacao: str
+    indice: str
+    pasta_entrada: str
+    pasta_ok: str
+    titulo_log: str
+    dono: str
+    mensagem_sem_id: str
+    log_sem_id: str
+    mensagem_sem_despesas: str
+    # Código composto do Superlogica "I0000000 AP00000_ESTASA" vira "I0000000 | AP00000_ESTASA"
+    codigo_composto: bool = False
+
+    def codigo(self, nome_pdf: str) -> str:
+        """Código do contrato/imóvel na relação a partir do nome do pdf."""
+
+        codigo = SUFIXO_COPIA.sub("", nome_pdf.strip()).upper()
+        if self.codigo_composto and len(codigo) > 8:
+            codigo = codigo.replace(" ", " | ")
+        return codigo
+
+
+FILA_ATIVOS = FilaLancamento(
+    nome="ativos",
+    regra=REGRA_ATIVOS,
+    chave_filtro="idContrato",
+    relacao="dict_id_contratos",
+    indice="contratos",
+    pasta_entrada="caminho_busca_iptu_ativos",
+    pasta_ok="caminho_iptu_ok",
+    titulo_log="IMÓVEL ATUAL",
+    dono="contrato",
+    mensagem_sem_id="Imóvel Vazio",
+    log_sem_id="Id do contrato não encontrado na relação. Imóvel vazio.",
+    mensagem_sem_despesas="Sem despesas IPTU no contrato",
+    codigo_composto=True,
+)
+
+FILA_VAZIOS = FilaLancamento(
+    nome="vazios",
+    regra=REGRA_VAZIOS,
+    chave_filtro="ID_IMOVEL_SEM_CONTRATO",
+    relacao="dict_id_imoveis",
+    indice="imoveis_sem_contrato",
+    pasta_entrada="caminho_busca_iptu_vazios",
+    pasta_ok="caminho_iptu_ok_vazios",
+    titulo_log="IMÓVEL VAZIO ATUAL",
+    dono="imóvel",
+    mensagem_sem_id="Vazio Id não encontrado",
+    log_sem_id="Id do imóvel não encontrado na relação de Vazios",
+    mensagem_sem_despesas="Vazio Sem despesas IPTU no imóvel",
+)
+
+FILAS = {fila.nome: fila for fila in (FILA_ATIVOS, FILA_VAZIOS)}
@@ -0,0 +1,70 @@
+import logging as log
+
+from correspondencia import IndiceCorrespondencia
+
+# Data da despesa que a listagem filtra por dtInicioMensal/dtFimMensal (m/d/aaaa, como a API)
+CAMPO_VENCIMENTO = "dt_vencimento_imod"
+
+
+def _id_contrato(despesa: dict) -> str:
+    id_contrato = str(despesa.get("id_contrato_con") or "").upper()
+    return "" if id_contrato == "0" else id_contrato
+
+
+def _id_imovel(despesa: dict) -> str:
+    return str(despesa.get("id_imovel_imo") or "").upper()
+
+
+class IndiceDespesas:
+    """Despesas IPTU de uma competência inteira, indexadas por contrato e por imóvel.
+
+    Substitui a consulta de despesas por pdf: uma única varredura paginada da competência
+    alimenta o índice e cada carnê é atendido em memória.
+    """
+
+    def __init__(self, despesas: list[dict]) -> None:
+        self.total = len(despesas)
+
+        com_contrato = [d for d in despesas if _id_contrato(d)]
+        # Imóvel vazio: despesa lançada direto no imóvel, sem contrato
+        sem_contrato = [d for d in despesas
+                        if not _id_contrato(d) and _id_imovel(d)]
+
+        self.contratos = IndiceCorrespondencia(com_contrato, _id_contrato)
+        self.imoveis_sem_contrato = IndiceCorrespondencia(
+            sem_contrato, _id_imovel)
+
+
+def competencia_da_despesa(despesa: dict) -> tuple[int, int] | None:
+    """(ano, mês) da despesa pela data de vencimento; None se a data não vier ou for inválida."""
+
+    try:
+        mes, _, ano = (int(parte) for parte in str(despesa[CAMPO_VENCIMENTO]).split(" ")[0].split("/"))
+    except (KeyError, ValueError):
+        return None
+    return ano, mes
+
+
+def separar_por_competencia(despesas: list[dict]) -> dict[tuple[int, int], list[dict]]:
+    """Separa a listagem de um período de vários meses por competência (ano, mês)."""
+
+    por_competencia: dict[tuple[int, int], list[dict]] = {}
+    sem_data = 0
+    for despesa in despesas:
+        competencia = competencia_da_despesa(despesa)
+        if competencia is None:
+            sem_data += 1
+            continue
+        por_competencia.setdefault(competencia, []).append(despesa)
+
+    if sem_data:
+        log.warning(
+            f"{sem_data} despesas sem {CAMPO_VENCIMENTO} válido ficaram fora do lançamento anual.")
+
+    return por_competencia
+
+
+def indices_por_competencia(por_competencia: dict[tuple[int, int], list[dict]]) -> dict[tuple[int, int], IndiceDespesas]:
+    """Um índice por competência a partir de `separar_por_competencia`."""
+
+    return {competencia: IndiceDespesas(lista) for competencia, lista in por_competencia.items()}
@@ -1,32 +1,53 @@
+import os
 import json
-import shutil
+import sqlite3
+import time
+import signal
+import argparse
+import threading
 import logging as log
 from copy import deepcopy
 from pathlib import Path
 from datetime import date, datetime
-from typing import Any
+from dataclasses import asdict, dataclass, field, replace
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Iterable, Iterator, Mapping
 
 import requests
-from pypdf import PdfReader
 
-
-log.basicConfig(
-    level=log.INFO,
-    filename="./app.log",
-    format="%(asctime)s | %(levelname)-8s | %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S",
-    encoding="utf-8"
-)
-
-
-def init_config() -> dict[str, Any]:
+from cliente_api import ClienteSuperlogica, criar_cliente
+from extracao import DadosPdf, EstagioExtracao
+from cache_extracao import CAMINHO_CACHE_EXTRACAO, CacheExtracao, criar_cache_extracao, hash_arquivo
+from indice_despesas import IndiceDespesas, indices_por_competencia, separar_por_competencia
+from diario import CAMINHO_DIARIO, DiarioExecucao, LancamentoNaoConfirmado
+from correspondencia import (
+    FORM_ALTERAR, FORM_LANCAR,
+    Correspondencia, IndiceCorrespondencia, RegraCorrespondencia)
+from paginacao import buscar_todas_paginas
+from metricas import (
+    CAMINHO_PROMETHEUS_INQUILINOS, CAMINHO_RELATORIO_INQUILINOS, Metricas, criar_caminhos_relatorio, logar_relatorio, logar_relatorio_inquilinos,
+    relatorio_inquilinos, rotulo_resultado, salvar_relatorio, salvar_relatorio_inquilinos)
+from registro import contexto_log, iniciar_log
+from vigia import criar_vigia
+from filas import FILAS, FilaLancamento
+from plano import ACAO_PENDENTE, ACAO_PUT, CAMINHO_PLANO, ItemPlano, ler_plano, resumir_plano, salvar_plano
+from saida import GerenciadorSaida
+from duplicados import Deduplicador, criar_deduplicador, ignorar_historico, normalizar_barras, prioridade_original
+from varredura import FiltroEntrada, VarreduraEntrada, criar_filtro_entrada
+from cache_bases import CAMPO_ID, PASTA_DADOS, pagina_de_retomada
+from banco_local import CAMINHO_BANCO, BancoLocal, RelacaoIds
+
+ITENS_POR_PAGINA_BASE = 150
+
+
+def init_config(caminho: str | Path = "config.json") -> dict[str, Any]:
     try:
-        with open("config.json", "r", encoding="utf-8") as file:
+        with open(caminho, "r", encoding="utf-8") as file:
             dict_config: dict[str, Any] = json.load(file)
         log.info("Arquivo de configuração encontrado.")
 
     except FileNotFoundError:
-        log.error("Arquivo de configuração não encontrado.")
+        log.error(f"Arquivo de configuração não encontrado: {caminho}.")
         raise
     except Exception as e:
         log.error(f"Erro inesperado: {e}")
@@ -35,6 +56,12 @@ def init_config() -> dict[str, Any]:
     return dict_config
 
 
+def pasta_dados_config(config: dict[str, Any]) -> Path:
+    """Pasta dos caches, do diário, do plano e dos relatórios ([PATHS] pasta_dados, padrão data/)."""
+
+    return Path(config.get("[PATHS]", {}).get("pasta_dados", PASTA_DADOS))
+
+
 def obter_competencia_atual() -> tuple[int, int]:
     hoje = date.today()
     dia = hoje.day
@@ -53,122 +80,94 @@ def obter_competencia_atual() -> tuple[int, int]:
     return mes, ano
 
 
-def get_base_api(endpoint: str, url_get: str, headers: dict[str, str]) -> list[dict]:
+def get_base_api(cliente: ClienteSuperlogica, endpoint: str, url_get: str, headers: dict[str, str], pagina_inicial: int = 1) -> list[dict]:
     """Carrega dados de todos os contratos/imóveis via API Superlógica."""
 
     log.info(f"Carregando dados de {endpoint}.")
 
     BASE_URL = f"{url_get}{endpoint}"
-    PARAMS = {"itensPorPagina": 150, "pagina": 1}
-
-    todos_os_dados = []
-
-    while True:
-        response = requests.get(BASE_URL, headers=headers, params=PARAMS)
-
-        if response.status_code != 200:
-            log.error(f"Erro na requisição: {response.status_code}")
-            break
-
-        data = response.json()
+    PARAMS = {"itensPorPagina": ITENS_POR_PAGINA_BASE, "pagina": pagina_inicial}
 
-        if not data or len(data["data"]) < PARAMS["itensPorPagina"]:
-            # Se a resposta for vazia ou menor que o limite, é a última página
-            todos_os_dados.extend(data["data"])
-            break
+    todos_os_dados = buscar_todas_paginas(cliente, BASE_URL, headers, PARAMS)
 
-        todos_os_dados.extend(data["data"])  # Adiciona à lista principal
-        PARAMS["pagina"] += 1  # Avança para a próxima página
-
-    log.info(f"Total de {endpoint} salvos: {len(todos_os_dados)}")
+    log.info(f"Total de {endpoint} carregados: {len(todos_os_dados)}")
 
     if not todos_os_dados:
         log.error("Nenhum contrato encontrado.")
         raise Exception("Nenhum contrato encontrado.")
 
-    with open(f"data/base_{endpoint}.json", "w", encoding="utf-8") as file:
-        json.dump(todos_os_dados, file, indent=4, ensure_ascii=False)
-
     return todos_os_dados
 
 
-def relacionar_codigo_e_id_contratos(lista_contratos: list[dict]) -> dict[str, str]:
-    """Cria um dicionário que relaciona código do contrato com id do contrato no Superlógica."""
-    try:
-        id_contratos = {}
+def carregar_base(cliente: ClienteSuperlogica, endpoint: str, url_get: str, headers: dict[str, str], ttl_horas: float, banco: BancoLocal, forcar_atualizacao: bool = False, dias_carga_completa: float = 7) -> int:
+    """Sincroniza contratos/imóveis do banco local com a API apenas quando necessário; retorna a quantidade de registros.
 
-        for contrato in lista_contratos:
-            cod_contrato = contrato["codigo_contrato"].split("/")[0]
-            id_contrato = contrato["id_contrato_con"]
+    Base dentro do TTL é usada sem nenhuma requisição. Base vencida é atualizada de forma
+    incremental, relendo a partir da última página salva. A carga completa ocorre sem base,
+    quando a atualização incremental detecta divergência, quando `forcar_atualizacao` é True
+    ou quando a última carga completa tem mais de `dias_carga_completa` dias (0 = nunca).
 
-            id_contratos[cod_contrato] = id_contrato
-    except KeyError as e:
-        raise
+    Limitação da incremental: a API não expõe data de alteração, então um registro editado
+    no meio da listagem (ex.: imóvel com identificador corrigido) só é visto na próxima carga
+    completa; por isso ela é forçada periodicamente.
+    """
 
-    with open("data/relação id contrato.json", "w", encoding="utf-8") as file:
-        json.dump(id_contratos, file, indent=4, ensure_ascii=False)
+    idade_horas = None if forcar_atualizacao else banco.idade_horas(endpoint)
 
-    log.info("Relação código e id de contratos criada.")
-    return id_contratos
+    if idade_horas is not None and dias_carga_completa > 0:
+        idade_completa = banco.idade_carga_completa_horas(endpoint)
+        if idade_completa is None or idade_completa >= 24 * dias_carga_completa:
+            log.info(
+                f"Última carga completa de {endpoint} com mais de {dias_carga_completa:g} dias. Recarregando a base completa.")
+            idade_horas = None
 
+    if idade_horas is None:
+        todos_os_dados = get_base_api(cliente, endpoint, url_get, headers)
+        banco.substituir_base(endpoint, todos_os_dados)
+        return len(todos_os_dados)
 
-def relacionar_codigo_e_id_imoveis(lista_imoveis: list[dict]) -> dict[str, str]:
-    """Cria um dicionário que relaciona código do imóvel com id do imóvel no Superlógica."""
+    qtd_cache = banco.contar(endpoint)
 
-    id_imoveis = {}
+    if idade_horas < ttl_horas:
+        log.info(
+            f"Usando cache de {endpoint} ({qtd_cache} registros, {idade_horas:.1f} h).")
+        return qtd_cache
 
-    for imovel in lista_imoveis:
-        cod_imovel = imovel["st_identificador_imo"]
-        id_imovel = imovel["id_imovel_imo"]
-
-        id_imoveis[cod_imovel] = id_imovel
-
-    with open("data/relação id imóvel.json", "w", encoding="utf-8") as file:
-        json.dump(id_imoveis, file, indent=4, ensure_ascii=False)
-
-    log.info("Relação código e id de imóveis criada.")
-    return id_imoveis
+    pagina = pagina_de_retomada(qtd_cache, ITENS_POR_PAGINA_BASE)
+    log.info(f"Cache de {endpoint} vencido. Sincronizando a partir da página {pagina}.")
 
+    try:
+        novos = get_base_api(cliente, endpoint, url_get, headers, pagina)
+    except Exception as e:
+        # A carga completa logo abaixo é a recuperação; se a API continuar falhando, o erro sobe dela
+        log.warning(f"Falha na sincronização incremental de {endpoint}: {e}")
+        novos = []
 
-def listar_arquivos_pdf(diretorio: str) -> list[Path]:
-    caminho_path = Path(diretorio)
-
-    if not caminho_path.exists():
-        log.error("Caminho do diretório não encontrado.")
-        raise FileNotFoundError("Caminho do diretório não encontrado.")
-
-    if not caminho_path.is_dir():
-        log.error("Caminho não é um diretório.")
-        raise NotADirectoryError("Caminho não é um diretório.")
-
-    # Cria uma lista com os paths dos arquivos contidos no diretório
-    pdfs = list(caminho_path.glob("*.pdf"))
-
-    if not pdfs:
-        log.error("Nenhum arquivo encontrado no diretório.")
-        raise ValueError("Nenhum arquivo encontrado no diretório Ativos.")
-
-    return pdfs
-
+    # A listagem é ordenada por id, então registros novos aparecem no fim. Se o primeiro
+    # registro relido não for o que o banco tinha naquela posição, houve exclusões no meio
+    inicio = (pagina - 1) * ITENS_POR_PAGINA_BASE
+    if not novos or banco.id_na_posicao(endpoint, inicio) != novos[0].get(CAMPO_ID[endpoint]):
+        log.info(f"Cache de {endpoint} divergente da API. Recarregando a base completa.")
+        todos_os_dados = get_base_api(cliente, endpoint, url_get, headers)
+        banco.substituir_base(endpoint, todos_os_dados)
+        return len(todos_os_dados)
 
-def extrair_dados_pdf(caminho_pdf: Path, mes_lancamento: int) -> tuple[str, str, str]:
-    """Extrai do pdf a data de vencimento, código de barras e valor total."""
+    banco.substituir_a_partir(endpoint, inicio, novos)
+    return inicio + len(novos)
 
-    reader = PdfReader(caminho_pdf)
 
-    qtd_paginas = reader.get_num_pages()
+def relacionar_codigo_e_id_contratos(banco: BancoLocal) -> RelacaoIds:
+    """Relação entre código do contrato e id do contrato no Superlógica (índice do banco local)."""
 
-    corretor_indice = 12 - qtd_paginas
+    log.info("Relação código e id de contratos criada.")
+    return RelacaoIds(banco, "contratos")
 
-    pagina = reader.pages[int(mes_lancamento-corretor_indice)]
-    texto_pagina = pagina.extract_text().split("\n")
 
-    data_vencimento = texto_pagina[12]
-    cod_barras = texto_pagina[33].replace(".", "").replace(" ", "")
-    valor_total = texto_pagina[31].replace(".", "").replace(",", ".")
+def relacionar_codigo_e_id_imoveis(banco: BancoLocal) -> RelacaoIds:
+    """Relação entre código do imóvel e id do imóvel no Superlógica (índice do banco local)."""
 
-    log.info("Dados extraídos do pdf.")
-    return data_vencimento, cod_barras, valor_total
+    log.info("Relação código e id de imóveis criada.")
+    return RelacaoIds(banco, "imoveis")
 
 
 def formatar_data_vencimento(data_vencimento_bruta: str) -> str:
@@ -182,33 +181,17 @@ def formatar_data_vencimento(data_vencimento_bruta: str) -> str:
     return data_formatada
 
 
-def get_despesas_iptu_api(solicitado: str, url_get: str, headers: dict, payload: dict) -> list[dict]:
+def get_despesas_iptu_api(cliente: ClienteSuperlogica, solicitado: str, url_get: str, headers: dict, payload: dict) -> list[dict]:
     """Carrega, de um contrato, todas as despesas referentes a IPTU"""
 
-    log.info("Carregando despesas IPTU do contrato")
+    log.debug("Carregando despesas IPTU do contrato")
 
     BASE_URL = f"{url_get}{solicitado}"
     PARAMS = payload
 
-    todos_os_dados = []
-    while True:
-        response = requests.get(BASE_URL, headers=headers, params=PARAMS)
-
-        if response.status_code != 200:
-            log.error(f"Erro na requisição: {response.status_code}")
-            break
-
-        data = response.json()
-
-        if not data or len(data["data"]) < PARAMS["itensPorPagina"]:
-            # Se a resposta for vazia ou menor que o limite, é a última página
-            todos_os_dados.extend(data["data"])
-            break
-
-        todos_os_dados.extend(data["data"])  # Adiciona à lista principal
-        PARAMS["pagina"] += 1  # Avança para a próxima página
+    todos_os_dados = buscar_todas_paginas(cliente, BASE_URL, headers, PARAMS)
 
-    log.info(f"Total de despesas IPTU encontradas: {len(todos_os_dados)}")
+    log.debug("Total de despesas IPTU encontradas: %d", len(todos_os_dados))
 
     if not todos_os_dados:
         raise ValueError
@@ -216,15 +199,15 @@ def get_despesas_iptu_api(solicitado: str, url_get: str, headers: dict, payload:
     return todos_os_dados
 
 
-def get_info_despesa(url_info: str, headers: dict, payload: dict) -> dict[Any, Any]:
+def get_info_despesa(cliente: ClienteSuperlogica, url_info: str, headers: dict, payload: dict) -> dict[Any, Any]:
     """Carrega os dados da despesa para serem aproveitados como parâmetros para o PUT request."""
 
-    log.info("Carregando dados da despesa selecionada.")
+    log.debug("Carregando dados da despesa selecionada.")
 
     BASE_URL = f"{url_info}"
     PARAMS = payload
 
-    response = requests.get(BASE_URL, headers=headers, params=PARAMS)
+    response = cliente.get(BASE_URL, headers=headers, params=PARAMS)
 
     if response.status_code != 200:
         raise requests.exceptions.HTTPError(
@@ -234,11 +217,11 @@ def get_info_despesa(url_info: str, headers: dict, payload: dict) -> dict[Any, A
 
     dict_info_desp: dict[Any, Any] = data["data"]
 
-    log.info("Dados da despesa carregados com sucesso.")
+    log.debug("Dados da despesa carregados com sucesso.")
     return dict_info_desp
 
 
-def alterar_valor_despesa_api_sl(url_put: str, headers: dict, info_despesa: dict, codigo_barras: str, data_venc_formatada: str, data_vencimento: str, id_despesa_desp: str) -> None:
+def alterar_valor_despesa_api_sl(cliente: ClienteSuperlogica, url_put: str, headers: dict, info_despesa: dict, codigo_barras: str, data_venc_formatada: str, data_vencimento: str, id_despesa_desp: str) -> None:
     """Envia a PUT request para lançar e/ou alterar o código de barras e a data de vencimento da despesa."""
 
     comp = info_despesa["composicoes"][0]
@@ -338,7 +321,9 @@ def alterar_valor_despesa_api_sl(url_put: str, headers: dict, info_despesa: dict
         "salvar": "Alterar"
     }
 
-    response = requests.put(url=url_put, headers=headers, data=PAYLOAD)
+    # Alterar grava valores fixos na despesa: repetir o PUT não muda o resultado
+    response = cliente.put(url_put, headers=headers,
+                           data=PAYLOAD, idempotente=True)
 
     if response.status_code != 200:
         raise requests.exceptions.HTTPError(
@@ -352,7 +337,7 @@ def alterar_valor_despesa_api_sl(url_put: str, headers: dict, info_despesa: dict
     return
 
 
-def lancar_valor_despesa_api_sl(url_put: str, headers: dict, info_despesa: dict, codigo_barras: str, data_venc_formatada: str, data_inicial: str, id_despesa_despm: str) -> None:
+def lancar_valor_despesa_api_sl(cliente: ClienteSuperlogica, url_put: str, headers: dict, info_despesa: dict, codigo_barras: str, data_venc_formatada: str, data_inicial: str, id_despesa_despm: str) -> None:
     """Envia a PUT request para lançar o código de barras e a data de vencimento da despesa."""
 
     comp = info_despesa["composicoes"][0]
@@ -453,7 +438,7 @@ def lancar_valor_despesa_api_sl(url_put: str, headers: dict, info_despesa: dict,
         "DT_REFERENCIACAIXA": data_venc_formatada
     }
 
-    response = requests.put(url=url_put, headers=headers, data=PAYLOAD)
+    response = cliente.put(url_put, headers=headers, data=PAYLOAD)
 
     if response.status_code != 200:
         raise requests.exceptions.HTTPError(
@@ -466,430 +451,1524 @@ def lancar_valor_despesa_api_sl(url_put: str, headers: dict, info_despesa: dict,
     return
 
 
-def renomear_e_mover_arquivo(path_arquivo: Path, info: str | list[str], novo_diretorio: Path) -> None:
+# Compartilhado por todos os workers e inquilinos do processo: um índice de nomes por pasta
+SAIDA = GerenciadorSaida()
+
+
+def renomear_e_mover_arquivo(path_arquivo: str | Path, info: str | list[str], novo_diretorio: str | Path) -> Path:
     """Renomeia o arquivo com a mensagem de sucesso ou erro e move o arquivo para outra pasta."""
 
-    novo_diretorio = Path(novo_diretorio)
+    # Caminhos do config.json chegam como str; o plano e a varredura já entregam Path
+    path_arquivo = Path(path_arquivo)
+
+    # Nome já existente na pasta ganha um contador: "<nome> (n).pdf"
+    novo_caminho = SAIDA.mover(
+        path_arquivo, f"{path_arquivo.stem} - {info}", Path(novo_diretorio))
+
+    # Loga o resultado
+    log.debug("Arquivo movido para: %s", novo_caminho.parent)
+    return novo_caminho
+
+
+@dataclass
+class ContextoExecucao:
+    """Dados da execução compartilhados (somente leitura) entre os workers."""
+
+    cliente: ClienteSuperlogica
+    url_get: str
+    url_alterar_desp: str
+    url_lancar_desp: str
+    url_info_desp: str
+    headers: dict[str, str]
+    temp_headers: dict[str, str]
+    caminho_busca_iptu_ativos: str
+    caminho_busca_iptu_vazios: str
+    caminho_iptu_ok: str
+    caminho_iptu_ok_vazios: str
+    caminho_iptu_erro: str
+    mes_lancamento: int
+    data_inicial: str
+    data_final: str
+    # Contratos, imóveis, fotografias das despesas e resultados (SQLite em pasta_dados)
+    banco: BancoLocal
+    dict_id_contratos: Mapping[str, str] = field(default_factory=dict)
+    dict_id_imoveis: Mapping[str, str] = field(default_factory=dict)
+    indice_despesas: IndiceDespesas | None = None
+    diario: DiarioExecucao | None = None
+    metricas: Metricas = field(default_factory=Metricas)
+    # Caches, diário, plano e relatórios; um por inquilino no modo multi-inquilino
+    pasta_dados: Path = PASTA_DADOS
+    inquilino: str = ""
+    # Modo anual: o pdf só sai da entrada depois da última competência (ver concluir_pdf_anual)
+    mover_pdfs: bool = True
+    # Saídas em <pasta>/<AAAA-MM>, para as pastas de OK e de erro não crescerem sem limite
+    subpastas_competencia: bool = False
+    # Cópias de carnês já vistos ([PATHS] iptu_duplicado); vazio = iptu_erro
+    caminho_iptu_duplicado: str = ""
+    # Tamanho mínimo, estabilidade e tamanho do lote dos pdfs de entrada ([ENTRADA])
+    entrada: FiltroEntrada = field(default_factory=FiltroEntrada)
+    # Carga completa de contratos e imóveis a cada N dias ([CACHE] dias_atualizacao_completa)
+    dias_carga_completa: float = 7
+
+
+def abrir_diario(ctx: ContextoExecucao, competencia: dict[str, Any]) -> DiarioExecucao:
+    return DiarioExecucao(rotulo_competencia(competencia), ctx.pasta_dados / CAMINHO_DIARIO.name)
+
+
+def pasta_saida(ctx: ContextoExecucao, pasta: str | Path, competencia: str | None = None) -> Path:
+    if ctx.subpastas_competencia:
+        return Path(pasta) / (competencia or rotulo_competencia_contexto(ctx))
+    return Path(pasta)
+
+
+def pasta_erro(ctx: ContextoExecucao, duplicado: bool = False) -> str:
+    return (ctx.caminho_iptu_duplicado or ctx.caminho_iptu_erro) if duplicado else ctx.caminho_iptu_erro
+
+
+def mover_pdf(ctx: ContextoExecucao, pdf: Path, info: str | list[str], novo_diretorio: str | Path) -> None:
+    if ctx.mover_pdfs:
+        renomear_e_mover_arquivo(pdf, info, pasta_saida(ctx, novo_diretorio))
+
+
+def registrar_etapa(ctx: ContextoExecucao, pdf: Path, etapa: str, dados: Any = None) -> None:
+    if ctx.diario is not None:
+        ctx.diario.registrar(pdf, etapa, dados)
+
+
+def etapas_concluidas(ctx: ContextoExecucao, pdf: Path) -> dict[str, Any]:
+    return ctx.diario.estado(pdf) if ctx.diario is not None else {}
+
+
+def carregar_despesas_periodo(ctx: ContextoExecucao, data_inicial: str, data_final: str) -> list[dict]:
+    """Baixa, em uma única varredura paginada, todas as despesas IPTU do período."""
+
+    payload_get_despesas = {
+        "itensPorPagina": 150,
+        "pagina": 1,
+        "dtInicioMensal": data_inicial,
+        "dtFimMensal": data_final,
+        "idProduto": 6,  # IPTU
+    }
+    return get_despesas_iptu_api(
+        ctx.cliente, "despesas", ctx.url_get, ctx.headers, payload_get_despesas)
 
-    # Garante que o diretório de destino existe
-    novo_diretorio.mkdir(parents=True, exist_ok=True)
 
-    # Monta o nome base
-    base_nome = f"{path_arquivo.stem} - {info}"
-    extensao = path_arquivo.suffix
+def rotulo_competencia_contexto(ctx: ContextoExecucao) -> str:
+    """"AAAA-MM" da competência do contexto (data_inicial é "M/1/AAAA")."""
 
-    # Caminho inicial
-    novo_caminho = novo_diretorio / f"{base_nome}{extensao}"
+    return f"{ctx.data_inicial.split('/')[-1]}-{ctx.mes_lancamento:02d}"
 
-    # Se já existir, adiciona um contador
-    contador = 1
-    while novo_caminho.exists():
-        novo_caminho = novo_diretorio / f"{base_nome} ({contador}){extensao}"
-        contador += 1
 
-    # Move + renomeia
-    shutil.move(path_arquivo, novo_caminho)
+def salvar_despesas_banco(ctx: ContextoExecucao, despesas_por_competencia: dict[str, list[dict]]) -> None:
+    """Fotografia das despesas baixadas, por competência, no banco local."""
 
-    # Loga o resultado
-    log.info(f"Arquivo movido para: {str(novo_diretorio)}")
+    try:
+        for competencia, despesas in despesas_por_competencia.items():
+            ctx.banco.salvar_despesas(competencia, despesas)
+    except sqlite3.Error as e:
+        log.error(f"Falha ao gravar as despesas no banco local: {e}")
 
 
-def main() -> None:
+def carregar_despesas_competencia(ctx: ContextoExecucao) -> IndiceDespesas:
+    """Baixa, em uma única varredura paginada, todas as despesas IPTU da competência."""
 
-    log.info("========= APLICAÇÃO INICIADA. =================================")
+    log.info("Carregando despesas IPTU da competência em lote.")
 
-    config = init_config()
+    despesas = carregar_despesas_periodo(
+        ctx, ctx.data_inicial, ctx.data_final)
+    salvar_despesas_banco(ctx, {rotulo_competencia_contexto(ctx): despesas})
+
+    indice = IndiceDespesas(despesas)
+    log.info(f"Índice de despesas da competência criado: {indice.total} despesas.")
+    return indice
+
+
+def corresponder_despesa(ctx: ContextoExecucao, pdf: Path, payload: dict, valor_total: str, regra: RegraCorrespondencia, id_dono: str, indice_lote: IndiceCorrespondencia | None) -> Correspondencia:
+    """Escolhe a despesa do carnê pelo índice da competência quando houver; senão consulta a API só deste pdf.
+
+    Levanta ValueError quando não há despesas IPTU para o contrato/imóvel. Só lê o diário: a
+    correspondência é registrada na execução do plano.
+    """
+
+    concluidas = etapas_concluidas(ctx, pdf)
+    if "correspondido" in concluidas:
+        return Correspondencia(**concluidas["correspondido"])
+
+    with ctx.metricas.etapa("correspondencia"):
+        if indice_lote is not None and indice_lote.possui(id_dono):
+            correspondencia = indice_lote.corresponder(
+                valor_total, regra, id_dono)
+        else:
+            despesas = get_despesas_iptu_api(
+                ctx.cliente, "despesas", ctx.url_get, ctx.headers, payload)
+            correspondencia = IndiceCorrespondencia(
+                despesas).corresponder(valor_total, regra)
+
+    return correspondencia
+
+
+def obter_info_despesa(ctx: ContextoExecucao, pdf: Path, payload: dict) -> dict[Any, Any]:
+    """get_info_despesa, reaproveitando o resultado de uma execução interrompida."""
+
+    concluidas = etapas_concluidas(ctx, pdf)
+    if "info_obtida" in concluidas:
+        return concluidas["info_obtida"]
+
+    with ctx.metricas.etapa("info_despesa"):
+        info_despesa = get_info_despesa(
+            ctx.cliente, ctx.url_info_desp, ctx.headers, payload)
+    registrar_etapa(ctx, pdf, "info_obtida", info_despesa)
+
+    return info_despesa
+
+
+# Assinatura comum de alterar_valor_despesa_api_sl e lancar_valor_despesa_api_sl
+EnvioPut = Callable[[ClienteSuperlogica, str, dict, dict, str, str, str, str], None]
+
+
+def enviar_put(ctx: ContextoExecucao, pdf: Path, tipo_form: str, enviar: Callable[..., None], *args: Any) -> None:
+    """Envia o PUT registrando-o no diário, sem nunca reenviar um PUT já confirmado.
+
+    Um lançamento enviado sem confirmação (queda durante o PUT) não é reenviado, pois poderia
+    duplicar a despesa; a alteração, que é idempotente, é reenviada.
+    """
+
+    concluidas = etapas_concluidas(ctx, pdf)
+    if "put_feito" in concluidas:
+        log.info(f"[{pdf.stem.upper()}] PUT já confirmado em execução anterior.")
+        return
+
+    if "put_enviado" in concluidas and tipo_form == FORM_LANCAR:
+        raise LancamentoNaoConfirmado(
+            "Lançamento enviado em execução interrompida e não confirmado. Verificar no Superlógica.")
+
+    registrar_etapa(ctx, pdf, "put_enviado")
+    with ctx.metricas.etapa("put_alterar" if tipo_form == FORM_ALTERAR else "put_lancar"):
+        enviar(*args)
+    registrar_etapa(ctx, pdf, "put_feito")
+
+
+def aplicar_correspondencia(item: ItemPlano, correspondencia: Correspondencia) -> ItemPlano:
+    """Copia para o item a despesa e o formulário escolhidos, ou as mensagens de erro."""
+
+    despesa = correspondencia.despesa or {}
+    item.id_despesa_desp = despesa.get("id_despesa_desp")
+    item.id_despesa_despm = despesa.get("id_despesa_despm")
+    item.tipo_form = correspondencia.tipo_form
+
+    # NÃO TEM LANÇAMENTO VÁLIDO:
+    if item.tipo_form not in (FORM_ALTERAR, FORM_LANCAR):
+        log.error(f"[{item.codigo}] {correspondencia.mensagem}")
+        item.resultado = correspondencia.mensagem
+
+    return item
+
+
+def planejar_pdf(pdf: Path, dados_pdf: DadosPdf, ctx: ContextoExecucao, fila: FilaLancamento) -> ItemPlano:
+    """Resolve o contrato/imóvel do carnê e escolhe a despesa e o formulário, sem escrever na API."""
+
+    codigo = fila.codigo(pdf.stem)
+    log.info(f"[{codigo}] {fila.titulo_log}")
+
+    item = ItemPlano(str(pdf), "", fila.nome, pdf.stem.upper(),
+                     dados_pdf=list(dados_pdf))
+
+    try:
+        id_dono = getattr(ctx, fila.relacao)[codigo].upper()
+    except (ValueError, KeyError):
+        log.error(f"[{codigo}] {fila.log_sem_id}")
+        item.resultado = fila.mensagem_sem_id
+        return item
+
+    data_vencimento, cod_barras, valor_total = dados_pdf
+    item.id_dono = id_dono
+
+    # Detalhes só com nível DEBUG; argumentos % não são formatados se o nível estiver desligado
+    log.debug("[%s] Id do %s: %s", codigo, fila.dono, id_dono)
+    log.debug("[%s] Data vencimento: %s", codigo, data_vencimento)
+    log.debug("[%s] Código de Barras: %s", codigo, cod_barras)
+    log.debug("[%s] Valor Total: %s", codigo, valor_total)
+
+    # Valores para testes: ===========================================
+    # id_contrato = "11"
+    # valor_total = "94.20"
+    # cod_barras = "816200000007942036592023510073102509900001709014"
+    # data_vencimento = "05/09/2025"
+    # data_venc_formatada = "09/05/2025"
+    # ================================================================
+
+    payload_get_despesas = {
+        "itensPorPagina": 150,
+        "pagina": 1,
+        "dtInicioMensal": ctx.data_inicial,
+        "dtFimMensal": ctx.data_final,
+        fila.chave_filtro: id_dono,
+        "idProduto": 6,  # IPTU
+    }
+    try:
+        correspondencia = corresponder_despesa(
+            ctx, pdf, payload_get_despesas, valor_total, fila.regra, id_dono,
+            getattr(ctx.indice_despesas, fila.indice) if ctx.indice_despesas else None)
+    except ValueError:
+        log.error(f"[{codigo}] Não foram encontradas despesas IPTU no {fila.dono}")
+        item.resultado = fila.mensagem_sem_despesas
+        return item
+
+    return aplicar_correspondencia(item, correspondencia)
+
+
+def item_duplicado(pdf: Path, hash_pdf: str, fila: FilaLancamento, dados_pdf: DadosPdf | list[str] | None, original: str) -> ItemPlano:
+    """Item de uma cópia: só será movido para a pasta de duplicados, sem chamadas à API."""
+
+    return ItemPlano(str(pdf), hash_pdf, fila.nome, pdf.stem.upper(),
+                     dados_pdf=list(dados_pdf) if dados_pdf is not None else None,
+                     resultado=f"{fila.regra.prefixo_mensagem}Duplicado", duplicado_de=original)
+
+
+def planejar_fila(extraidos: Iterable[tuple[Path, str, DadosPdf | Exception]], filas: dict[Path, FilaLancamento], ctx: ContextoExecucao, workers: int, deduplicador: Deduplicador | None = None) -> list[ItemPlano]:
+    """Planeja os pdfs das duas filas com até `workers` threads, conforme a extração de cada um termina.
+
+    `filas` diz a fila de cada pasta de entrada. No máximo 2 x `workers` pdfs esperam por uma
+    thread: a extração (e a varredura por trás dela) só avança quando o planejamento acompanha.
+
+    Falha de requisição (token expirado, API fora) não decide nada: o item fica pendente e o
+    pdf permanece na pasta de entrada. Com `deduplicador`, cópias de um carnê já visto no lote
+    ou já lançado são planejadas só para serem movidas, sem nenhuma chamada à API.
+    """
+
+    def planejar(pdf: Path, hash_pdf: str, dados_pdf: DadosPdf | Exception, deduplicar: bool = True) -> ItemPlano:
+        fila = filas[pdf.parent]
+        codigo = pdf.stem.upper()
+        info_erro_inesperado = f"{fila.regra.prefixo_mensagem}Erro inesperado"
+
+        with contexto_log(codigo, ctx.inquilino), ctx.metricas.etapa("planejamento"):
+            original = None
+            if deduplicar and deduplicador is not None and not isinstance(dados_pdf, Exception):
+                original = deduplicador.original(pdf, hash_pdf, dados_pdf[1])
+
+            try:
+                if isinstance(dados_pdf, Exception):
+                    raise dados_pdf
+                if original is not None:
+                    log.warning(f"[{codigo}] Cópia do carnê {original}. Será movido como duplicado.")
+                    item = item_duplicado(pdf, hash_pdf, fila, dados_pdf, original)
+                else:
+                    item = planejar_pdf(pdf, dados_pdf, ctx, fila)
+            except requests.exceptions.RequestException as e:
+                log.error(
+                    f"[{codigo}] Falha de requisição no planejamento. O pdf fica na entrada: {e}")
+                item = ItemPlano(str(pdf), "", fila.nome,
+                                 codigo, pendente=str(e))
+            except Exception as e:
+                log.error(f"[{codigo}] Erro inesperado: {e}")
+                item = ItemPlano(str(pdf), "", fila.nome, codigo,
+                                 resultado=info_erro_inesperado)
+
+        item.hash_pdf = hash_pdf
+        return item
+
+    itens: list[ItemPlano] = []
+    if workers <= 1:
+        itens = [planejar(pdf, hash_pdf, dados) for pdf, hash_pdf, dados in extraidos]
+    else:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="plano") as executor:
+            em_andamento: set[Future[ItemPlano]] = set()
+            for pdf, hash_pdf, dados in extraidos:
+                if len(em_andamento) >= 2 * workers:
+                    prontos, em_andamento = wait(em_andamento, return_when=FIRST_COMPLETED)
+                    itens.extend(futuro.result() for futuro in prontos)
+                em_andamento.add(executor.submit(planejar, pdf, hash_pdf, dados))
+            itens.extend(futuro.result() for futuro in em_andamento)
+
+    if deduplicador is not None:
+        itens = reescolher_originais(itens, deduplicador, filas, planejar)
+
+    return sorted(itens, key=lambda item: item.pdf)
+
+
+def reescolher_originais(itens: list[ItemPlano], deduplicador: Deduplicador, filas: dict[Path, FilaLancamento], planejar: Callable[..., ItemPlano]) -> list[ItemPlano]:
+    """Troca o original de cada carnê repetido no lote pelo de `prioridade_original`.
+
+    O planejado foi o primeiro a terminar a extração, o que varia de uma execução para outra.
+    Quando o original escolhido é outro pdf do mesmo contrato/imóvel, ele herda o plano já
+    feito (mesmo carnê, sem nova consulta à API); senão, é planejado agora.
+    """
+
+    por_pdf = {Path(item.pdf): item for item in itens}
+
+    for primeiro, grupo in deduplicador.grupos().items():
+        original = min(grupo, key=prioridade_original)
+        planejado = por_pdf[primeiro]
+        # Carnê já lançado antes: todos os pdfs do grupo são duplicados, seja qual for o original
+        if original == primeiro or planejado.duplicado_de:
+            continue
+
+        fila, escolhido = filas[original.parent], por_pdf[original]
+        with contexto_log(escolhido.codigo):
+            log.info(f"[{escolhido.codigo}] Original do carnê no lugar de {primeiro.name}.")
+
+        if planejado.fila == fila.nome and fila.codigo(primeiro.stem) == fila.codigo(original.stem):
+            por_pdf[original] = replace(planejado, pdf=str(original), codigo=escolhido.codigo,
+                                        hash_pdf=escolhido.hash_pdf)
+        else:
+            assert escolhido.dados_pdf is not None
+            por_pdf[original] = planejar(
+                original, escolhido.hash_pdf, tuple(escolhido.dados_pdf), deduplicar=False)
+
+        for pdf in grupo:
+            if pdf != original:
+                copia = por_pdf[pdf]
+                por_pdf[pdf] = item_duplicado(pdf, copia.hash_pdf, FILAS[copia.fila],
+                                              copia.dados_pdf or escolhido.dados_pdf, original.name)
+
+    return list(por_pdf.values())
+
+
+def carregar_indice_despesas(ctx: ContextoExecucao) -> IndiceDespesas | None:
+    """Índice das despesas da competência; None (consulta por pdf) se a varredura falhar."""
+
+    try:
+        with ctx.metricas.etapa("base_despesas"):
+            return carregar_despesas_competencia(ctx)
+    except ValueError:
+        return IndiceDespesas([])
+    except requests.exceptions.HTTPError as e:
+        log.error(f"{e}. Seguindo com a consulta de despesas por pdf.")
+        return None
+
+
+def criar_cache_extracao_contexto(config: dict[str, Any], ctx: ContextoExecucao) -> CacheExtracao:
+    return criar_cache_extracao(config, ctx.pasta_dados / CAMINHO_CACHE_EXTRACAO.name)
+
+
+def filas_por_pasta(ctx: ContextoExecucao) -> dict[Path, FilaLancamento]:
+    """Fila de cada pasta de entrada; a de um pdf é a da pasta em que ele está (`pdf.parent`)."""
+
+    return {Path(getattr(ctx, fila.pasta_entrada)): fila for fila in FILAS.values()}
+
+
+def varrer_filas(ctx: ContextoExecucao) -> Iterator[Path]:
+    """Uma só fila de trabalho: gera os pdfs de ativos e de vazios conforme aparecem na listagem.
+
+    Pasta vazia não é erro: o lote só fica menor.
+    """
+
+    pastas = {getattr(ctx, fila.pasta_entrada): fila for fila in FILAS.values()}
+
+    for pdf, _ in VarreduraEntrada(ctx.entrada).lote(pastas):
+        yield pdf
+
+
+def ler_processos_extracao(config: dict[str, Any]) -> int | None:
+    return int(config.get("[EXECUCAO]", {}).get("processos_extracao", 0)) or os.cpu_count()
+
+
+def carregar_base_contexto(ctx: ContextoExecucao, endpoint: str, ttl_bases: float, atualizar_bases: bool) -> int:
+    """`carregar_base` medido e com o contexto de log do inquilino (roda no pool de bases)."""
+
+    with contexto_log(inquilino=ctx.inquilino), ctx.metricas.etapa(f"base_{endpoint}"):
+        return carregar_base(ctx.cliente, endpoint, ctx.url_get, ctx.headers, ttl_bases, ctx.banco, atualizar_bases, ctx.dias_carga_completa)
+
+
+def planejar_lote(ctx: ContextoExecucao, config: dict[str, Any], workers: int, atualizar_bases: bool, carregar_bases: bool = True, cache_extracao: CacheExtracao | None = None) -> list[ItemPlano]:
+    """Fase de planejamento do lote inteiro: só leituras, nenhum PUT e nenhum pdf movido.
+
+    A extração dos pdfs, a carga de contratos e imóveis e a varredura de despesas da
+    competência rodam em paralelo; cada pdf é planejado assim que sua extração termina.
+    Erro de configuração ou de autenticação aparece aqui, antes de qualquer escrita.
+
+    Com `carregar_bases` False (modo vigiar), usa as relações de ids e o índice de despesas
+    que já estão no contexto.
+    """
+
+    ttl_bases = float(config.get("[CACHE]", {}).get("ttl_horas_bases", 24))
+
+    processos_extracao = ler_processos_extracao(config)
+    if cache_extracao is None:
+        cache_extracao = criar_cache_extracao_contexto(config, ctx)
+
+    def carregar(endpoint: str) -> int:
+        return carregar_base_contexto(ctx, endpoint, ttl_bases, atualizar_bases)
+
+    # As threads do pool de bases não herdam o contexto de log da thread do inquilino
+    def carregar_despesas() -> IndiceDespesas | None:
+        with contexto_log(inquilino=ctx.inquilino):
+            return carregar_indice_despesas(ctx)
+
+    with ThreadPoolExecutor(max_workers=3, thread_name_prefix="base") as executor:
+        if carregar_bases:
+            futuro_contratos = executor.submit(carregar, "contratos")
+            futuro_imoveis = executor.submit(carregar, "imoveis")
+            futuro_despesas = executor.submit(carregar_despesas) if config.get(
+                "[EXECUCAO]", {}).get("despesas_em_lote", False) else None
+
+        # Com a rede já em andamento, cada pdf vai para a extração assim que a varredura o encontra
+        with EstagioExtracao(varrer_filas(ctx), ctx.mes_lancamento, processos_extracao, cache_extracao) as extracao:
+            if carregar_bases:
+                futuro_contratos.result()
+                futuro_imoveis.result()
+                ctx.dict_id_contratos = relacionar_codigo_e_id_contratos(ctx.banco)
+                ctx.dict_id_imoveis = relacionar_codigo_e_id_imoveis(ctx.banco)
+                if futuro_despesas is not None:
+                    ctx.indice_despesas = futuro_despesas.result()
+
+            itens = planejar_fila(extracao.concluidos(), filas_por_pasta(ctx), ctx, workers, criar_deduplicador(
+                config, rotulo_competencia_contexto(ctx), ctx.banco))
+
+    for duracao in extracao.duracoes:
+        ctx.metricas.registrar_duracao("extracao", duracao)
+
+    return itens
+
+
+def contexto_competencia(ctx: ContextoExecucao, competencia: dict[str, Any], indice_despesas: IndiceDespesas | None = None) -> ContextoExecucao:
+    """Cópia do contexto para uma competência do modo anual; cliente, relações e métricas são os mesmos."""
+
+    return replace(ctx, mes_lancamento=competencia["mes"], data_inicial=competencia["data_inicial"],
+                   data_final=competencia["data_final"], indice_despesas=indice_despesas,
+                   diario=None, mover_pdfs=False)
+
+
+def carregar_indices_periodo(ctx: ContextoExecucao, competencias: list[dict[str, Any]]) -> dict[tuple[int, int], IndiceDespesas]:
+    """Uma única varredura de despesas da primeira à última competência, separada por competência."""
+
+    data_inicial, data_final = competencias[0]["data_inicial"], competencias[-1]["data_final"]
+
+    with contexto_log(inquilino=ctx.inquilino), ctx.metricas.etapa("base_despesas"):
+        log.info(f"Carregando despesas IPTU de {data_inicial} a {data_final} em lote.")
+        try:
+            despesas = carregar_despesas_periodo(ctx, data_inicial, data_final)
+        except ValueError:
+            return {}
+
+    por_competencia = separar_por_competencia(despesas)
+    salvar_despesas_banco(ctx, {f"{ano}-{mes:02d}": lista
+                                for (ano, mes), lista in por_competencia.items()})
+
+    indices = indices_por_competencia(por_competencia)
+    log.info(f"Índices de despesas criados: {len(despesas)} despesas em {len(indices)} competências.")
+    return indices
+
+
+def planejar_anual(ctx: ContextoExecucao, config: dict[str, Any], workers: int, atualizar_bases: bool, competencias: list[dict[str, Any]], usar_diario: bool) -> list[ItemPlano]:
+    """Planejamento do modo anual: cada carnê é lido uma vez e cada parcela restante vira um item.
+
+    Extração, bases e a varredura de despesas do período inteiro rodam em paralelo, como em
+    `planejar_lote`. Os itens são planejados competência a competência, cada uma com seu índice
+    de despesas e seu diário.
+    """
+
+    ttl_bases = float(config.get("[CACHE]", {}).get("ttl_horas_bases", 24))
+    filas = filas_por_pasta(ctx)
+    meses = [competencia["mes"] for competencia in competencias]
+
+    with ThreadPoolExecutor(max_workers=3, thread_name_prefix="base") as executor:
+        futuro_contratos = executor.submit(
+            carregar_base_contexto, ctx, "contratos", ttl_bases, atualizar_bases)
+        futuro_imoveis = executor.submit(
+            carregar_base_contexto, ctx, "imoveis", ttl_bases, atualizar_bases)
+        futuro_despesas = executor.submit(
+            carregar_indices_periodo, ctx, competencias)
+
+        with EstagioExtracao(varrer_filas(ctx), ctx.mes_lancamento, ler_processos_extracao(config),
+                             criar_cache_extracao_contexto(config, ctx), meses=meses) as extracao:
+            futuro_contratos.result()
+            futuro_imoveis.result()
+            ctx.dict_id_contratos = relacionar_codigo_e_id_contratos(ctx.banco)
+            ctx.dict_id_imoveis = relacionar_codigo_e_id_imoveis(ctx.banco)
+            indices = futuro_despesas.result()
+
+            # Cada competência percorre todos os carnês: aqui o lote fica inteiro em memória
+            parcelas = {pdf: (hash_pdf, parcelas_pdf)
+                        for pdf, hash_pdf, parcelas_pdf in extracao.parcelas()}
+
+    for duracao in extracao.duracoes:
+        ctx.metricas.registrar_duracao("extracao", duracao)
+
+    itens: list[ItemPlano] = []
+    for competencia in competencias:
+        rotulo = rotulo_competencia(competencia)
+        ctx_competencia = contexto_competencia(ctx, competencia, indices.get(
+            (competencia["ano"], competencia["mes"]), IndiceDespesas([])))
+
+        extraidos: list[tuple[Path, str, DadosPdf | Exception]] = []
+        for pdf, (hash_pdf, parcelas_pdf) in parcelas.items():
+            if isinstance(parcelas_pdf, Exception):
+                # Carnê ilegível vira um só item de erro, na primeira competência
+                if competencia is competencias[0]:
+                    extraidos.append((pdf, hash_pdf, parcelas_pdf))
+            elif competencia["mes"] in parcelas_pdf:
+                extraidos.append((pdf, hash_pdf, parcelas_pdf[competencia["mes"]]))
+
+        if usar_diario:
+            ctx_competencia.diario = abrir_diario(ctx_competencia, competencia)
+        try:
+            itens_competencia = planejar_fila(extraidos, filas, ctx_competencia, workers, criar_deduplicador(
+                config, rotulo, ctx.banco))
+        finally:
+            if ctx_competencia.diario is not None:
+                ctx_competencia.diario.fechar()
+
+        for item in itens_competencia:
+            item.competencia = rotulo
+        log.info(f"Competência {rotulo}: {resumir_plano(itens_competencia)}")
+        itens.extend(itens_competencia)
+
+    return itens
+
+
+def concluir_pdf_anual(pdf: Path, fila: FilaLancamento, competencias: list[str], resultados: dict[str, str | list[str]], ctx: ContextoExecucao) -> str | list[str] | None:
+    """Move o carnê uma única vez, depois de todas as suas competências.
+
+    Tudo OK vai para a pasta de OK. Um mesmo erro em todas as competências (ex.: imóvel vazio)
+    vai para iptu_erro com esse erro; senão, o nome lista cada competência que falhou. Sem
+    nenhum resultado (tudo pendente), o pdf fica na entrada.
+    """
+
+    if not resultados:
+        log.warning(f"[{pdf.stem.upper()}] Nenhuma competência executada. O pdf fica na entrada.")
+        return None
+
+    ok = f"{fila.regra.prefixo_mensagem}OK"
+    motivos = {rotulo: rotulo_resultado(resultados[rotulo]) if rotulo in resultados else "Pendente"
+               for rotulo in competencias}
+    falhas = {rotulo: motivo for rotulo, motivo in motivos.items() if motivo != ok}
+
+    resultado: str | list[str]
+    if not falhas:
+        resultado, pasta = ok, getattr(ctx, fila.pasta_ok)
+    elif len(falhas) == len(motivos) and len(set(falhas.values())) == 1:
+        resultado = next(iter(resultados.values()))
+        pasta = pasta_erro(ctx, rotulo_resultado(resultado).endswith("Duplicado"))
+    else:
+        resultado = [f"{rotulo} {motivo}" for rotulo, motivo in falhas.items()]
+        pasta = ctx.caminho_iptu_erro
+
+    # Com subpastas por competência, o carnê fica na da última competência lançada
+    renomear_e_mover_arquivo(pdf, resultado, pasta_saida(
+        ctx, pasta, max(competencias)))
+    return resultado
+
+
+def payload_info_despesa(item: ItemPlano, ctx: ContextoExecucao) -> dict[str, Any]:
+    payload = {
+        "itensPorPagina": 150,
+        "pagina": 1,
+        "ID_DESPESA_DESP": item.id_despesa_desp,
+        "ID_DESPESA_DESPM": item.id_despesa_despm,
+        "DT_FIM": ctx.data_final,
+        "FORM": item.tipo_form
+    }
+    if item.tipo_form == FORM_LANCAR:
+        payload["DT_INICIO"] = ctx.data_inicial
+
+    return payload
+
+
+def executar_item(item: ItemPlano, ctx: ContextoExecucao, info_despesa: dict | Exception | None) -> str | list[str]:
+    """Aplica ao pdf a decisão do plano: PUT e pasta de OK, ou pasta de erro.
+
+    `info_despesa` já vem buscado pelo estágio de prefetch (ou a exceção da busca).
+    """
+
+    pdf = Path(item.pdf)
+    fila = FILAS[item.fila]
+    prefixo = fila.regra.prefixo_mensagem
+    caminho_ok = getattr(ctx, fila.pasta_ok)
+
+    if item.resultado is not None:
+        mover_pdf(ctx, pdf, item.resultado, pasta_erro(ctx, bool(item.duplicado_de)))
+        return item.resultado
+
+    if isinstance(info_despesa, requests.exceptions.HTTPError):
+        log.error(f"[{item.codigo}] {info_despesa}")
+        resultado = f"{prefixo}Erro na requisição para obtenção dos parâmetros"
+        mover_pdf(ctx, pdf, resultado, ctx.caminho_iptu_erro)
+        return resultado
+
+    if isinstance(info_despesa, Exception):
+        raise info_despesa
+
+    # Item de PUT sempre sai do planejamento com dados, formulário e despesa escolhidos
+    assert item.dados_pdf is not None and info_despesa is not None and item.tipo_form is not None
+    data_vencimento, cod_barras, _ = item.dados_pdf
+    data_venc_formatada = formatar_data_vencimento(data_vencimento)
+
+    enviar: EnvioPut
+
+    # ALTERAR VALOR NO A PAGAR (ÍCONE SETA)
+    if item.tipo_form == FORM_ALTERAR:
+        enviar, url_put, sucesso = alterar_valor_despesa_api_sl, ctx.url_alterar_desp, "Alterado"
+        data_ou_inicio, id_despesa = data_vencimento, item.id_despesa_desp
+
+    # LANÇAR DESPESA (ÍCONE FOGUETE)
+    else:
+        enviar, url_put, sucesso = lancar_valor_despesa_api_sl, ctx.url_lancar_desp, "Lançado"
+        data_ou_inicio, id_despesa = ctx.data_inicial, item.id_despesa_despm
 
     try:
-        caminho_busca_iptu_ativos = config["[PATHS]"]["iptu_a_lancar_ativos"]
-        caminho_busca_iptu_vazios = config["[PATHS]"]["iptu_a_lancar_vazios"]
+        enviar_put(
+            ctx, pdf, item.tipo_form, enviar,
+            ctx.cliente,
+            url_put,
+            ctx.temp_headers,
+            info_despesa,
+            cod_barras,
+            data_venc_formatada,
+            data_ou_inicio,
+            id_despesa
+        )
+        log.info(f"[{item.codigo}] {sucesso} com sucesso.")
+        resultado = f"{prefixo}OK"
+        mover_pdf(ctx, pdf, resultado, caminho_ok)
+        return resultado
+
+    except requests.exceptions.HTTPError as e:
+        log.error(f"[{item.codigo}] Erro PUT request: {e}")
+        resultado = f"{prefixo}Erro PUT request"
+        mover_pdf(ctx, pdf, resultado, ctx.caminho_iptu_erro)
+        return resultado
+
+    except Exception as e:
+        log.error(f"[{item.codigo}] Erro inesperado: {e}")
+        resultado = f"{prefixo}Erro inesperado"
+        mover_pdf(ctx, pdf, resultado, ctx.caminho_iptu_erro)
+        return resultado
+
+
+def preparar_item(item: ItemPlano, ctx: ContextoExecucao, conferir_conteudo: bool = False) -> bool:
+    """Confere se o pdf do plano ainda deve ser executado e registra no diário o que o plano decidiu.
+
+    O hash do plano vem da extração. Só um plano lido do disco (`conferir_conteudo`) relê o pdf
+    para saber se ele mudou desde o planejamento; no mesmo processo basta ele ainda existir.
+    """
+
+    pdf = Path(item.pdf)
+
+    if item.acao == ACAO_PENDENTE:
+        log.warning(
+            f"[{item.codigo}] Pendente no planejamento ({item.pendente}). O pdf fica na entrada.")
+        return False
+
+    hash_pdf = item.hash_pdf
+    try:
+        if conferir_conteudo or not hash_pdf:
+            hash_pdf = hash_arquivo(pdf)
+        elif not pdf.is_file():
+            raise FileNotFoundError(pdf)
+    except OSError:
+        log.warning(f"[{item.codigo}] Pdf do plano não está mais na entrada.")
+        return False
+
+    if item.hash_pdf and hash_pdf != item.hash_pdf:
+        log.warning(f"[{item.codigo}] Pdf alterado depois do planejamento. Fica para a próxima execução.")
+        return False
+
+    if ctx.diario is not None:
+        # Memoriza a chave enquanto o arquivo ainda está na pasta de entrada
+        ctx.diario.chave(pdf, hash_pdf)
+
+    if item.dados_pdf is not None:
+        registrar_etapa(ctx, pdf, "extraido", item.dados_pdf)
+    if item.acao == ACAO_PUT:
+        registrar_etapa(ctx, pdf, "correspondido", asdict(Correspondencia(
+            {"id_despesa_desp": item.id_despesa_desp, "id_despesa_despm": item.id_despesa_despm},
+            item.tipo_form)))
 
-        caminho_iptu_ok = config["[PATHS]"]["iptu_ativo_ok"]
-        caminho_iptu_ok_vazios = config["[PATHS]"]["iptu_vazio_ok"]
+    return True
 
-        caminho_iptu_erro = config["[PATHS]"]["iptu_erro"]
 
-        URL_GET = config["[API]"]["url_get"]
-        URL_ALTERAR_DESP = config["[API]"]["url_put_alterar_despesa"]
-        URL_LANCAR_DESP = config["[API]"]["url_put_lancar_despesa"]
-        URL_INFO_DESP = config["[API]"]["url_post_info_despesa"]
+def executar_plano(itens: list[ItemPlano], ctx: ContextoExecucao, workers: int, workers_info: int, buffer_info: int, parar: threading.Event | None = None, conferir_conteudo: bool = False) -> list[tuple[Path, str | list[str]]]:
+    """Fase de execução em pipeline: busca de info da despesa à frente dos PUTs.
 
-        HEADERS = config["[API]"]["headers"]
+    `workers_info` threads buscam a info dos próximos itens enquanto `workers` threads enviam
+    os PUTs dos itens já prontos. No máximo `buffer_info` itens ficam entre o início da busca
+    e o fim do PUT, então um endpoint lento não faz o outro acumular trabalho sem limite, e
+    nenhum deles fica parado esperando o outro enquanto houver itens no buffer.
 
-        TEMP_HEADERS = deepcopy(HEADERS)
+    Itens pendentes, pdfs que já saíram da entrada e pdfs alterados depois do planejamento
+    (conferidos pelo hash só com `conferir_conteudo`, plano lido do disco) são ignorados
+    (ficam para a próxima execução), assim como os itens ainda não iniciados quando `parar`
+    é sinalizado.
+    """
+
+    vagas = threading.BoundedSemaphore(max(buffer_info, workers))
+
+    def concluir(item: ItemPlano, info_despesa: dict | Exception | None, inicio: float, pronto: float) -> str | list[str]:
+        pdf = Path(item.pdf)
+
+        try:
+            with contexto_log(item.codigo, ctx.inquilino):
+                ctx.metricas.registrar_duracao(
+                    "espera_put", time.perf_counter() - pronto)
+                try:
+                    resultado = executar_item(item, ctx, info_despesa)
+                except Exception as e:
+                    # Falha não tratada em um pdf não pode derrubar os demais workers
+                    info_erro_inesperado = f"{FILAS[item.fila].regra.prefixo_mensagem}Erro inesperado"
+                    log.error(f"[{item.codigo}] Erro inesperado: {e}")
+                    if pdf.exists():
+                        mover_pdf(
+                            ctx, pdf, info_erro_inesperado, ctx.caminho_iptu_erro)
+                    resultado = info_erro_inesperado
+
+                ctx.metricas.registrar_duracao(
+                    "pdf", time.perf_counter() - inicio)
+                ctx.metricas.contar_resultado(resultado)
+                rotulo = rotulo_resultado(resultado)
+                log.info("Concluído: %s", rotulo, extra={"etapa": "pdf", "resultado": rotulo})
+
+                # Todo caminho de executar_item termina movendo o pdf
+                registrar_etapa(ctx, pdf, "movido", resultado)
+                return resultado
+        finally:
+            vagas.release()
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="iptu") as executor_put, \
+            ThreadPoolExecutor(max_workers=workers_info, thread_name_prefix="info") as executor_info:
+
+        def prefetch(item: ItemPlano) -> Future | None:
+            inicio = time.perf_counter()
+            try:
+                with contexto_log(item.codigo, ctx.inquilino):
+                    if (parar is not None and parar.is_set()) or not preparar_item(item, ctx, conferir_conteudo):
+                        vagas.release()
+                        return None
+
+                    info_despesa: dict | Exception | None = None
+                    if item.acao == ACAO_PUT:
+                        try:
+                            info_despesa = obter_info_despesa(
+                                ctx, Path(item.pdf), payload_info_despesa(item, ctx))
+                        except Exception as e:
+                            info_despesa = e
+            except Exception:
+                vagas.release()
+                raise
+
+            return executor_put.submit(concluir, item, info_despesa, inicio, time.perf_counter())
+
+        futuros = []
+        for item in itens:
+            # Bloqueia enquanto o buffer estiver cheio: a busca de info não corre solta à frente dos PUTs
+            vagas.acquire()
+            futuros.append((item, executor_info.submit(prefetch, item)))
+
+        resultados = []
+        concluidos = []
+        for item, futuro_info in futuros:
+            pdf = Path(item.pdf)
+            try:
+                futuro_put = futuro_info.result()
+                if futuro_put is not None:
+                    resultado = futuro_put.result()
+                    resultados.append((pdf, resultado))
+                    concluidos.append((item, resultado))
+            except Exception as e:
+                log.error(f"[{pdf.stem.upper()}] Erro inesperado na execução: {e}")
+
+    registrar_resultados(ctx, concluidos)
+    return sorted(resultados)
+
+
+def registrar_resultados(ctx: ContextoExecucao, concluidos: list[tuple[ItemPlano, str | list[str]]]) -> None:
+    """Grava no banco local o resultado de cada item do lote, em uma única transação."""
+
+    if not concluidos:
+        return
+
+    competencia = rotulo_competencia_contexto(ctx)
+
+    # Carnês lançados: base da deduplicação contra o histórico nos próximos lotes
+    digitais = [
+        (item.competencia or competencia, item.hash_pdf,
+         normalizar_barras(item.dados_pdf[1]), Path(item.pdf).name)
+        for item, resultado in concluidos
+        if item.hash_pdf and item.dados_pdf and rotulo_resultado(resultado) == f"{FILAS[item.fila].regra.prefixo_mensagem}OK"]
+
+    try:
+        ctx.banco.registrar_resultados(ctx.metricas.inicio.isoformat(timespec="seconds"), (
+            (item.competencia or competencia, Path(item.pdf).name, item.codigo,
+             item.fila, rotulo_resultado(resultado))
+            for item, resultado in concluidos), digitais)
+    except sqlite3.Error as e:
+        # O lote já foi lançado; o histórico no banco é só para consulta
+        log.error(f"Falha ao registrar os resultados no banco local: {e}")
+
+
+def argumento_competencia(texto: str) -> str:
+    try:
+        mes, ano = ler_competencia(texto)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"competência inválida: {texto!r} (esperado AAAA-MM)")
+    return f"{ano}-{mes:02d}"
+
+
+def aplicar_opcoes_execucao(config: dict[str, Any], historico: bool, competencia: str) -> None:
+    """Opções da linha de comando que valem só para esta execução, por cima do config.json."""
+
+    if not historico:
+        ignorar_historico(config)
+    if competencia:
+        config.setdefault("[EXECUCAO]", {})["competencia"] = competencia
+
+
+def ler_argumentos(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Lança os carnês de IPTU nas despesas do Superlógica.")
+    parser.add_argument(
+        "--workers", type=int, default=None,
+        help="Quantidade de pdfs processados simultaneamente (padrão: [EXECUCAO] workers do config.json ou 1).")
+    parser.add_argument(
+        "--atualizar-bases", action="store_true",
+        help="Ignora o cache de contratos/imóveis em data/ e baixa as bases completas.")
+    parser.add_argument(
+        "--ignorar-historico", action="store_true",
+        help="Planeja de novo carnês já lançados nos últimos [EXECUCAO] dias_historico_duplicados dias "
+             "(só cópias dentro do mesmo lote continuam barradas).")
+    parser.add_argument(
+        "--competencia", type=argumento_competencia, default="", metavar="AAAA-MM",
+        help="Lança esta competência em vez da atual (padrão: [EXECUCAO] competencia do config.json).")
+
+    subparsers = parser.add_subparsers(dest="comando")
+
+    parser_cache = subparsers.add_parser(
+        "cache-extracao", help="Inspeciona ou limpa o cache de dados extraídos dos pdfs.")
+    parser_cache.add_argument("acao", choices=["info", "limpar"])
+
+    subparsers.add_parser(
+        "vigiar", help="Fica em execução processando os pdfs que chegam nas pastas de entrada.")
+
+    subparsers.add_parser(
+        "anual", help="Lança numa só execução todas as competências restantes do ano, lendo cada carnê uma vez.")
+
+    for comando, ajuda in (
+            ("planejar", "Só planeja o lote (nenhuma escrita na API) e grava o plano."),
+            ("executar", "Envia os PUTs e move os pdfs de um plano gravado por `planejar`.")):
+        parser_fase = subparsers.add_parser(comando, help=ajuda)
+        parser_fase.add_argument(
+            "--plano", type=Path, default=None,
+            help=f"Arquivo do plano (padrão: {CAMINHO_PLANO.name} na pasta de dados).")
+
+    parser_inquilinos = subparsers.add_parser(
+        "inquilinos", help="Processa ao mesmo tempo os lotes de várias imobiliárias, uma por config.json.")
+    parser_inquilinos.add_argument(
+        "configs", type=Path, nargs="+", help="Arquivos de configuração, um por inquilino.")
+    parser_inquilinos.add_argument(
+        "--workers-total", type=int, default=16,
+        help="Teto global de workers e de requisições simultâneas somando todos os inquilinos (padrão: 16).")
+    parser_inquilinos.add_argument(
+        "--relatorio", type=Path, default=CAMINHO_RELATORIO_INQUILINOS,
+        help=f"Relatório com a vazão de cada inquilino (padrão: {CAMINHO_RELATORIO_INQUILINOS}).")
+
+    return parser.parse_args(argv)
+
+
+def criar_contexto(config: dict[str, Any], cliente: ClienteSuperlogica, metricas: Metricas, competencia: dict[str, Any]) -> ContextoExecucao:
+    try:
+        TEMP_HEADERS = deepcopy(config["[API]"]["headers"])
         del TEMP_HEADERS["Content-Type"]
+
+        return ContextoExecucao(
+            cliente=cliente,
+            url_get=config["[API]"]["url_get"],
+            url_alterar_desp=config["[API]"]["url_put_alterar_despesa"],
+            url_lancar_desp=config["[API]"]["url_put_lancar_despesa"],
+            url_info_desp=config["[API]"]["url_post_info_despesa"],
+            headers=config["[API]"]["headers"],
+            temp_headers=TEMP_HEADERS,
+            caminho_busca_iptu_ativos=config["[PATHS]"]["iptu_a_lancar_ativos"],
+            caminho_busca_iptu_vazios=config["[PATHS]"]["iptu_a_lancar_vazios"],
+            caminho_iptu_ok=config["[PATHS]"]["iptu_ativo_ok"],
+            caminho_iptu_ok_vazios=config["[PATHS]"]["iptu_vazio_ok"],
+            caminho_iptu_erro=config["[PATHS]"]["iptu_erro"],
+            mes_lancamento=competencia["mes"],
+            data_inicial=competencia["data_inicial"],
+            data_final=competencia["data_final"],
+            metricas=metricas,
+            pasta_dados=pasta_dados_config(config),
+            subpastas_competencia=bool(
+                config["[PATHS]"].get("subpastas_competencia", False)),
+            entrada=criar_filtro_entrada(config),
+            caminho_iptu_duplicado=config["[PATHS]"].get("iptu_duplicado", ""),
+            banco=BancoLocal(pasta_dados_config(config) / CAMINHO_BANCO.name),
+            dias_carga_completa=float(config.get("[CACHE]", {}).get(
+                "dias_atualizacao_completa", 7)),
+        )
     except KeyError:
         log.error("Chave não encontrada no arquivo de configuração.")
         raise
 
-    MES_LANCAMENTO, ANO_LANCAMENTO = obter_competencia_atual()
 
-    data_inicial = f"{MES_LANCAMENTO}/1/{ANO_LANCAMENTO}"
-    data_final = f"{MES_LANCAMENTO}/30/{ANO_LANCAMENTO}"
+def ler_workers(config: dict[str, Any], workers: int | None = None, teto: int | None = None) -> tuple[int, int, int, int]:
+    """Threads do planejamento, dos PUTs, da busca de info e tamanho do buffer entre as duas.
+
+    `teto` (modo multi-inquilino) limita cada grupo de threads ao teto global de workers.
+    """
+
+    config_execucao = config.get("[EXECUCAO]", {})
+    if workers is None:
+        workers = int(config_execucao.get("workers", 1))
+    workers = max(workers, 1)
+    # PUTs não têm nada a esperar além da API: a execução pode usar mais threads que o planejamento
+    workers_execucao = max(
+        int(config_execucao.get("workers_execucao", 0)) or workers, 1)
+    # Busca de info da despesa à frente dos PUTs (pipeline da execução)
+    workers_info = max(
+        int(config_execucao.get("workers_info", 0)) or workers_execucao, 1)
+    if teto:
+        workers, workers_execucao, workers_info = (
+            min(workers, teto), min(workers_execucao, teto), min(workers_info, teto))
+    buffer_info = int(config_execucao.get(
+        "buffer_info", 0)) or 2 * workers_execucao
+    log.info(
+        f"Workers: {workers} (execução: {workers_execucao}, info: {workers_info}, buffer: {buffer_info})")
+
+    return workers, workers_execucao, workers_info, buffer_info
+
+
+def montar_competencia(mes: int, ano: int) -> dict[str, Any]:
+    return {"mes": mes, "ano": ano,
+            "data_inicial": f"{mes}/1/{ano}", "data_final": f"{mes}/30/{ano}"}
+
+
+def ler_competencia(texto: str) -> tuple[int, int]:
+    """Mês e ano de um "AAAA-MM"; ValueError se o texto não for uma competência."""
 
-    # TESTETESTETESTETESTETESTETESTETESTETESTETESTETESTETESTE
-    MES_LANCAMENTO = 11
-    data_inicial = f"{MES_LANCAMENTO}/1/{ANO_LANCAMENTO}"
-    data_final = f"{MES_LANCAMENTO}/30/{ANO_LANCAMENTO}"
-    # TESTETESTETESTETESTETESTETESTETESTETESTETESTETESTETESTE
+    data = datetime.strptime(texto.strip(), "%Y-%m")
+    return data.month, data.year
 
-    lista_contratos = get_base_api("contratos", URL_GET, HEADERS)
-    dict_id_contratos = relacionar_codigo_e_id_contratos(lista_contratos)
+
+def calcular_competencia(config: dict[str, Any]) -> dict[str, Any]:
+    """Competência do lote: a de [EXECUCAO] competencia ("AAAA-MM"), se houver, ou a atual.
+
+    A competência fixa serve para relançar um mês ou testar contra outro; ela também desliga
+    a virada de competência do modo vigia.
+    """
+
+    fixa = str(config.get("[EXECUCAO]", {}).get("competencia") or "")
+    if not fixa:
+        MES_LANCAMENTO, ANO_LANCAMENTO = obter_competencia_atual()
+        return montar_competencia(MES_LANCAMENTO, ANO_LANCAMENTO)
 
     try:
-        lista_pdfs = listar_arquivos_pdf(caminho_busca_iptu_ativos)
-    except ValueError as e:
-        lista_pdfs = []
-        log.error(e)
+        MES_LANCAMENTO, ANO_LANCAMENTO = ler_competencia(fixa)
+    except ValueError:
+        log.error(f"Competência inválida no config.json: {fixa!r} (esperado AAAA-MM).")
+        raise
 
-    # ======================================================================================
-    # ======================================================================================
-    # ======================================================================================
+    log.info(f"Competência fixa -> Mês: {MES_LANCAMENTO}, Ano: {ANO_LANCAMENTO}")
+    return montar_competencia(MES_LANCAMENTO, ANO_LANCAMENTO)
 
-    # LANÇAR IMÓVEIS ATIVOS:
-    for pdf in lista_pdfs:
 
-        cod_contrato = pdf.stem.upper()
-        log.info(f"[{cod_contrato}] IMÓVEL ATUAL")
+def competencias_restantes(competencia: dict[str, Any]) -> list[dict[str, Any]]:
+    """A competência atual e as seguintes até dezembro (parcelas ainda não lançadas do carnê)."""
 
-        try:
-            if len(cod_contrato) > 8:  # Caso de código composto do Superlogica "I0000000 AP00000_ESTASA"
-                cod_contrato = cod_contrato.replace(" ", " | ")
+    return [montar_competencia(mes, competencia["ano"])
+            for mes in range(competencia["mes"], 13)]
 
-            id_contrato = dict_id_contratos[cod_contrato].upper()
-        except (ValueError, KeyError):
-            log.error(
-                f"[{cod_contrato}] Id do contrato não encontrado na relação. Imóvel vazio.")
 
-            renomear_e_mover_arquivo(
-                pdf, "Imóvel Vazio", caminho_iptu_erro)
-            continue
+def rotulo_competencia(competencia: dict[str, Any]) -> str:
+    return f"{competencia['ano']}-{competencia['mes']:02d}"
 
-        data_vencimento, cod_barras, valor_total = extrair_dados_pdf(
-            pdf, MES_LANCAMENTO)
-        data_venc_formatada = formatar_data_vencimento(data_vencimento)
-
-        log.info(f"Id do contrato: {id_contrato}")
-        log.info(f"Data vencimento: {data_vencimento}")
-        log.info(f"Código de Barras: {cod_barras}")
-        log.info(f"Valor Total: {valor_total}")
-
-        # Valores para testes: ===========================================
-        # id_contrato = "11"
-        # valor_total = "94.20"
-        # cod_barras = "816200000007942036592023510073102509900001709014"
-        # data_vencimento = "05/09/2025"
-        # data_venc_formatada = "09/05/2025"
-        # ================================================================
-
-        payload_get_despesas = {
-            "itensPorPagina": 150,
-            "pagina": 1,
-            "dtInicioMensal": data_inicial,
-            "dtFimMensal": data_final,
-            "idContrato": id_contrato,
-            "idProduto": 6,  # IPTU
-        }
-        try:
-            despesas_contrato = get_despesas_iptu_api(
-                "despesas", URL_GET, HEADERS, payload_get_despesas)
-        except ValueError:
-            log.error("Não foram encontradas despesas IPTU no contrato")
-            renomear_e_mover_arquivo(
-                pdf, "Sem despesas IPTU no contrato", caminho_iptu_erro)
-            continue
 
-        mensagem = []
-        for despesa in despesas_contrato:
-
-            descricao_prod = despesa["st_descricao_prd"]
-            valor_lancamento = despesa["vl_valor_imod"]
-            debito = despesa["id_debito_imod"]
-            id_despesa_desp = despesa["id_despesa_desp"]
-            id_despesa_despm = despesa["id_despesa_despm"]
-
-            if descricao_prod == "IPTU" and valor_lancamento == valor_total:
-
-                if debito != "2":
-                    if id_despesa_desp or id_despesa_despm:
-                        # Se a despesa tem lançamento válido, mas não tem Débito Locatário
-                        mensagem.append("Débito não está para o locatário")
-                        break
-
-                # Despesa tem Débito Locatário (situação correta)
-                if id_despesa_desp:
-                    tipo_form = "FormAlterarValorDespesaPrincipal"
-                    break
-                elif id_despesa_despm:
-                    tipo_form = "FormLancarDespesaPrincipal"
-                    break
-                else:
-                    mensagem.append("Sem id lançamento")
-                    continue
-            else:
-                if valor_lancamento != valor_total:
-                    mensagem.append("Valor lançamento incorreto")
+def gerar_relatorio(metricas: Metricas, cliente: ClienteSuperlogica, competencia: dict[str, Any] | str, config: dict[str, Any]) -> dict[str, Any]:
+    relatorio = metricas.relatorio(cliente.latencias(), competencia if isinstance(
+        competencia, str) else rotulo_competencia(competencia))
+    logar_relatorio(relatorio)
+    try:
+        salvar_relatorio(relatorio, *criar_caminhos_relatorio(
+            config, pasta_dados_config(config)))
+    except OSError as e:
+        log.error(f"Não foi possível salvar o relatório da execução: {e}")
+
+    return relatorio
+
+
+def executar_lote(config: dict[str, Any], workers: int | None = None, atualizar_bases: bool = False, fase: str = "completa", caminho_plano: Path | None = None, inquilino: str = "", limite_global: threading.Semaphore | None = None, teto_workers: int | None = None) -> dict[str, Any]:
+    """Planeja e/ou executa o lote de um config.json já lido (um inquilino no modo multi-inquilino).
+
+    Cada chamada tem seu próprio cliente HTTP (pool de conexões e limite de taxa), suas relações
+    de ids e sua pasta de dados. Sem `caminho_plano`, o plano fica na pasta de dados.
+    """
+
+    metricas = Metricas()
+
+    config_execucao = config.get("[EXECUCAO]", {})
+    workers, workers_execucao, workers_info, buffer_info = ler_workers(
+        config, workers, teto_workers)
+
+    cliente = criar_cliente(config, max(
+        workers, workers_execucao + workers_info), limite_global)
+
+    if caminho_plano is None:
+        caminho_plano = pasta_dados_config(config) / CAMINHO_PLANO.name
+
+    if fase == "executar":
+        itens, competencia = ler_plano(caminho_plano)
+    else:
+        competencia = calcular_competencia(config)
+
+    ctx = criar_contexto(config, cliente, metricas, competencia)
+    ctx.inquilino = inquilino
+
+    if config_execucao.get("diario_execucao", True):
+        ctx.diario = abrir_diario(ctx, competencia)
+
+    try:
+        if fase != "executar":
+            with metricas.etapa("fase_planejamento"):
+                itens = planejar_lote(ctx, config, workers, atualizar_bases)
+            salvar_plano(itens, competencia, caminho_plano)
+
+        resumo_plano = resumir_plano(itens)
+        log.info(f"Plano: {resumo_plano}")
+
+        if fase == "planejar":
+            return {"plano": resumo_plano}
+
+        with metricas.etapa("fase_execucao"):
+            resultados = executar_plano(
+                itens, ctx, workers_execucao, workers_info, buffer_info, conferir_conteudo=fase == "executar")
+    finally:
+        if ctx.diario is not None:
+            ctx.diario.fechar()
+        ctx.banco.fechar()
+        cliente.logar_latencias()
+        cliente.fechar()
+
+    relatorio = gerar_relatorio(metricas, cliente, competencia, config)
+
+    return {
+        "resultados": {str(pdf): resultado for pdf, resultado in resultados},
+        "relatorio": relatorio,
+        "plano": resumo_plano,
+    }
+
+
+def main(workers: int | None = None, atualizar_bases: bool = False, fase: str = "completa", caminho_plano: Path | None = None, historico: bool = True, competencia_fixa: str = "") -> dict[str, Any]:
+    """Executa o lote e retorna os resultados por pdf e o relatório da execução (usados pelo benchmark).
+
+    `fase` "planejar" só grava o plano, sem nenhuma escrita na API; "executar" aplica um plano
+    gravado; "completa" planeja (gravando o plano) e executa em seguida. `historico` falso
+    desliga, só nesta execução, a deduplicação contra carnês já lançados; `competencia_fixa`
+    ("AAAA-MM") troca a competência atual pela informada.
+    """
+
+    log.info("========= APLICAÇÃO INICIADA. =================================")
+
+    config = init_config()
+    iniciar_log(config.get("[LOG]"))
+    aplicar_opcoes_execucao(config, historico, competencia_fixa)
+
+    return executar_lote(config, workers, atualizar_bases, fase, caminho_plano)
+
+
+def lancar_anual(workers: int | None = None, atualizar_bases: bool = False, historico: bool = True, competencia_fixa: str = "") -> dict[str, Any]:
+    """Modo anual: lança, em uma execução, todas as competências restantes dos carnês na entrada.
+
+    Cada carnê é lido uma vez e uma só consulta de despesas cobre o período inteiro. Todo o
+    planejamento termina antes do primeiro PUT; a execução segue competência a competência,
+    cada uma com o pipeline de info e PUTs e seu diário. Os pdfs só são movidos no fim.
+    """
+
+    log.info("========= MODO ANUAL INICIADO. ================================")
+
+    config = init_config()
+    iniciar_log(config.get("[LOG]"))
+    aplicar_opcoes_execucao(config, historico, competencia_fixa)
+
+    metricas = Metricas()
+    workers, workers_execucao, workers_info, buffer_info = ler_workers(
+        config, workers)
+    cliente = criar_cliente(config, max(
+        workers, workers_execucao + workers_info))
+
+    competencias = competencias_restantes(calcular_competencia(config))
+    rotulos = [rotulo_competencia(competencia) for competencia in competencias]
+    log.info(f"Competências do lote: {', '.join(rotulos)}.")
+
+    ctx = criar_contexto(config, cliente, metricas, competencias[0])
+    usar_diario = config.get("[EXECUCAO]", {}).get("diario_execucao", True)
+
+    por_pdf: dict[Path, dict[str, str | list[str]]] = {}
+    try:
+        with metricas.etapa("fase_planejamento"):
+            itens = planejar_anual(
+                ctx, config, workers, atualizar_bases, competencias, usar_diario)
+
+        with metricas.etapa("fase_execucao"):
+            for competencia, rotulo in zip(competencias, rotulos):
+                itens_competencia = [
+                    item for item in itens if item.competencia == rotulo]
+                if not itens_competencia:
                     continue
-                mensagem.append("Sem lançamento")
-                continue
 
-        # ALTERAR VALOR NO A PAGAR (ÍCONE SETA)
-        if id_despesa_desp:
-            payload_info_despesa = {
-                "itensPorPagina": 150,
-                "pagina": 1,
-                "ID_DESPESA_DESP": id_despesa_desp,
-                "ID_DESPESA_DESPM": id_despesa_despm,
-                "DT_FIM": data_final,
-                "FORM": tipo_form
-            }
-            try:
-                info_despesa = get_info_despesa(
-                    URL_INFO_DESP, HEADERS, payload_info_despesa)
-            except requests.exceptions.HTTPError as e:
-                log.error(e)
-                renomear_e_mover_arquivo(
-                    pdf, "Erro na requisição para obtenção dos parâmetros", caminho_iptu_erro)
+                ctx_competencia = contexto_competencia(ctx, competencia)
+                if usar_diario:
+                    ctx_competencia.diario = abrir_diario(
+                        ctx_competencia, competencia)
+                try:
+                    for pdf, resultado in executar_plano(
+                            itens_competencia, ctx_competencia, workers_execucao, workers_info, buffer_info):
+                        por_pdf.setdefault(pdf, {})[rotulo] = resultado
+                finally:
+                    if ctx_competencia.diario is not None:
+                        ctx_competencia.diario.fechar()
+
+        competencias_pdf: dict[Path, list[str]] = {}
+        filas_pdf: dict[Path, FilaLancamento] = {}
+        for item in itens:
+            competencias_pdf.setdefault(Path(item.pdf), []).append(item.competencia)
+            filas_pdf[Path(item.pdf)] = FILAS[item.fila]
+
+        resultados: dict[str, str | list[str]] = {}
+        for pdf, competencias_planejadas in sorted(competencias_pdf.items()):
+            final = concluir_pdf_anual(
+                pdf, filas_pdf[pdf], competencias_planejadas, por_pdf.get(pdf, {}), ctx)
+            # None: nada executado e o pdf ficou na entrada; como no lote mensal, fica fora dos resultados
+            if final is not None:
+                resultados[str(pdf)] = final
+    finally:
+        ctx.banco.fechar()
+        cliente.logar_latencias()
+        cliente.fechar()
+
+    relatorio = gerar_relatorio(
+        metricas, cliente, f"{rotulos[0]}..{rotulos[-1]}", config)
+
+    return {
+        "resultados": resultados,
+        "relatorio": relatorio,
+        "plano": {rotulo: resumir_plano([item for item in itens if item.competencia == rotulo])
+                  for rotulo in rotulos},
+    }
 
-            try:
-                alterar_valor_despesa_api_sl(
-                    URL_ALTERAR_DESP,
-                    TEMP_HEADERS,
-                    info_despesa,
-                    cod_barras,
-                    data_venc_formatada,
-                    data_vencimento,
-                    id_despesa_desp
-                )
-                log.info(f"[{cod_contrato}] Alterado com sucesso.")
-                renomear_e_mover_arquivo(pdf, "OK", caminho_iptu_ok)
-
-            except requests.exceptions.HTTPError as e:
-                log.error(f"[{cod_contrato}] Erro PUT request: {e}")
-                renomear_e_mover_arquivo(
-                    pdf, "Erro PUT request", caminho_iptu_erro)
-                continue
 
-            except Exception as e:
-                log.error(f"[{cod_contrato}] Erro inesperado: {e}")
-                renomear_e_mover_arquivo(
-                    pdf, "Erro inesperado", caminho_iptu_erro)
-                continue
+def nome_inquilino(caminho_config: Path) -> str:
+    """Nome do inquilino: o nome do arquivo de config, ou o da pasta se o arquivo for config.json."""
 
-        # LANÇAR DESPESA (ÍCONE FOGUETE)
-        elif id_despesa_despm:
-            payload_info_despesa = {
-                "itensPorPagina": 150,
-                "pagina": 1,
-                "ID_DESPESA_DESP": id_despesa_desp,
-                "ID_DESPESA_DESPM": id_despesa_despm,
-                "DT_FIM": data_final,
-                "DT_INICIO": data_inicial,
-                "FORM": tipo_form
-            }
-            info_despesa = get_info_despesa(
-                URL_INFO_DESP, HEADERS, payload_info_despesa)
+    caminho_config = Path(caminho_config)
+    if caminho_config.stem == "config":
+        return caminho_config.resolve().parent.name
+    return caminho_config.stem
 
-            try:
-                lancar_valor_despesa_api_sl(
-                    URL_LANCAR_DESP,
-                    TEMP_HEADERS,
-                    info_despesa,
-                    cod_barras,
-                    data_venc_formatada,
-                    data_inicial,
-                    id_despesa_despm
-                )
-                log.info(f"[{cod_contrato}] Lançado com sucesso.")
-                renomear_e_mover_arquivo(pdf, "OK", caminho_iptu_ok)
-
-            except requests.exceptions.HTTPError as e:
-                log.error(f"[{cod_contrato}] Erro PUT request: {e}")
-                renomear_e_mover_arquivo(
-                    pdf, "Erro PUT request", caminho_iptu_erro)
-                continue
 
-            except Exception as e:
-                log.error(f"[{cod_contrato}] Erro inesperado: {e}")
-                renomear_e_mover_arquivo(
-                    pdf, "Erro inesperado", caminho_iptu_erro)
-                continue
+def ler_configs_inquilinos(caminhos: list[Path]) -> dict[str, dict[str, Any]]:
+    """Lê os config.json dos inquilinos, garantindo que nenhum compartilhe pasta de dados ou de entrada.
 
-        # NÃO TEM LANÇAMENTO VÁLIDO:
-        else:
-            log.error(f"[{cod_contrato}] {mensagem}")
-            renomear_e_mover_arquivo(pdf, mensagem, caminho_iptu_erro)
+    Sem [PATHS] pasta_dados, cada inquilino usa data/<nome>, para que caches de ids, diário e
+    plano de uma imobiliária nunca se misturem com os de outra. Os relatórios ([RELATORIO]) ficam
+    na pasta de dados de cada um, salvo caminho explícito, que também não pode se repetir.
+    """
 
-    # ======================================================================================
-    # ======================================================================================
-    # ======================================================================================
+    configs: dict[str, dict[str, Any]] = {}
+    for caminho in caminhos:
+        nome = nome_inquilino(caminho)
+        if nome in configs:
+            raise ValueError(f"Dois configs com o mesmo nome de inquilino: {nome}.")
 
-    # LANÇAR IMÓVEIS VAZIOS:
-    lista_imoveis = get_base_api("imoveis", URL_GET, HEADERS)
-    dict_id_imoveis = relacionar_codigo_e_id_imoveis(lista_imoveis)
+        config = init_config(caminho)
+        config.setdefault("[PATHS]", {}).setdefault(
+            "pasta_dados", str(PASTA_DADOS / nome))
+        configs[nome] = config
 
-    lista_pdfs_vazios = listar_arquivos_pdf(caminho_busca_iptu_vazios)
+    for chave in ("pasta_dados", "iptu_a_lancar_ativos", "iptu_a_lancar_vazios"):
+        vistas: dict[str, str] = {}
+        for nome, config in configs.items():
+            valor = config["[PATHS]"].get(chave)
+            if valor is None:
+                continue
+            pasta = str(Path(valor).resolve())
+            if pasta in vistas:
+                raise ValueError(
+                    f"Inquilinos {vistas[pasta]} e {nome} usam a mesma pasta em [PATHS] {chave}: {valor}.")
+            vistas[pasta] = nome
+
+    # Um relatório sobrescreveria o do outro inquilino a cada execução
+    relatorios: dict[str, str] = {}
+    for nome, config in configs.items():
+        for relatorio in criar_caminhos_relatorio(config, pasta_dados_config(config)):
+            if relatorio is None:
+                continue
+            arquivo = str(relatorio.resolve())
+            if arquivo in relatorios:
+                raise ValueError(
+                    f"Inquilinos {relatorios[arquivo]} e {nome} usam o mesmo arquivo em [RELATORIO]: {relatorio}.")
+            relatorios[arquivo] = nome
+
+    return configs
+
+
+def executar_inquilinos(caminhos: list[Path], workers: int | None = None, atualizar_bases: bool = False, workers_total: int = 16, caminho_relatorio: Path = CAMINHO_RELATORIO_INQUILINOS, historico: bool = True, competencia_fixa: str = "") -> dict[str, Any]:
+    """Modo multi-inquilino: processa os lotes de várias imobiliárias ao mesmo tempo, num só processo.
+
+    Cada inquilino tem seu cliente HTTP (pool, limite de taxa e retentativas), suas relações de
+    ids e sua pasta de dados. `workers_total` é o teto global: limita as threads de cada inquilino
+    e as requisições em andamento somando todos eles. A falha de um inquilino não interrompe os
+    demais. O log segue a seção [LOG] do primeiro config.
+    """
+
+    configs = ler_configs_inquilinos(caminhos)
+    iniciar_log(next(iter(configs.values())).get("[LOG]"))
+
+    workers_total = max(workers_total, 1)
+    log.info(
+        f"========= MODO MULTI-INQUILINO: {', '.join(configs)} (teto de {workers_total} workers). ===")
+
+    limite_global = threading.BoundedSemaphore(workers_total)
+
+    # Os pools de extração dividem os núcleos entre os inquilinos
+    processos = max((os.cpu_count() or 1) // len(configs), 1)
+    for config in configs.values():
+        config_execucao = config.setdefault("[EXECUCAO]", {})
+        if not int(config_execucao.get("processos_extracao", 0)):
+            config_execucao["processos_extracao"] = processos
+        aplicar_opcoes_execucao(config, historico, competencia_fixa)
+
+    def executar(nome: str, config: dict[str, Any]) -> dict[str, Any]:
+        with contexto_log(inquilino=nome):
+            log.info("========= INQUILINO INICIADO. =================================")
+            return executar_lote(config, workers, atualizar_bases, inquilino=nome,
+                                 limite_global=limite_global, teto_workers=workers_total)
+
+    inicio = time.perf_counter()
+    relatorios: dict[str, dict[str, Any]] = {}
+    with ThreadPoolExecutor(max_workers=len(configs), thread_name_prefix="inquilino") as executor:
+        futuros = {nome: executor.submit(executar, nome, config)
+                   for nome, config in configs.items()}
+
+        for nome, futuro in futuros.items():
+            try:
+                relatorios[nome] = futuro.result()["relatorio"]
+            except Exception as e:
+                log.error(f"[{nome}] Falha no inquilino: {e}")
+                relatorios[nome] = {"erro": str(e)}
 
-    for pdf in lista_pdfs_vazios:
+    resumo = relatorio_inquilinos(relatorios, time.perf_counter() - inicio)
+    logar_relatorio_inquilinos(resumo)
+    try:
+        salvar_relatorio_inquilinos(
+            resumo, caminho_relatorio, Path(caminho_relatorio).parent / CAMINHO_PROMETHEUS_INQUILINOS.name)
+    except OSError as e:
+        log.error(f"Não foi possível salvar o relatório dos inquilinos: {e}")
 
-        cod_imovel = pdf.stem.upper()
-        log.info(f"[{cod_imovel}] IMÓVEL VAZIO ATUAL")
+    return resumo
 
-        try:
-            id_imovel = dict_id_imoveis[cod_imovel].upper()
-        except (ValueError, KeyError):
-            log.error(
-                f"[{cod_imovel}] Id do imóvel não encontrado na relação de Vazios")
-            renomear_e_mover_arquivo(
-                pdf, "Vazio Id não encontrado", caminho_iptu_erro)
-            continue
 
-        data_vencimento, cod_barras, valor_total = extrair_dados_pdf(
-            pdf, MES_LANCAMENTO)
-        data_venc_formatada = formatar_data_vencimento(data_vencimento)
-
-        log.info(f"Id do imóvel: {id_imovel}")
-        log.info(f"Data vencimento: {data_vencimento}")
-        log.info(f"Código de Barras: {cod_barras}")
-        log.info(f"Valor Total: {valor_total}")
-
-        payload_get_despesas = {
-            "itensPorPagina": 150,
-            "pagina": 1,
-            "ID_IMOVEL_SEM_CONTRATO": id_imovel,
-            "dtInicioMensal": data_inicial,
-            "dtFimMensal": data_final,
-            "idProduto": 6,  # IPTU
-        }
+def possui_pdfs(pastas: list[str]) -> bool:
+    for pasta in pastas:
         try:
-            despesas_contrato = get_despesas_iptu_api(
-                "despesas", URL_GET, HEADERS, payload_get_despesas)
-        except ValueError:
-            log.error("Não foram encontradas despesas IPTU no imóvel")
-            renomear_e_mover_arquivo(
-                pdf, "Vazio Sem despesas IPTU no imóvel", caminho_iptu_erro)
+            with os.scandir(pasta) as entradas:
+                if any(entrada.name.lower().endswith(".pdf") for entrada in entradas):
+                    return True
+        except FileNotFoundError:
             continue
+    return False
 
-        mensagem = []
-        for despesa in despesas_contrato:
-
-            descricao_prod = despesa["st_descricao_prd"]
-            valor_lancamento = despesa["vl_valor_imod"]
-            debito = despesa["id_debito_imod"]
-            id_despesa_desp = despesa["id_despesa_desp"]
-            id_despesa_despm = despesa["id_despesa_despm"]
-
-            if descricao_prod == "IPTU" and valor_lancamento == valor_total:
-
-                if debito != "1":
-                    if id_despesa_desp or id_despesa_despm:
-                        # Se a despesa tem lançamento válido, mas não tem Débito Proprietário
-                        mensagem.append(
-                            "Vazio Débito não está para o proprietário")
-                        break
-
-                if id_despesa_desp and id_despesa_despm:
-                    tipo_form = "FormAlterarValorDespesaPrincipal"
-                    break
-                elif id_despesa_despm:
-                    tipo_form = "FormLancarDespesaPrincipal"
-                    break
-                else:
-                    mensagem.append("Vazio Sem id lançamento")
-                    continue
-            else:
-                if valor_lancamento != valor_total:
-                    mensagem.append("Vazio Valor lançamento incorreto")
-                    continue
-                mensagem.append("Vazio Sem lançamento")
-                continue
 
-        # ALTERAR VALOR NO A PAGAR (ÍCONE SETA)
-        if id_despesa_desp:
-            payload_info_despesa = {
-                "itensPorPagina": 150,
-                "pagina": 1,
-                "ID_DESPESA_DESP": id_despesa_desp,
-                "ID_DESPESA_DESPM": id_despesa_despm,
-                "DT_FIM": data_final,
-                "FORM": tipo_form
-            }
-            try:
-                info_despesa = get_info_despesa(
-                    URL_INFO_DESP, HEADERS, payload_info_despesa)
-            except requests.exceptions.HTTPError as e:
-                log.error(e)
-                renomear_e_mover_arquivo(
-                    pdf, "Vazio Erro na requisição para obtenção dos parâmetros", caminho_iptu_erro)
+def atualizar_relacoes(ctx: ContextoExecucao, ttl_bases: float, forcar_atualizacao: bool = False) -> None:
+    """Recarrega contratos e imóveis e troca as relações de ids do contexto de uma vez.
 
-            try:
-                alterar_valor_despesa_api_sl(
-                    URL_ALTERAR_DESP,
-                    TEMP_HEADERS,
-                    info_despesa,
-                    cod_barras,
-                    data_venc_formatada,
-                    data_vencimento,
-                    id_despesa_desp
-                )
-                log.info(f"[{cod_imovel}] Alterado com sucesso.")
-                renomear_e_mover_arquivo(
-                    pdf, "Vazio OK", caminho_iptu_ok_vazios)
-
-            except requests.exceptions.HTTPError as e:
-                log.error(f"[{cod_imovel}] Erro PUT request: {e}")
-                renomear_e_mover_arquivo(
-                    pdf, "Vazio Erro PUT request", caminho_iptu_erro)
-                continue
+    Com `ttl_bases` 0, o banco local é sempre sincronizado (de forma incremental).
+    """
+
+    with ctx.metricas.etapa("base_contratos"):
+        carregar_base(ctx.cliente, "contratos", ctx.url_get,
+                      ctx.headers, ttl_bases, ctx.banco, forcar_atualizacao, ctx.dias_carga_completa)
+    with ctx.metricas.etapa("base_imoveis"):
+        carregar_base(ctx.cliente, "imoveis", ctx.url_get,
+                      ctx.headers, ttl_bases, ctx.banco, forcar_atualizacao, ctx.dias_carga_completa)
+
+    # Cada sincronização é uma transação: os workers veem a base antiga ou a nova, nunca uma pela metade
+    ctx.dict_id_contratos = relacionar_codigo_e_id_contratos(ctx.banco)
+    ctx.dict_id_imoveis = relacionar_codigo_e_id_imoveis(ctx.banco)
+
+
+def replanejar_sem_id(itens: list[ItemPlano], ctx: ContextoExecucao, workers: int) -> list[ItemPlano]:
+    """Sincroniza as relações e planeja de novo os itens com código fora delas.
+
+    Um código desconhecido costuma ser contrato/imóvel criado depois da última carga. Só o que
+    continuar sem id depois da sincronização vai para iptu_erro.
+    """
+
+    sem_id = {item.pdf: item for item in itens
+              if item.resultado == FILAS[item.fila].mensagem_sem_id and item.dados_pdf is not None}
+    if not sem_id:
+        return itens
+
+    log.info(f"{len(sem_id)} pdf(s) com código fora das relações. Sincronizando contratos e imóveis.")
+    atualizar_relacoes(ctx, 0)
+
+    extraidos: list[tuple[Path, str, DadosPdf | Exception]] = []
+    for item in sem_id.values():
+        assert item.dados_pdf is not None
+        data_vencimento, cod_barras, valor_total = item.dados_pdf
+        extraidos.append((Path(item.pdf), item.hash_pdf, (data_vencimento, cod_barras, valor_total)))
+
+    replanejados = planejar_fila(extraidos, filas_por_pasta(ctx), ctx, workers)
+    por_pdf = {item.pdf: item for item in replanejados}
+
+    return [por_pdf.get(item.pdf, item) for item in itens]
 
+
+def vigiar(workers: int | None = None, atualizar_bases: bool = False, historico: bool = True, competencia_fixa: str = "") -> None:
+    """Modo contínuo: processa os pdfs que chegam nas pastas de entrada, mantendo tudo aquecido.
+
+    O cliente HTTP (e seu pool de conexões), as relações de ids, o cache de extração e o diário
+    da competência vivem enquanto o processo viver. As relações são sincronizadas em segundo
+    plano a cada [VIGIA] minutos_atualizacao_bases. SIGTERM/SIGINT terminam o lote em
+    andamento (PUTs já iniciados) e encerram; itens ainda não iniciados ficam na entrada.
+    """
+
+    log.info("========= MODO VIGIA INICIADO. ================================")
+
+    config = init_config()
+    iniciar_log(config.get("[LOG]"))
+    aplicar_opcoes_execucao(config, historico, competencia_fixa)
+
+    config_vigia = config.get("[VIGIA]", {})
+    intervalo_polling = float(config_vigia.get("intervalo_polling", 2))
+    # Espera depois do primeiro pdf para juntar os demais que chegam no mesmo lote
+    assentamento = float(config_vigia.get("segundos_assentamento", 2))
+    # Varredura completa periódica: pega eventos perdidos e retenta pdfs pendentes
+    intervalo_varredura = float(config_vigia.get("segundos_varredura", 60))
+    intervalo_bases = 60 * float(config_vigia.get("minutos_atualizacao_bases", 30))
+
+    workers, workers_execucao, workers_info, buffer_info = ler_workers(
+        config, workers)
+    cliente = criar_cliente(config, max(
+        workers, workers_execucao + workers_info))
+    metricas = Metricas()
+
+    competencia = calcular_competencia(config)
+    ctx = criar_contexto(config, cliente, metricas, competencia)
+    usar_diario = config.get("[EXECUCAO]", {}).get("diario_execucao", True)
+    if usar_diario:
+        ctx.diario = abrir_diario(ctx, competencia)
+
+    atualizar_relacoes(ctx, float(config.get("[CACHE]", {}).get(
+        "ttl_horas_bases", 24)), atualizar_bases)
+    cache_extracao = criar_cache_extracao_contexto(config, ctx)
+
+    parar = threading.Event()
+
+    def sinalizar(sinal: int, _frame: Any) -> None:
+        log.info(f"Sinal {sinal} recebido. Encerrando após o lote em andamento.")
+        parar.set()
+
+    signal.signal(signal.SIGTERM, sinalizar)
+    signal.signal(signal.SIGINT, sinalizar)
+
+    def atualizar_periodicamente() -> None:
+        while not parar.wait(intervalo_bases):
+            try:
+                atualizar_relacoes(ctx, 0)
             except Exception as e:
-                log.error(f"[{cod_imovel}] Erro inesperado: {e}")
-                renomear_e_mover_arquivo(
-                    pdf, "Vazio Erro inesperado", caminho_iptu_erro)
+                log.error(f"Falha ao atualizar as relações de ids: {e}")
+
+    threading.Thread(target=atualizar_periodicamente,
+                     name="atualizar_bases", daemon=True).start()
+
+    pastas = [getattr(ctx, fila.pasta_entrada) for fila in FILAS.values()]
+    vigia = criar_vigia([Path(pasta) for pasta in pastas], intervalo_polling,
+                        bool(config_vigia.get("forcar_polling", False)))
+
+    # Pdfs deixados na entrada antes de o modo vigia subir
+    proxima_varredura = 0.0
+
+    try:
+        while not parar.is_set():
+            chegou = vigia.aguardar(1.0)
+            if not chegou and time.monotonic() < proxima_varredura:
                 continue
+            proxima_varredura = time.monotonic() + intervalo_varredura
 
-        # LANÇAR DESPESA (ÍCONE FOGUETE)
-        elif id_despesa_despm:
-            payload_info_despesa = {
-                "itensPorPagina": 150,
-                "pagina": 1,
-                "ID_DESPESA_DESP": id_despesa_desp,
-                "ID_DESPESA_DESPM": id_despesa_despm,
-                "DT_FIM": data_final,
-                "DT_INICIO": data_inicial,
-                "FORM": tipo_form
-            }
-            info_despesa = get_info_despesa(
-                URL_INFO_DESP, HEADERS, payload_info_despesa)
+            if chegou:
+                parar.wait(assentamento)
+            if parar.is_set() or not possui_pdfs(pastas):
+                continue
 
+            nova_competencia = calcular_competencia(config)
+            if nova_competencia != competencia:
+                log.info(f"Nova competência: {rotulo_competencia(nova_competencia)}.")
+                competencia = nova_competencia
+                ctx.mes_lancamento = competencia["mes"]
+                ctx.data_inicial = competencia["data_inicial"]
+                ctx.data_final = competencia["data_final"]
+                if ctx.diario is not None:
+                    ctx.diario.fechar()
+                    ctx.diario = abrir_diario(ctx, competencia)
+
+            resultados: list[tuple[Path, str | list[str]]] = []
             try:
-                lancar_valor_despesa_api_sl(
-                    URL_LANCAR_DESP,
-                    TEMP_HEADERS,
-                    info_despesa,
-                    cod_barras,
-                    data_venc_formatada,
-                    data_inicial,
-                    id_despesa_despm
-                )
-                log.info(f"[{cod_imovel}] Lançado com sucesso.")
-                renomear_e_mover_arquivo(
-                    pdf, "Vazio OK", caminho_iptu_ok_vazios)
-
-            except requests.exceptions.HTTPError as e:
-                log.error(f"[{cod_imovel}] Erro PUT request: {e}")
-                renomear_e_mover_arquivo(
-                    pdf, "Vazio Erro PUT request", caminho_iptu_erro)
-                continue
+                with metricas.etapa("fase_planejamento"):
+                    itens = planejar_lote(
+                        ctx, config, workers, False, carregar_bases=False, cache_extracao=cache_extracao)
+                    # Códigos desconhecidos saem do próprio planejamento, sem outra varredura da entrada
+                    itens = replanejar_sem_id(itens, ctx, workers)
+                with metricas.etapa("fase_execucao"):
+                    resultados = executar_plano(itens, ctx, workers_execucao,
+                                                workers_info, buffer_info, parar)
+
+                # Lote cheio que andou: o restante da entrada vai logo, sem esperar a varredura
+                if resultados and 0 < ctx.entrada.tamanho_lote <= len(itens):
+                    proxima_varredura = 0.0
+            except Exception as e:
+                # Um lote com problema não derruba o processo; os pdfs seguem na entrada
+                log.error(f"Erro no lote: {e}")
+
+            # Relatório só quando algum pdf andou; métricas, latências e diário recomeçam a cada
+            # lote para a memória e o arquivo do diário não crescerem com o tempo de vida do processo
+            if resultados:
+                gerar_relatorio(metricas, cliente, competencia, config)
+                metricas.reiniciar()
+                cliente.reiniciar_latencias()
+                if ctx.diario is not None:
+                    ctx.diario.compactar()
+    finally:
+        vigia.fechar()
+        if ctx.diario is not None:
+            ctx.diario.fechar()
+        ctx.banco.fechar()
+        cliente.fechar()
+        log.info("========= MODO VIGIA ENCERRADO. ===============================")
+
+
+def comando_cache_extracao(acao: str) -> None:
+    config = init_config()
+    cache = criar_cache_extracao(
+        config, pasta_dados_config(config) / CAMINHO_CACHE_EXTRACAO.name)
 
-        # NÃO TEM LANÇAMENTO VÁLIDO:
-        else:
-            log.error(f"[{cod_imovel}] {mensagem}")
-            renomear_e_mover_arquivo(pdf, mensagem, caminho_iptu_erro)
-            continue
+    if acao == "limpar":
+        cache.limpar()
+        print("Cache de extração limpo.")
+        return
 
-    return
+    print(json.dumps(cache.resumo(), indent=4, ensure_ascii=False))
 
 
 if __name__ == "__main__":
-    main()
+    # Só no processo principal: com spawn, os processos de extração reimportam este módulo
+    # e não devem abrir outro listener no app.log. Configuração padrão até o config.json ser
+    # lido; cada modo aplica a seção [LOG]
+    iniciar_log()
+
+    args = ler_argumentos()
+    opcoes: dict[str, Any] = {"historico": not args.ignorar_historico,
+                              "competencia_fixa": args.competencia}
+
+    if args.comando == "cache-extracao":
+        comando_cache_extracao(args.acao)
+    elif args.comando == "inquilinos":
+        executar_inquilinos(args.configs, workers=args.workers, atualizar_bases=args.atualizar_bases,
+                            workers_total=args.workers_total, caminho_relatorio=args.relatorio, **opcoes)
+    elif args.comando == "anual":
+        lancar_anual(workers=args.workers, atualizar_bases=args.atualizar_bases, **opcoes)
+    elif args.comando == "vigiar":
+        vigiar(workers=args.workers, atualizar_bases=args.atualizar_bases, **opcoes)
+    elif args.comando in ("planejar", "executar"):
+        main(workers=args.workers, atualizar_bases=args.atualizar_bases,
+             fase=args.comando, caminho_plano=args.plano, **opcoes)
+    else:
+        main(workers=args.workers, atualizar_bases=args.atualizar_bases, **opcoes)
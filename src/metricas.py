@@ -0,0 +1,300 @@
+import os
+import json
+import time
+import threading
+import logging as log
+from pathlib import Path
+from datetime import datetime
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+from cliente_api import resumir_duracoes
+
+CAMINHO_RELATORIO = Path("data/relatorio_execucao.json")
+CAMINHO_PROMETHEUS = Path("data/lancar_iptu.prom")
+CAMINHO_RELATORIO_INQUILINOS = Path("data/relatorio_inquilinos.json")
+CAMINHO_PROMETHEUS_INQUILINOS = Path("data/lancar_iptu_inquilinos.prom")
+
+# Limites (em segundos) dos buckets dos histogramas, cobrindo de leitura em cache a PUT lento
+LIMITES_HISTOGRAMA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25,
+                      0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def rotulo_resultado(resultado: str | list[str]) -> str:
+    """Resultado de um pdf como rótulo único (a lista de motivos vira os motivos distintos)."""
+
+    if isinstance(resultado, list):
+        return " / ".join(dict.fromkeys(resultado)) or "Sem lançamento"
+    return resultado
+
+
+def histograma(valores: list[float], limites: tuple[float, ...] = LIMITES_HISTOGRAMA) -> dict[str, int]:
+    """Contagem acumulada por limite superior, no formato dos histogramas do Prometheus."""
+
+    contagens = {}
+    for limite in limites:
+        contagens[f"{limite:g}"] = sum(1 for valor in valores if valor <= limite)
+    contagens["+Inf"] = len(valores)
+    return contagens
+
+
+def _escapar_rotulo(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _escrever_atomico(caminho: Path, conteudo: str) -> None:
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    temporario = caminho.with_suffix(caminho.suffix + ".tmp")
+    with open(temporario, "w", encoding="utf-8") as file:
+        file.write(conteudo)
+    # O coletor de textfile do node_exporter nunca pode ler um arquivo pela metade
+    os.replace(temporario, caminho)
+
+
+class Metricas:
+    """Durações por etapa e contagem de resultados de uma execução, compartilhadas entre os workers."""
+
+    def __init__(self) -> None:
+        self.inicio = datetime.now()
+        self._inicio_relogio = time.perf_counter()
+
+        self._duracoes: dict[str, list[float]] = {}
+        self._resultados: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def etapa(self, nome: str) -> Iterator[None]:
+        """Mede o bloco como uma ocorrência da etapa `nome` (registrada mesmo se levantar)."""
+
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            segundos = time.perf_counter() - inicio
+            self.registrar_duracao(nome, segundos)
+
+            if log.getLogger().isEnabledFor(log.DEBUG):
+                log.debug("Etapa %s: %.1f ms", nome, segundos * 1000,
+                          extra={"etapa": nome, "duracao_ms": round(segundos * 1000, 1)})
+
+    def registrar_duracao(self, nome: str, segundos: float) -> None:
+        with self._lock:
+            self._duracoes.setdefault(nome, []).append(segundos)
+
+    def contar_resultado(self, resultado: str | list[str]) -> None:
+        rotulo = rotulo_resultado(resultado)
+        with self._lock:
+            self._resultados[rotulo] = self._resultados.get(rotulo, 0) + 1
+
+    def reiniciar(self) -> None:
+        """Zera durações e resultados; o próximo relatório começa de agora."""
+
+        with self._lock:
+            self.inicio = datetime.now()
+            self._inicio_relogio = time.perf_counter()
+            self._duracoes = {}
+            self._resultados = {}
+
+    def relatorio(self, latencias: dict[str, list[float]], competencia: str = "") -> dict[str, Any]:
+        """Relatório da execução: resultados, resumo e histograma por etapa e por endpoint da API."""
+
+        with self._lock:
+            duracoes = {k: list(v) for k, v in self._duracoes.items()}
+            resultados = dict(self._resultados)
+
+        return {
+            "competencia": competencia,
+            "inicio": self.inicio.isoformat(timespec="seconds"),
+            "fim": datetime.now().isoformat(timespec="seconds"),
+            "tempo_total_s": round(time.perf_counter() - self._inicio_relogio, 3),
+            "pdfs": sum(resultados.values()),
+            "resultados": dict(sorted(resultados.items(), key=lambda item: -item[1])),
+            "etapas": {nome: resumir_duracoes(valores) for nome, valores in duracoes.items()},
+            "endpoints": {nome: resumir_duracoes(valores) for nome, valores in latencias.items()},
+            "histogramas": {
+                "etapas": {nome: histograma(valores) for nome, valores in duracoes.items()},
+                "endpoints": {nome: histograma(valores) for nome, valores in latencias.items()},
+            },
+        }
+
+
+def formatar_prometheus(relatorio: dict[str, Any]) -> str:
+    """Relatório no formato de exposição em texto do Prometheus (coletor de textfile)."""
+
+    linhas = [
+        "# HELP lancar_iptu_execucao_segundos Tempo total da última execução.",
+        "# TYPE lancar_iptu_execucao_segundos gauge",
+        f"lancar_iptu_execucao_segundos {relatorio['tempo_total_s']}",
+        "# HELP lancar_iptu_ultima_execucao_timestamp_segundos Fim da última execução (epoch).",
+        "# TYPE lancar_iptu_ultima_execucao_timestamp_segundos gauge",
+        f"lancar_iptu_ultima_execucao_timestamp_segundos {int(datetime.fromisoformat(relatorio['fim']).timestamp())}",
+        "# HELP lancar_iptu_pdfs_total Pdfs processados na última execução, por resultado.",
+        "# TYPE lancar_iptu_pdfs_total counter",
+    ]
+    for resultado, quantidade in relatorio["resultados"].items():
+        linhas.append(
+            f"lancar_iptu_pdfs_total{{resultado=\"{_escapar_rotulo(resultado)}\"}} {quantidade}")
+
+    for metrica, rotulo, grupo, descricao in (
+            ("lancar_iptu_etapa_segundos", "etapa", "etapas", "Duração de cada etapa do lançamento."),
+            ("lancar_iptu_requisicao_segundos", "endpoint", "endpoints", "Latência das requisições à API Superlógica.")):
+        linhas.append(f"# HELP {metrica} {descricao}")
+        linhas.append(f"# TYPE {metrica} histogram")
+
+        for nome, buckets in relatorio["histogramas"][grupo].items():
+            nome_escapado = _escapar_rotulo(nome)
+            for limite, quantidade in buckets.items():
+                linhas.append(
+                    f"{metrica}_bucket{{{rotulo}=\"{nome_escapado}\",le=\"{limite}\"}} {quantidade}")
+
+            resumo = relatorio[grupo][nome]
+            linhas.append(
+                f"{metrica}_sum{{{rotulo}=\"{nome_escapado}\"}} {resumo['total_s']}")
+            linhas.append(
+                f"{metrica}_count{{{rotulo}=\"{nome_escapado}\"}} {resumo['chamadas']}")
+
+    return "\n".join(linhas) + "\n"
+
+
+def salvar_relatorio(relatorio: dict[str, Any], caminho_json: Path = CAMINHO_RELATORIO, caminho_prometheus: Path | None = CAMINHO_PROMETHEUS) -> None:
+    _escrever_atomico(Path(caminho_json), json.dumps(
+        relatorio, indent=4, ensure_ascii=False))
+
+    if caminho_prometheus:
+        _escrever_atomico(Path(caminho_prometheus),
+                          formatar_prometheus(relatorio))
+
+    log.info(f"Relatório da execução salvo em {caminho_json}.")
+
+
+def logar_relatorio(relatorio: dict[str, Any]) -> None:
+    log.info(
+        f"Execução: {relatorio['pdfs']} pdfs em {relatorio['tempo_total_s']} s")
+
+    for resultado, quantidade in relatorio["resultados"].items():
+        log.info(f"Resultado {resultado}: {quantidade}")
+
+    for etapa, dados in relatorio["etapas"].items():
+        log.info(
+            f"Etapa {etapa}: {dados['chamadas']}x, p50 {dados['p50_ms']} ms, "
+            f"p95 {dados['p95_ms']} ms, total {dados['total_s']} s")
+
+
+def criar_caminhos_relatorio(config: dict[str, Any], pasta_dados: Path | None = None) -> tuple[Path, Path | None]:
+    """Caminhos da seção [RELATORIO] do config.json (opcional); prometheus vazio desliga o textfile.
+
+    Sem caminho no config (ou null), os arquivos ficam em `pasta_dados` (data/ por padrão), o
+    que dá a cada inquilino os seus.
+    """
+
+    config_relatorio = config.get("[RELATORIO]", {})
+    pasta = Path(pasta_dados) if pasta_dados is not None else CAMINHO_RELATORIO.parent
+
+    caminho_json = config_relatorio.get("caminho_json")
+    caminho_prometheus = config_relatorio.get("caminho_prometheus")
+    if caminho_prometheus is None:
+        caminho_prometheus = str(pasta / CAMINHO_PROMETHEUS.name)
+
+    return (Path(caminho_json or pasta / CAMINHO_RELATORIO.name),
+            Path(caminho_prometheus) if caminho_prometheus else None)
+
+
+def vazao(pdfs: int, segundos: float) -> float:
+    return round(pdfs / segundos, 3) if segundos > 0 else 0.0
+
+
+def relatorio_inquilinos(relatorios: dict[str, dict[str, Any]], tempo_total_s: float) -> dict[str, Any]:
+    """Resumo do modo multi-inquilino: vazão de cada inquilino e do processo inteiro.
+
+    `relatorios` traz o relatório de cada inquilino, ou {"erro": ...} para quem falhou.
+    """
+
+    inquilinos = {}
+    for nome, relatorio in relatorios.items():
+        if "erro" in relatorio:
+            inquilinos[nome] = {"erro": relatorio["erro"], "pdfs": 0}
+            continue
+
+        inquilinos[nome] = {
+            "competencia": relatorio["competencia"],
+            "pdfs": relatorio["pdfs"],
+            "tempo_total_s": relatorio["tempo_total_s"],
+            "pdfs_por_segundo": vazao(relatorio["pdfs"], relatorio["tempo_total_s"]),
+            "resultados": relatorio["resultados"],
+        }
+
+    pdfs = sum(dados["pdfs"] for dados in inquilinos.values())
+
+    return {
+        "fim": datetime.now().isoformat(timespec="seconds"),
+        "tempo_total_s": round(tempo_total_s, 3),
+        "pdfs": pdfs,
+        "pdfs_por_segundo": vazao(pdfs, tempo_total_s),
+        "inquilinos": inquilinos,
+    }
+
+
+def formatar_prometheus_inquilinos(resumo: dict[str, Any]) -> str:
+    """Vazão e resultados por inquilino no formato de texto do Prometheus."""
+
+    linhas = [
+        "# HELP lancar_iptu_inquilino_execucao_segundos Tempo da última execução de cada inquilino.",
+        "# TYPE lancar_iptu_inquilino_execucao_segundos gauge",
+    ]
+    for nome, dados in resumo["inquilinos"].items():
+        if "erro" not in dados:
+            linhas.append(
+                f"lancar_iptu_inquilino_execucao_segundos{{inquilino=\"{_escapar_rotulo(nome)}\"}} {dados['tempo_total_s']}")
+
+    linhas += [
+        "# HELP lancar_iptu_inquilino_pdfs_por_segundo Vazão da última execução de cada inquilino.",
+        "# TYPE lancar_iptu_inquilino_pdfs_por_segundo gauge",
+    ]
+    for nome, dados in resumo["inquilinos"].items():
+        if "erro" not in dados:
+            linhas.append(
+                f"lancar_iptu_inquilino_pdfs_por_segundo{{inquilino=\"{_escapar_rotulo(nome)}\"}} {dados['pdfs_por_segundo']}")
+
+    linhas += [
+        "# HELP lancar_iptu_inquilino_falha Inquilino cuja última execução falhou (1) ou não (0).",
+        "# TYPE lancar_iptu_inquilino_falha gauge",
+    ]
+    for nome, dados in resumo["inquilinos"].items():
+        linhas.append(
+            f"lancar_iptu_inquilino_falha{{inquilino=\"{_escapar_rotulo(nome)}\"}} {int('erro' in dados)}")
+
+    linhas += [
+        "# HELP lancar_iptu_inquilino_pdfs_total Pdfs processados na última execução, por inquilino e resultado.",
+        "# TYPE lancar_iptu_inquilino_pdfs_total counter",
+    ]
+    for nome, dados in resumo["inquilinos"].items():
+        for resultado, quantidade in dados.get("resultados", {}).items():
+            linhas.append(
+                f"lancar_iptu_inquilino_pdfs_total{{inquilino=\"{_escapar_rotulo(nome)}\",resultado=\"{_escapar_rotulo(resultado)}\"}} {quantidade}")
+
+    return "\n".join(linhas) + "\n"
+
+
+def salvar_relatorio_inquilinos(resumo: dict[str, Any], caminho_json: Path = CAMINHO_RELATORIO_INQUILINOS, caminho_prometheus: Path | None = CAMINHO_PROMETHEUS_INQUILINOS) -> None:
+    _escrever_atomico(Path(caminho_json), json.dumps(
+        resumo, indent=4, ensure_ascii=False))
+
+    if caminho_prometheus:
+        _escrever_atomico(Path(caminho_prometheus),
+                          formatar_prometheus_inquilinos(resumo))
+
+    log.info(f"Relatório dos inquilinos salvo em {caminho_json}.")
+
+
+def logar_relatorio_inquilinos(resumo: dict[str, Any]) -> None:
+    for nome, dados in resumo["inquilinos"].items():
+        if "erro" in dados:
+            log.info(f"Inquilino {nome}: falhou ({dados['erro']})")
+        else:
+            log.info(
+                f"Inquilino {nome}: {dados['pdfs']} pdfs em {dados['tempo_total_s']} s "
+                f"({dados['pdfs_por_segundo']} pdfs/s)")
+
+    log.info(
+        f"Inquilinos: {resumo['pdfs']} pdfs em {resumo['tempo_total_s']} s "
+        f"({resumo['pdfs_por_segundo']} pdfs/s)")
@@ -0,0 +1,55 @@
+import logging as log
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from cliente_api import ClienteSuperlogica
+
+
+def buscar_todas_paginas(cliente: ClienteSuperlogica, url: str, headers: dict, params: dict) -> list[dict]:
+    """Percorre todas as páginas de uma listagem da API Superlógica e retorna os itens em ordem.
+
+    A primeira página é buscada sozinha, já que a maioria das listagens (despesas de um contrato)
+    cabe nela. Se vier cheia, as páginas seguintes são buscadas especulativamente em janelas de
+    `cliente.paginas_simultaneas` requisições paralelas, e a busca para na primeira página incompleta.
+
+    Levanta HTTPError se alguma página falhar mesmo após as novas tentativas do cliente, em vez
+    de devolver uma listagem incompleta.
+    """
+
+    itens_por_pagina = params["itensPorPagina"]
+    pagina_inicial = params.get("pagina", 1)
+
+    def buscar(pagina: int) -> list[dict]:
+        response = cliente.get(
+            url, headers=headers, params={**params, "pagina": pagina})
+
+        if response.status_code != 200:
+            log.error(f"Erro na requisição: {response.status_code}")
+            raise requests.exceptions.HTTPError(
+                f"Erro na requisição da página {pagina}: {response.status_code}")
+
+        data = response.json()
+        return data["data"] if data else []
+
+    primeira = buscar(pagina_inicial)
+
+    todos_os_dados = list(primeira)
+    if len(primeira) < itens_por_pagina:
+        # Se a resposta for vazia ou menor que o limite, é a última página
+        return todos_os_dados
+
+    janela = max(cliente.paginas_simultaneas, 1)
+    proxima = pagina_inicial + 1
+
+    with ThreadPoolExecutor(max_workers=janela, thread_name_prefix="pagina") as executor:
+        while True:
+            # map devolve na ordem das páginas, então a costura é direta
+            for dados in executor.map(buscar, range(proxima, proxima + janela)):
+                todos_os_dados.extend(dados)
+
+                if len(dados) < itens_por_pagina:
+                    # Páginas especulativas depois da última são descartadas
+                    return todos_os_dados
+
+            proxima += janela
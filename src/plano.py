@@ -0,0 +1,99 @@
+import os
+import json
+import logging as log
+from pathlib import Path
+from datetime import datetime
+from dataclasses import asdict, dataclass
+from typing import Any
+
+CAMINHO_PLANO = Path("data/plano_lancamento.json")
+
+# O que a fase de execução faz com cada item do plano
+ACAO_PUT = "put"
+ACAO_ERRO = "erro"
+ACAO_PENDENTE = "pendente"
+
+
+@dataclass
+class ItemPlano:
+    """Decisão tomada na fase de planejamento para um pdf, sem nenhuma escrita na API.
+
+    Com `resultado`, o pdf só é movido para iptu_erro na execução. Com `pendente` (falha de
+    requisição ao planejar), o pdf fica na pasta de entrada para a próxima execução.
+    """
+
+    pdf: str
+    hash_pdf: str
+    fila: str
+    codigo: str
+    id_dono: str = ""
+    dados_pdf: list[str] | None = None
+    tipo_form: str | None = None
+    id_despesa_desp: str | None = None
+    id_despesa_despm: str | None = None
+    resultado: str | list[str] | None = None
+    pendente: str = ""
+    # Só no modo anual, em que um carnê gera um item por competência
+    competencia: str = ""
+    # Cópia de outro carnê (mesmo hash ou código de barras): só é movida, sem chamadas à API
+    duplicado_de: str = ""
+
+    @property
+    def acao(self) -> str:
+        if self.pendente:
+            return ACAO_PENDENTE
+        if self.resultado is not None:
+            return ACAO_ERRO
+        return ACAO_PUT
+
+
+def resumir_plano(itens: list[ItemPlano]) -> dict[str, Any]:
+    """Quantidade de itens por ação, por formulário e por resultado previsto."""
+
+    resumo: dict[str, Any] = {"total": len(itens), "acoes": {},
+                              "formularios": {}, "erros": {}}
+    for item in itens:
+        resumo["acoes"][item.acao] = resumo["acoes"].get(item.acao, 0) + 1
+
+        if item.acao == ACAO_PUT:
+            resumo["formularios"][item.tipo_form] = resumo["formularios"].get(
+                item.tipo_form, 0) + 1
+        elif item.acao == ACAO_ERRO:
+            motivo = " / ".join(dict.fromkeys(item.resultado)) if isinstance(
+                item.resultado, list) else str(item.resultado)
+            resumo["erros"][motivo] = resumo["erros"].get(motivo, 0) + 1
+
+    return resumo
+
+
+def salvar_plano(itens: list[ItemPlano], competencia: dict[str, Any], caminho: Path = CAMINHO_PLANO) -> None:
+    """Grava o plano (escrita atômica), com a competência usada para montar os payloads."""
+
+    caminho = Path(caminho)
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+
+    conteudo = {
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+        "competencia": competencia,
+        "resumo": resumir_plano(itens),
+        "itens": [asdict(item) for item in itens],
+    }
+
+    temporario = caminho.with_suffix(".tmp")
+    with open(temporario, "w", encoding="utf-8") as file:
+        json.dump(conteudo, file, indent=4, ensure_ascii=False)
+    os.replace(temporario, caminho)
+
+    log.info(f"Plano com {len(itens)} pdfs salvo em {caminho}.")
+
+
+def ler_plano(caminho: Path = CAMINHO_PLANO) -> tuple[list[ItemPlano], dict[str, Any]]:
+    """Lê um plano salvo; retorna os itens e a competência."""
+
+    with open(caminho, "r", encoding="utf-8") as file:
+        conteudo = json.load(file)
+
+    itens = [ItemPlano(**item) for item in conteudo["itens"]]
+    log.info(f"Plano de {conteudo['gerado_em']} lido: {len(itens)} pdfs.")
+
+    return itens, conteudo["competencia"]
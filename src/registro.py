@@ -0,0 +1,214 @@
+import os
+import json
+import queue
+import atexit
+import threading
+import multiprocessing
+import logging as log
+from datetime import datetime
+from contextlib import contextmanager
+from typing import Any, Iterator
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, TimedRotatingFileHandler
+
+FORMATO_TEXTO = "%(asctime)s | %(levelname)-8s | %(message)s"
+FORMATO_DATA = "%Y-%m-%d %H:%M:%S"
+
+# Atributos passados em `extra=` (ou pelo contexto) que viram campos da linha JSON
+CAMPOS_ESTRUTURADOS = ("inquilino", "contrato", "etapa", "duracao_ms", "resultado")
+
+_contexto = threading.local()
+_listener: QueueListener | None = None
+_listener_filhos: QueueListener | None = None
+# Registros dos processos filhos (pool de extração); criada uma vez e mantida entre `iniciar_log`
+_fila_filhos: Any = None
+_config_atual: dict[str, Any] = {}
+
+
+@contextmanager
+def contexto_log(contrato: str | None = None, inquilino: str | None = None) -> Iterator[None]:
+    """Marca com `contrato` (código do contrato ou do imóvel) toda linha logada pela thread no bloco.
+
+    `inquilino` (modo multi-inquilino) identifica a imobiliária; valores vazios mantêm o contexto atual.
+    """
+
+    anterior = (getattr(_contexto, "contrato", None),
+                getattr(_contexto, "inquilino", None))
+    if contrato:
+        _contexto.contrato = contrato
+    if inquilino:
+        _contexto.inquilino = inquilino
+    try:
+        yield
+    finally:
+        _contexto.contrato, _contexto.inquilino = anterior
+
+
+class FiltroContexto(log.Filter):
+    """Copia o contexto da thread para o registro antes de ele entrar na fila do listener."""
+
+    def filter(self, record: log.LogRecord) -> bool:
+        for campo in ("contrato", "inquilino"):
+            if getattr(record, campo, None) is None:
+                setattr(record, campo, getattr(_contexto, campo, None))
+        return True
+
+
+class FormatadorTexto(log.Formatter):
+    """Formato texto; no modo multi-inquilino, a mensagem vem prefixada com o inquilino."""
+
+    def formatMessage(self, record: log.LogRecord) -> str:
+        linha = super().formatMessage(record)
+        inquilino = getattr(record, "inquilino", None)
+        if not inquilino:
+            return linha
+
+        cabecalho = linha[:len(linha) - len(record.message)]
+        return f"{cabecalho}[{inquilino}] {record.message}"
+
+
+class FormatadorJson(log.Formatter):
+    """Uma linha JSON por registro, com os campos estruturados presentes."""
+
+    def format(self, record: log.LogRecord) -> str:
+        linha = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "nivel": record.levelname,
+            "thread": record.threadName,
+            "mensagem": record.getMessage(),
+        }
+        for campo in CAMPOS_ESTRUTURADOS:
+            valor = getattr(record, campo, None)
+            if valor is not None:
+                linha[campo] = valor
+
+        if record.exc_info:
+            linha["excecao"] = self.formatException(record.exc_info)
+
+        return json.dumps(linha, ensure_ascii=False)
+
+
+def _criar_formatador(formato: str) -> log.Formatter:
+    if formato == "json":
+        return FormatadorJson()
+    return FormatadorTexto(FORMATO_TEXTO, datefmt=FORMATO_DATA)
+
+
+def _criar_destino(config: dict[str, Any]) -> log.Handler:
+    """Handler que efetivamente escreve no disco, rotacionando por tamanho ou diariamente."""
+
+    arquivo = config.get("arquivo", "app.log")
+    rotacao = config.get("rotacao", "tamanho")
+    backups = int(config.get("backups", 10))
+
+    if rotacao == "diaria":
+        return TimedRotatingFileHandler(
+            arquivo, when="midnight", backupCount=backups, encoding="utf-8")
+
+    if rotacao == "tamanho":
+        return RotatingFileHandler(
+            arquivo, maxBytes=int(float(config.get("tamanho_max_mb", 10)) * 1024 * 1024),
+            backupCount=backups, encoding="utf-8")
+
+    return log.FileHandler(arquivo, encoding="utf-8")
+
+
+def encerrar_log() -> None:
+    """Para os listeners, escrevendo o que ainda estiver nas filas."""
+
+    global _listener, _listener_filhos
+
+    if _listener_filhos is not None:
+        _listener_filhos.stop()
+        _listener_filhos = None
+
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+def iniciar_log(config: dict[str, Any] | None = None) -> None:
+    """Configura o log da aplicação a partir da seção [LOG] do config.json (opcional).
+
+    As threads só enfileiram o registro; a formatação e a escrita no arquivo acontecem na
+    thread do `QueueListener`, fora do caminho dos workers. Os processos filhos enviam os seus
+    por uma fila entre processos, consumida por um segundo listener com o mesmo destino: só o
+    processo principal abre o arquivo (a rotação funciona, inclusive no Windows). Pode ser
+    chamada de novo para trocar a configuração (os listeners anteriores são esvaziados e encerrados).
+    """
+
+    global _listener, _listener_filhos, _fila_filhos, _config_atual
+
+    config = config or {}
+
+    encerrar_log()
+    raiz = log.getLogger()
+    for handler in list(raiz.handlers):
+        raiz.removeHandler(handler)
+        handler.close()
+
+    destino = _criar_destino(config)
+    destino.setFormatter(_criar_formatador(config.get("formato", "texto")))
+
+    fila: queue.Queue[log.LogRecord] = queue.Queue()
+    handler_fila = QueueHandler(fila)
+    handler_fila.addFilter(FiltroContexto())
+
+    raiz.addHandler(handler_fila)
+    raiz.setLevel(str(config.get("nivel", "INFO")).upper())
+
+    _listener = QueueListener(fila, destino, respect_handler_level=True)
+    _listener.start()
+
+    if _fila_filhos is None:
+        _fila_filhos = multiprocessing.Queue()
+    _listener_filhos = QueueListener(_fila_filhos, destino, respect_handler_level=True)
+    _listener_filhos.start()
+
+    _config_atual = config
+
+
+def config_log_atual() -> dict[str, Any]:
+    """Seção [LOG] aplicada pelo último `iniciar_log` (repassada aos processos filhos)."""
+
+    return dict(_config_atual)
+
+
+def fila_log_filhos() -> Any:
+    """Fila entre processos do listener dos filhos; None se `iniciar_log` ainda não rodou."""
+
+    return _fila_filhos
+
+
+def iniciar_log_filho(config: dict[str, Any], fila: Any = None) -> None:
+    """Em processos filhos (pool de extração), envia os registros para o listener do processo principal.
+
+    Com fork, roda pelo register_at_fork; com spawn (Windows), é o initializer do pool, já que
+    o filho reimporta os módulos e recebe a fila pelos `initargs`. Sem fila (log do processo
+    principal não configurado), o filho não grava nada.
+    """
+
+    global _listener, _listener_filhos, _fila_filhos, _config_atual
+
+    _listener = _listener_filhos = None
+    _fila_filhos = fila
+    _config_atual = config
+    raiz = log.getLogger()
+    for handler in list(raiz.handlers):
+        raiz.removeHandler(handler)
+
+    if fila is not None:
+        handler = QueueHandler(fila)
+        handler.addFilter(FiltroContexto())
+        raiz.addHandler(handler)
+    raiz.setLevel(str(config.get("nivel", "INFO")).upper())
+
+
+def _log_pela_fila_no_filho() -> None:
+    iniciar_log_filho(_config_atual, _fila_filhos)
+
+
+atexit.register(encerrar_log)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_log_pela_fila_no_filho)
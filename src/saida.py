@@ -0,0 +1,95 @@
+import os
+import re
+import shutil
+import threading
+import logging as log
+from pathlib import Path
+
+# "<nome> (n).pdf": cópia n de um nome que já existia na pasta
+PADRAO_CONTADOR = re.compile(r"^(?P<base>.*) \((?P<n>\d+)\)(?P<ext>\.[^.]*)?$")
+
+
+class IndicePasta:
+    """Nomes já usados em uma pasta de saída e o próximo contador livre de cada nome."""
+
+    def __init__(self, pasta: Path) -> None:
+        self.pasta = pasta
+        self.lock = threading.Lock()
+        self.nomes: set[str] = set()
+        self.proximo: dict[str, int] = {}
+
+        # Uma listagem por pasta, feita na primeira vez que o processo move algo para ela
+        pasta.mkdir(parents=True, exist_ok=True)
+        with os.scandir(pasta) as entradas:
+            for entrada in entradas:
+                self._registrar(entrada.name)
+
+    def _registrar(self, nome: str) -> None:
+        self.nomes.add(os.path.normcase(nome))
+
+        copia = PADRAO_CONTADOR.match(nome)
+        if copia is not None:
+            chave = os.path.normcase(f"{copia['base']}{copia['ext'] or ''}")
+            self.proximo[chave] = max(
+                self.proximo.get(chave, 1), int(copia["n"]) + 1)
+
+    def reservar(self, base_nome: str, extensao: str) -> Path:
+        """Reserva um nome livre: o próprio, ou "(n)" a partir do maior contador já visto."""
+
+        with self.lock:
+            nome = f"{base_nome}{extensao}"
+            chave = os.path.normcase(nome)
+
+            if chave in self.nomes:
+                contador = self.proximo.get(chave, 1)
+                # Só repete se alguém criou "(n)" por fora depois da listagem
+                while os.path.normcase(nome := f"{base_nome} ({contador}){extensao}") in self.nomes:
+                    contador += 1
+                self.proximo[chave] = contador + 1
+
+            self.nomes.add(os.path.normcase(nome))
+            return self.pasta / nome
+
+    def liberar(self, caminho: Path) -> None:
+        with self.lock:
+            self.nomes.discard(os.path.normcase(caminho.name))
+
+
+class GerenciadorSaida:
+    """Move os pdfs para as pastas de saída sem listar a pasta a cada arquivo.
+
+    Cada pasta é listada uma única vez por processo; daí em diante o nome livre sai do índice
+    em memória, e a reserva (sob o lock da pasta) impede que dois workers escolham o mesmo
+    nome. O move em si roda fora do lock. Um único `exists` por move protege contra arquivos
+    colocados na pasta por fora depois da listagem.
+    """
+
+    def __init__(self) -> None:
+        self._pastas: dict[Path, IndicePasta] = {}
+        self._lock = threading.Lock()
+
+    def _indice(self, pasta: Path) -> IndicePasta:
+        chave = Path(os.path.normcase(os.path.abspath(pasta)))
+
+        with self._lock:
+            indice = self._pastas.get(chave)
+            if indice is None:
+                indice = self._pastas[chave] = IndicePasta(Path(pasta))
+                log.debug("Pasta de saída indexada: %s (%d arquivos).",
+                          pasta, len(indice.nomes))
+        return indice
+
+    def mover(self, origem: Path, base_nome: str, pasta: Path) -> Path:
+        indice = self._indice(Path(pasta))
+
+        destino = indice.reservar(base_nome, origem.suffix)
+        while destino.exists():
+            destino = indice.reservar(base_nome, origem.suffix)
+
+        try:
+            shutil.move(origem, destino)
+        except BaseException:
+            indice.liberar(destino)
+            raise
+
+        return destino
@@ -0,0 +1,409 @@
+"""Servidor local que imita os endpoints da API Superlógica usados pelo lançador de IPTU.
+
+Serve uma carteira sintética de tamanho configurável e injeta latência, erros 5xx, 429 e
+respostas "COM ERRO", para medir o throughput sem tocar na API real:
+
+    python src/simulador_api.py --contratos 2000 --imoveis 300 --latencia-ms 80 --taxa-429 0.02
+
+O config.json de teste é impresso na inicialização (ou gravado com --gerar-config).
+"""
+import json
+import time
+import random
+import argparse
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import parse_qs, urlsplit
+
+PREFIXO = "/api/"
+
+
+@dataclass
+class Portfolio:
+    """Contratos, imóveis vazios e as despesas IPTU (uma por mês do ano) de cada um."""
+
+    ano: int
+    contratos: list[dict] = field(default_factory=list)
+    imoveis: list[dict] = field(default_factory=list)
+    despesas: list[dict] = field(default_factory=list)
+
+
+def valor_iptu(semente: int) -> str:
+    """Valor determinístico da parcela, no formato da API ("1094.20")."""
+
+    centavos = 3000 + (semente * 7919) % 250000
+    return f"{centavos // 100}.{centavos % 100:02d}"
+
+
+def gerar_portfolio(qtd_contratos: int, qtd_imoveis: int, ano: int) -> Portfolio:
+    """Gera a carteira. Contratos pares usam o formulário de alteração e ímpares o de lançamento."""
+
+    portfolio = Portfolio(ano=ano)
+
+    for i in range(1, qtd_contratos + 1):
+        id_imovel = str(100000 + i)
+        portfolio.contratos.append({
+            "id_contrato_con": str(i),
+            "codigo_contrato": f"I{i:07d}/1",
+            "id_imovel_imo": id_imovel,
+        })
+        portfolio.imoveis.append({
+            "id_imovel_imo": id_imovel,
+            "st_identificador_imo": f"A{i:07d}",
+        })
+        for mes in range(1, 13):
+            portfolio.despesas.append(_despesa(
+                len(portfolio.despesas) + 1, mes, ano, valor_iptu(i),
+                id_contrato=str(i), id_imovel=id_imovel, debito="2", alterar=i % 2 == 0))
+
+    for j in range(1, qtd_imoveis + 1):
+        id_imovel = str(900000 + j)
+        portfolio.imoveis.append({
+            "id_imovel_imo": id_imovel,
+            "st_identificador_imo": f"V{j:07d}",
+        })
+        for mes in range(1, 13):
+            portfolio.despesas.append(_despesa(
+                len(portfolio.despesas) + 1, mes, ano, valor_iptu(900000 + j),
+                id_contrato="", id_imovel=id_imovel, debito="1", alterar=j % 2 == 0))
+
+    return portfolio
+
+
+def _despesa(id_despesa: int, mes: int, ano: int, valor: str, id_contrato: str, id_imovel: str, debito: str, alterar: bool) -> dict:
+    return {
+        "id_despesa_desp": str(id_despesa) if alterar else "",
+        "id_despesa_despm": str(id_despesa),
+        "id_contrato_con": id_contrato,
+        "id_imovel_imo": id_imovel,
+        "id_produto_prd": "6",
+        "st_descricao_prd": "IPTU",
+        "vl_valor_imod": valor,
+        "id_debito_imod": debito,
+        "dt_vencimento_imod": f"{mes:02d}/10/{ano}",
+    }
+
+
+def info_despesa(despesa: dict) -> dict:
+    """Resposta do endpoint de informações da despesa com todos os campos usados nos PUTs."""
+
+    composicao = {
+        "id_imovel_imo": despesa["id_imovel_imo"],
+        "id_despesa_desp": despesa["id_despesa_desp"],
+        "id_lancamento": despesa["id_despesa_despm"],
+        "id_formapagamento": "1",
+        "id_contrato_con": despesa["id_contrato_con"],
+        "dt_competencia": despesa["dt_vencimento_imod"],
+        "id_contabanco_cb": "1",
+        "id_credito": "1",
+        "id_terceiro_fav": "1",
+        "fl_parcelada": "0",
+        "id_produto_prd": "6",
+        "st_descricao_prd": "IPTU",
+        "st_complemento": "",
+        "vl_valor": despesa["vl_valor_imod"],
+        "id_debito": despesa["id_debito_imod"],
+        "fl_cobrartxadm": "0",
+        "fl_calcularproporcionalrescisao": "0",
+        "id_proprietariodebito": "",
+        "vl_valororiginal": despesa["vl_valor_imod"],
+        "id_recebimento_recb": "",
+        "id_repasse": "",
+        "tem_repasse_cc": "0",
+        "fl_alterouvalor": "0",
+        "dt_inicio": despesa["dt_vencimento_imod"],
+        "dt_fim": despesa["dt_vencimento_imod"],
+    }
+
+    return {
+        "vl_valor": despesa["vl_valor_imod"],
+        "vl_total": despesa["vl_valor_imod"],
+        "id_formapagamento": "1",
+        "dt_competencia": despesa["dt_vencimento_imod"],
+        "dt_referencia": despesa["dt_vencimento_imod"],
+        "id_terceiro_fav": "1",
+        "id_lancamento": despesa["id_despesa_despm"],
+        "id_produto_prd": "6",
+        "fl_status": "0",
+        "id_credito": "1",
+        "id_contrato_con": despesa["id_contrato_con"],
+        "id_imovel_imo": despesa["id_imovel_imo"],
+        "id_contabanco_mov": "1",
+        "id_contabanco_cb": "1",
+        "fl_conciliado": "0",
+        "st_codigobarras_mov": "",
+        "nm_parcelainicio_despm": "1",
+        "nm_parcelafim_despm": "12",
+        "fl_tipocompetencia": "1",
+        "composicoes": [composicao],
+    }
+
+
+@dataclass
+class Falhas:
+    latencia_ms: float = 0.0
+    jitter_ms: float = 0.0
+    taxa_erro: float = 0.0
+    taxa_429: float = 0.0
+    taxa_com_erro: float = 0.0
+    retry_after: float = 1.0
+
+
+class SimuladorSuperlogica:
+    """Estado do servidor: carteira, índices, falhas injetadas e contadores por endpoint."""
+
+    def __init__(self, portfolio: Portfolio, falhas: Falhas, semente: int = 0) -> None:
+        self.portfolio = portfolio
+        self.falhas = falhas
+
+        self.despesas_por_id = {d["id_despesa_despm"]: d for d in portfolio.despesas}
+
+        self.requisicoes: Counter[str] = Counter()
+        self.respostas: Counter[str] = Counter()
+        self.lancamentos: Counter[str] = Counter()
+
+        self._aleatorio = random.Random(semente)
+        self._lock = threading.Lock()
+
+    def sortear(self, taxa: float) -> bool:
+        with self._lock:
+            return self._aleatorio.random() < taxa
+
+    def contar(self, contador: Counter[str], chave: str) -> None:
+        with self._lock:
+            contador[chave] += 1
+
+    def estatisticas(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "requisicoes": dict(self.requisicoes),
+                "respostas": dict(self.respostas),
+                "lancamentos": sum(self.lancamentos.values()),
+                "lancamentos_duplicados": sum(n - 1 for n in self.lancamentos.values() if n > 1),
+            }
+
+    def listar_despesas(self, params: dict[str, str]) -> list[dict]:
+        inicio = _data(params.get("dtInicioMensal"))
+        fim = _data(params.get("dtFimMensal"))
+        id_contrato = params.get("idContrato")
+        id_imovel = params.get("ID_IMOVEL_SEM_CONTRATO")
+
+        despesas = []
+        for despesa in self.portfolio.despesas:
+            if id_contrato and despesa["id_contrato_con"] != id_contrato:
+                continue
+            if id_imovel and (despesa["id_contrato_con"] or despesa["id_imovel_imo"] != id_imovel):
+                continue
+            vencimento = _data(despesa["dt_vencimento_imod"])
+            if vencimento is None or (inicio and vencimento < inicio) or (fim and vencimento > fim):
+                continue
+            despesas.append(despesa)
+
+        return despesas
+
+
+def _data(valor: str | None) -> datetime | None:
+    """Datas da API vêm como m/d/aaaa, com ou sem zeros à esquerda."""
+
+    if not valor:
+        return None
+    mes, dia, ano = (int(parte) for parte in valor.split("/"))
+    # Aceita "11/30" mesmo em meses de 30/31 dias e "2/30", como o lançador envia
+    while True:
+        try:
+            return datetime(ano, mes, dia)
+        except ValueError:
+            dia -= 1
+
+
+def _paginar(itens: list[dict], params: dict[str, str]) -> list[dict]:
+    por_pagina = int(params.get("itensPorPagina", 50))
+    pagina = int(params.get("pagina", 1))
+    return itens[(pagina - 1) * por_pagina: pagina * por_pagina]
+
+
+def criar_handler(simulador: SimuladorSuperlogica) -> type[BaseHTTPRequestHandler]:
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format: str, *args: Any) -> None:
+            return
+
+        def _responder(self, status: int, corpo: Any, headers: dict[str, str] | None = None) -> None:
+            dados = corpo if isinstance(corpo, bytes) else json.dumps(
+                corpo, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(dados)))
+            for chave, valor in (headers or {}).items():
+                self.send_header(chave, valor)
+            self.end_headers()
+            self.wfile.write(dados)
+            simulador.contar(simulador.respostas, str(status))
+
+        def _falha_injetada(self) -> bool:
+            falhas = simulador.falhas
+            if falhas.latencia_ms or falhas.jitter_ms:
+                time.sleep(max(0.0, falhas.latencia_ms +
+                           random.uniform(-falhas.jitter_ms, falhas.jitter_ms)) / 1000)
+
+            if simulador.sortear(falhas.taxa_429):
+                self._responder(429, {"msg": "Too Many Requests"}, {
+                                "Retry-After": f"{falhas.retry_after:g}"})
+                return True
+            if simulador.sortear(falhas.taxa_erro):
+                self._responder(500, {"msg": "Erro interno simulado"})
+                return True
+            return False
+
+        def do_GET(self) -> None:
+            partes = urlsplit(self.path)
+            rota = partes.path.removeprefix(PREFIXO)
+            params = {k: v[-1] for k, v in parse_qs(partes.query).items()}
+
+            simulador.contar(simulador.requisicoes, f"GET {rota}")
+
+            if rota == "__stats":
+                self._responder(200, simulador.estatisticas())
+                return
+
+            if self._falha_injetada():
+                return
+
+            if rota == "contratos":
+                self._responder(200, {"status": "200", "data": _paginar(
+                    simulador.portfolio.contratos, params)})
+            elif rota == "imoveis":
+                self._responder(200, {"status": "200", "data": _paginar(
+                    simulador.portfolio.imoveis, params)})
+            elif rota == "despesas":
+                self._responder(200, {"status": "200", "data": _paginar(
+                    simulador.listar_despesas(params), params)})
+            elif rota == "despesas/info":
+                despesa = simulador.despesas_por_id.get(
+                    params.get("ID_DESPESA_DESPM", ""))
+                if despesa is None:
+                    self._responder(404, {"msg": "Despesa não encontrada"})
+                else:
+                    self._responder(
+                        200, {"status": "200", "data": info_despesa(despesa)})
+            else:
+                self._responder(404, {"msg": "Rota desconhecida"})
+
+        def do_PUT(self) -> None:
+            rota = urlsplit(self.path).path.removeprefix(PREFIXO)
+            tamanho = int(self.headers.get("Content-Length", 0))
+            form = {k: v[-1] for k, v in parse_qs(
+                self.rfile.read(tamanho).decode("utf-8"), keep_blank_values=True).items()}
+
+            simulador.contar(simulador.requisicoes, f"PUT {rota}")
+
+            if self._falha_injetada():
+                return
+
+            if rota not in ("despesas/alterar", "despesas/lancar"):
+                self._responder(404, {"msg": "Rota desconhecida"})
+                return
+
+            if simulador.sortear(simulador.falhas.taxa_com_erro):
+                self._responder(200, b"COM ERRO: falha simulada no processamento")
+                return
+
+            if rota == "despesas/lancar":
+                simulador.contar(simulador.lancamentos,
+                                 form.get("ID_DESPESA", ""))
+
+            self._responder(200, b"OK")
+
+    return Handler
+
+
+def config_teste(url_base: str, pastas: dict[str, str] | None = None) -> dict[str, Any]:
+    """config.json apontando para o simulador."""
+
+    return {
+        "[PATHS]": pastas or {
+            "iptu_a_lancar_ativos": "teste/ativos",
+            "iptu_a_lancar_vazios": "teste/vazios",
+            "iptu_ativo_ok": "teste/ok_ativos",
+            "iptu_vazio_ok": "teste/ok_vazios",
+            "iptu_erro": "teste/erro",
+        },
+        "[API]": {
+            "url_get": f"{url_base}{PREFIXO}",
+            "url_post_info_despesa": f"{url_base}{PREFIXO}despesas/info",
+            "url_put_alterar_despesa": f"{url_base}{PREFIXO}despesas/alterar",
+            "url_put_lancar_despesa": f"{url_base}{PREFIXO}despesas/lancar",
+            "headers": {
+                "Content-Type": "application/json",
+                "app_token": "simulador",
+                "access_token": "simulador",
+            },
+        },
+    }
+
+
+def iniciar_servidor(simulador: SimuladorSuperlogica, host: str = "127.0.0.1", porta: int = 0) -> ThreadingHTTPServer:
+    """Sobe o servidor em uma thread daemon e o retorna (porta 0 escolhe uma livre)."""
+
+    servidor = ThreadingHTTPServer((host, porta), criar_handler(simulador))
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--contratos", type=int, default=1000)
+    parser.add_argument("--imoveis", type=int, default=100,
+                        help="Imóveis vazios (sem contrato).")
+    parser.add_argument("--ano", type=int, default=datetime.now().year)
+    parser.add_argument("--latencia-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--taxa-erro", type=float, default=0.0,
+                        help="Fração de respostas 500.")
+    parser.add_argument("--taxa-429", type=float, default=0.0,
+                        help="Fração de respostas 429.")
+    parser.add_argument("--taxa-com-erro", type=float, default=0.0,
+                        help="Fração de PUTs respondidos com 'COM ERRO'.")
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--gerar-config", metavar="CAMINHO",
+                        help="Grava um config.json apontando para o simulador.")
+    args = parser.parse_args()
+
+    simulador = SimuladorSuperlogica(
+        gerar_portfolio(args.contratos, args.imoveis, args.ano),
+        Falhas(args.latencia_ms, args.jitter_ms, args.taxa_erro,
+               args.taxa_429, args.taxa_com_erro, args.retry_after),
+    )
+    servidor = ThreadingHTTPServer(
+        (args.host, args.porta), criar_handler(simulador))
+    servidor.daemon_threads = True
+
+    config = config_teste(f"http://{args.host}:{servidor.server_port}")
+    if args.gerar_config:
+        with open(args.gerar_config, "w", encoding="utf-8") as file:
+            json.dump(config, file, indent=4, ensure_ascii=False)
+
+    print(json.dumps(config["[API]"], indent=4, ensure_ascii=False))
+    print(f"Simulador em http://{args.host}:{servidor.server_port} "
+          f"({args.contratos} contratos, {args.imoveis} imóveis vazios). Ctrl+C para parar.")
+
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        print(json.dumps(simulador.estatisticas(), indent=4, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import os
+import time
+import logging as log
+from pathlib import Path
+from dataclasses import dataclass
+from typing import Any, Generator, Iterator, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class FiltroEntrada:
+    """Quais pdfs das pastas de entrada entram no lote (seção [ENTRADA] do config.json)."""
+
+    # Arquivo menor que isso (ex.: 0 byte recém-criado) ainda está sendo copiado
+    tamanho_minimo_bytes: int = 1
+    # Arquivo modificado há menos que isso também; fica para o próximo lote (0 = desligado)
+    segundos_estabilidade: float = 0
+    # Máximo de pdfs por lote (0 = sem limite); o restante fica na entrada
+    tamanho_lote: int = 0
+
+
+def criar_filtro_entrada(config: dict[str, Any]) -> FiltroEntrada:
+    config_entrada = config.get("[ENTRADA]", {})
+
+    return FiltroEntrada(
+        tamanho_minimo_bytes=int(config_entrada.get("tamanho_minimo_bytes", 1)),
+        segundos_estabilidade=float(config_entrada.get("segundos_estabilidade", 0)),
+        tamanho_lote=int(config_entrada.get("tamanho_lote", 0)),
+    )
+
+
+class VarreduraEntrada:
+    """Lista os pdfs das pastas de entrada aos poucos, com os.scandir, sem montar a lista antes.
+
+    Cada pdf é entregue assim que aparece na listagem, então a extração começa com o primeiro
+    arquivo encontrado e a memória não cresce com o acúmulo na pasta. A extensão é comparada
+    sem diferenciar maiúsculas (".PDF"). Tamanho e data de modificação vêm da própria entrada
+    do scandir (sem um stat extra no Windows).
+    """
+
+    def __init__(self, filtro: FiltroEntrada) -> None:
+        self.filtro = filtro
+        self.entregues = 0
+        self.em_copia = 0
+        self.lote_completo = False
+
+    def _aceitar(self, entrada: os.DirEntry, agora: float) -> bool:
+        try:
+            if not entrada.is_file():
+                return False
+            info = entrada.stat()
+        except FileNotFoundError:
+            # Movido ou apagado entre a listagem e o stat
+            return False
+
+        if info.st_size < self.filtro.tamanho_minimo_bytes or agora - info.st_mtime < self.filtro.segundos_estabilidade:
+            self.em_copia += 1
+            return False
+        return True
+
+    def pdfs(self, diretorio: str | Path) -> Generator[Path, None, None]:
+        """Gera os pdfs prontos da pasta; pasta inexistente levanta FileNotFoundError na primeira leitura."""
+
+        agora = time.time()
+
+        if not os.path.isdir(diretorio):
+            log.error(f"Pasta de entrada não encontrada: {diretorio}")
+            raise FileNotFoundError(f"Pasta de entrada não encontrada: {diretorio}")
+
+        with os.scandir(diretorio) as entradas:
+            for entrada in entradas:
+                if entrada.name.lower().endswith(".pdf") and self._aceitar(entrada, agora):
+                    yield Path(entrada.path)
+
+    def lote(self, pastas: dict[str, T]) -> Iterator[tuple[Path, T]]:
+        """Alterna entre as pastas (uma não espera a outra terminar) até `tamanho_lote` pdfs.
+
+        Com o lote cheio a listagem para ali mesmo; o restante da pasta fica para o próximo lote.
+        """
+
+        geradores = {pasta: self.pdfs(pasta) for pasta in pastas}
+        limite = self.filtro.tamanho_lote
+
+        # Lote cheio ou consumidor que desistiu (close): as listagens abertas são fechadas na hora
+        try:
+            while geradores and not self.lote_completo:
+                for pasta, gerador in list(geradores.items()):
+                    if limite and self.entregues >= limite:
+                        self.lote_completo = True
+                        break
+
+                    pdf = next(gerador, None)
+                    if pdf is None:
+                        del geradores[pasta]
+                        continue
+
+                    self.entregues += 1
+                    yield pdf, pastas[pasta]
+        finally:
+            for gerador in geradores.values():
+                gerador.close()
+        self.logar()
+
+    def logar(self) -> None:
+        log.info(f"Varredura da entrada: {self.entregues} pdfs no lote.")
+        if self.em_copia:
+            log.info(
+                f"{self.em_copia} pdfs ainda em cópia (pequenos ou alterados há menos de "
+                f"{self.filtro.segundos_estabilidade:g} s) ficam para o próximo lote.")
+        if self.lote_completo:
+            log.info(
+                f"Lote completo ({self.filtro.tamanho_lote} pdfs); os demais ficam para o próximo.")
@@ -0,0 +1,144 @@
+import os
+import sys
+import time
+import select
+import struct
+import ctypes
+import ctypes.util
+import logging as log
+from pathlib import Path
+from typing import Protocol
+
+# Máscaras do inotify (linux/inotify.h): arquivo fechado após escrita ou movido para a pasta
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+
+_EVENTO = struct.Struct("iIII")
+
+
+class Vigia(Protocol):
+    def aguardar(self, timeout: float) -> bool: ...
+
+    def fechar(self) -> None: ...
+
+
+def _eh_pdf(nome: str) -> bool:
+    return nome.lower().endswith(".pdf")
+
+
+class VigiaInotify:
+    """Espera pdfs novos nas pastas via inotify (Linux), sem depender de pacotes externos.
+
+    Só conta pdfs fechados após a escrita ou movidos para a pasta, então um arquivo ainda sendo
+    copiado não dispara o processamento.
+    """
+
+    def __init__(self, pastas: list[Path]) -> None:
+        libc = ctypes.CDLL(ctypes.util.find_library("c")
+                           or "libc.so.6", use_errno=True)
+
+        self._fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            erro = ctypes.get_errno()
+            raise OSError(erro, os.strerror(erro))
+
+        for pasta in pastas:
+            if libc.inotify_add_watch(self._fd, os.fsencode(pasta), IN_CLOSE_WRITE | IN_MOVED_TO) < 0:
+                erro = ctypes.get_errno()
+                os.close(self._fd)
+                raise OSError(erro, os.strerror(erro), str(pasta))
+
+    def aguardar(self, timeout: float) -> bool:
+        """True se chegou algum pdf em até `timeout` segundos."""
+
+        prontos, _, _ = select.select([self._fd], [], [], timeout)
+        if not prontos:
+            return False
+
+        chegou_pdf = False
+        while True:
+            try:
+                dados = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+
+            posicao = 0
+            while posicao < len(dados):
+                _, _, _, tamanho = _EVENTO.unpack_from(dados, posicao)
+                inicio_nome = posicao + _EVENTO.size
+                nome = dados[inicio_nome:inicio_nome + tamanho].rstrip(b"\0")
+                chegou_pdf = chegou_pdf or _eh_pdf(os.fsdecode(nome))
+                posicao = inicio_nome + tamanho
+
+        return chegou_pdf
+
+    def fechar(self) -> None:
+        os.close(self._fd)
+
+
+class VigiaPolling:
+    """Alternativa portátil ao inotify: compara a listagem das pastas a cada `intervalo` segundos.
+
+    Um pdf só conta depois de duas leituras seguidas com o mesmo tamanho e data de modificação,
+    para não pegar arquivo no meio da cópia.
+    """
+
+    def __init__(self, pastas: list[Path], intervalo: float = 2.0) -> None:
+        self.pastas = pastas
+        self.intervalo = intervalo
+
+        self._estaveis = self._retratar()
+        self._anterior = self._estaveis
+
+    def _retratar(self) -> dict[str, tuple[int, int]]:
+        retrato = {}
+        for pasta in self.pastas:
+            try:
+                with os.scandir(pasta) as entradas:
+                    for entrada in entradas:
+                        if _eh_pdf(entrada.name) and entrada.is_file():
+                            estado = entrada.stat()
+                            retrato[entrada.path] = (
+                                estado.st_size, estado.st_mtime_ns)
+            except FileNotFoundError:
+                continue
+        return retrato
+
+    def aguardar(self, timeout: float) -> bool:
+        limite = time.monotonic() + timeout
+
+        while True:
+            time.sleep(max(min(self.intervalo, limite - time.monotonic()), 0))
+
+            atual = self._retratar()
+            estaveis = {caminho: estado for caminho, estado in atual.items()
+                        if self._anterior.get(caminho) == estado}
+            self._anterior = atual
+
+            novos = any(self._estaveis.get(caminho) != estado
+                        for caminho, estado in estaveis.items())
+            self._estaveis = estaveis
+            if novos:
+                return True
+
+            if time.monotonic() >= limite:
+                return False
+
+    def fechar(self) -> None:
+        pass
+
+
+def criar_vigia(pastas: list[Path], intervalo_polling: float = 2.0, forcar_polling: bool = False) -> Vigia:
+    """inotify no Linux; polling nos demais sistemas ou se o inotify não puder ser usado."""
+
+    if sys.platform.startswith("linux") and not forcar_polling:
+        try:
+            vigia = VigiaInotify(pastas)
+            log.info("Vigiando as pastas de entrada via inotify.")
+            return vigia
+        except (OSError, AttributeError) as e:
+            log.warning(f"inotify indisponível ({e}). Usando polling.")
+
+    log.info(
+        f"Vigiando as pastas de entrada por polling a cada {intervalo_polling} s.")
+    return VigiaPolling(pastas, intervalo_polling)
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Os módulos rodam de dentro de src/ (imports sem pacote), como o main.py
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
@@ -0,0 +1,101 @@
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from banco_local import BancoLocal
+from cache_bases import pagina_de_retomada
+from main import carregar_base
+
+POR_PAGINA = 10
+
+
+def contratos(ids: list[int]) -> list[dict]:
+    return [{"id_contrato_con": str(i), "codigo_contrato": f"I{i:07d}/1", "id_imovel_imo": str(100000 + i)}
+            for i in ids]
+
+
+class TestPaginaDeRetomada(unittest.TestCase):
+
+    def test_ultima_pagina_presente(self) -> None:
+        self.assertEqual(pagina_de_retomada(0, POR_PAGINA), 1)
+        self.assertEqual(pagina_de_retomada(9, POR_PAGINA), 1)
+        self.assertEqual(pagina_de_retomada(10, POR_PAGINA), 1)
+        self.assertEqual(pagina_de_retomada(11, POR_PAGINA), 2)
+        self.assertEqual(pagina_de_retomada(25, POR_PAGINA), 3)
+
+
+class TestSincronizacaoIncremental(unittest.TestCase):
+    """carregar_base com o banco local e a API (get_base_api) trocada por uma listagem em memória."""
+
+    def setUp(self) -> None:
+        self._temporario = tempfile.TemporaryDirectory()
+        self.banco = BancoLocal(Path(self._temporario.name) / "banco.db")
+        # Base de 25 contratos sincronizada há dois dias (TTL vencido, carga completa recente)
+        self.banco.substituir_base("contratos", contratos(list(range(1, 26))), time.time() - 48 * 3600)
+        self.api = contratos(list(range(1, 26)))
+
+        patches = [
+            mock.patch("main.ITENS_POR_PAGINA_BASE", POR_PAGINA),
+            mock.patch("main.get_base_api", side_effect=self.get_base_api),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.paginas: list[int] = []
+
+    def tearDown(self) -> None:
+        self.banco.fechar()
+        self._temporario.cleanup()
+
+    def get_base_api(self, cliente: object, endpoint: str, url_get: str, headers: dict, pagina_inicial: int = 1) -> list[dict]:
+        self.paginas.append(pagina_inicial)
+        return self.api[(pagina_inicial - 1) * POR_PAGINA:]
+
+    def carregar(self) -> int:
+        return carregar_base(mock.Mock(), "contratos", "https://api/", {}, 24, self.banco)
+
+    def ids(self) -> list[str | None]:
+        return [self.banco.id_na_posicao("contratos", i) for i in range(self.banco.contar("contratos"))]
+
+    def test_dentro_do_ttl_nao_consulta(self) -> None:
+        self.banco.substituir_a_partir("contratos", 20, contratos(list(range(21, 26))))
+
+        self.assertEqual(self.carregar(), 25)
+        self.assertEqual(self.paginas, [])
+
+    def test_inclusao_no_fim(self) -> None:
+        self.api = contratos(list(range(1, 29)))
+
+        self.assertEqual(self.carregar(), 28)
+        # Só a última página salva e as seguintes são relidas
+        self.assertEqual(self.paginas, [3])
+        self.assertEqual(self.ids(), [str(i) for i in range(1, 29)])
+
+    def test_exclusao_no_meio(self) -> None:
+        self.api = contratos([i for i in range(1, 29) if i != 5])
+
+        self.assertEqual(self.carregar(), 27)
+        # Na posição 20 o banco tem o 21 e a API agora tem o 22: divergência, carga completa
+        self.assertEqual(self.paginas, [3, 1])
+        self.assertEqual(self.ids(), [str(i) for i in range(1, 29) if i != 5])
+
+    def test_falha_na_incremental_vira_carga_completa(self) -> None:
+        respostas = [Exception("Nenhum contrato encontrado."), self.api]
+
+        def get_base_api(*args: object) -> list[dict]:
+            resposta = respostas.pop(0)
+            if isinstance(resposta, Exception):
+                raise resposta
+            return resposta
+
+        with mock.patch("main.get_base_api", side_effect=get_base_api), \
+                self.assertLogs(level="WARNING") as logs:
+            self.assertEqual(self.carregar(), 25)
+
+        self.assertIn("Nenhum contrato encontrado.", logs.output[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from cache_extracao import CacheExtracao, criar_cache_extracao
+
+DADOS = ("10/10/2026", "81670000001294200097000312345678901423456789012", "94.20")
+
+
+class TestCacheExtracao(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self._temporario = tempfile.TemporaryDirectory()
+        self.caminho = Path(self._temporario.name) / "data" / "cache_extracao.json"
+
+    def tearDown(self) -> None:
+        self._temporario.cleanup()
+
+    def preencher(self, cache: CacheExtracao, quantidade: int) -> None:
+        # Uso crescente: o hash 0 é o usado há mais tempo
+        for i in range(quantidade):
+            cache.gravar(f"{i:064d}", 12, 9, DADOS)
+            cache._entradas[f"{i:064d}"]["usado_em"] = time.time() - quantidade + i
+
+    def test_persiste_entre_execucoes(self) -> None:
+        cache = CacheExtracao(self.caminho)
+        cache.gravar("abc", 12, 9, DADOS)
+        cache.salvar()
+
+        relido = CacheExtracao(self.caminho)
+        self.assertEqual(relido.qtd_paginas("abc"), 12)
+        self.assertEqual(relido.buscar("abc", 9), DADOS)
+        self.assertIsNone(relido.buscar("abc", 10))
+        self.assertIsNone(relido.buscar("outro", 9))
+
+    def test_descarta_menos_usadas_acima_de_max_arquivos(self) -> None:
+        cache = CacheExtracao(self.caminho, max_arquivos=3)
+        self.preencher(cache, 5)
+        cache.salvar()
+
+        relido = CacheExtracao(self.caminho)
+        self.assertEqual(sorted(relido._entradas), [f"{i:064d}" for i in (2, 3, 4)])
+
+    def test_descarta_entradas_velhas(self) -> None:
+        cache = CacheExtracao(self.caminho, max_idade_dias=1)
+        self.preencher(cache, 2)
+        cache._entradas[f"{0:064d}"]["usado_em"] = time.time() - 2 * 86400
+        cache.salvar()
+
+        self.assertEqual(list(CacheExtracao(self.caminho)._entradas), [f"{1:064d}"])
+
+    def test_respeita_max_mb(self) -> None:
+        max_mb = 0.01
+        cache = CacheExtracao(self.caminho, max_mb=max_mb)
+        self.preencher(cache, 200)
+        cache.salvar()
+
+        tamanho = self.caminho.stat().st_size
+        self.assertLessEqual(tamanho, max_mb * 1024 * 1024)
+        relido = CacheExtracao(self.caminho)
+        mantidas = sorted(relido._entradas)
+        # Ficam as mais recentes, e o arquivo não fica muito abaixo do limite
+        self.assertIn(f"{199:064d}", mantidas)
+        self.assertNotIn(f"{0:064d}", mantidas)
+        self.assertGreater(tamanho, max_mb * 1024 * 1024 - 200)
+
+    def test_max_mb_zero_desliga(self) -> None:
+        cache = CacheExtracao(self.caminho, max_mb=0)
+        self.preencher(cache, 50)
+        cache.salvar()
+
+        self.assertEqual(len(CacheExtracao(self.caminho)._entradas), 50)
+
+    def test_limpar(self) -> None:
+        cache = CacheExtracao(self.caminho)
+        cache.gravar("abc", 12, 9, DADOS)
+        cache.salvar()
+
+        cache.limpar()
+
+        self.assertFalse(self.caminho.exists())
+        self.assertIsNone(cache.buscar("abc", 9))
+        self.assertEqual(cache.resumo()["arquivos"], 0)
+        # Nada a gravar depois de limpar
+        cache.salvar()
+        self.assertFalse(self.caminho.exists())
+
+    def test_config(self) -> None:
+        cache = criar_cache_extracao({"[CACHE]": {"max_mb_extracao": 2, "max_arquivos_extracao": 10}}, self.caminho)
+
+        self.assertEqual((cache.max_mb, cache.max_arquivos), (2, 10))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,174 @@
+import time
+import unittest
+from email.utils import formatdate
+from unittest import mock
+
+import requests
+
+from cliente_api import ClienteSuperlogica, LimitadorConcorrencia, PoliticaRetentativa
+
+URL_LANCAR = "https://api.superlogica.net/v2/condor/despesas/lancar"
+
+
+def resposta(status: int, retry_after: str | None = None) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status
+    if retry_after is not None:
+        response.headers["Retry-After"] = retry_after
+    return response
+
+
+class TestRetentativas(unittest.TestCase):
+    """Quando `_requisitar` repete uma requisição, com `sessao.request` substituído."""
+
+    def setUp(self) -> None:
+        self.cliente = ClienteSuperlogica(politica=PoliticaRetentativa(tentativas=3, espera_base=0))
+        self.addCleanup(self.cliente.fechar)
+        # As esperas entre tentativas não importam aqui
+        patcher = mock.patch("cliente_api.time.sleep")
+        self.sleep = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def respostas(self, *sequencia: requests.Response | Exception) -> mock.Mock:
+        request = mock.Mock(side_effect=list(sequencia))
+        self.cliente.sessao.request = request  # type: ignore[method-assign]
+        return request
+
+    def test_put_lancar_com_read_timeout_vai_uma_vez(self) -> None:
+        request = self.respostas(requests.exceptions.ReadTimeout(), resposta(200))
+
+        with self.assertRaises(requests.exceptions.ReadTimeout):
+            self.cliente.put(URL_LANCAR, {})
+
+        self.assertEqual(request.call_count, 1)
+
+    def test_put_lancar_com_5xx_volta_sem_repetir(self) -> None:
+        request = self.respostas(resposta(503), resposta(200))
+
+        self.assertEqual(self.cliente.put(URL_LANCAR, {}).status_code, 503)
+        self.assertEqual(request.call_count, 1)
+
+    def test_put_lancar_com_erro_de_conexao_sem_timeout_vai_uma_vez(self) -> None:
+        # Conexão caída no meio pode ter entregado o corpo: só ConnectTimeout é seguro
+        request = self.respostas(requests.exceptions.ConnectionError(), resposta(200))
+
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            self.cliente.put(URL_LANCAR, {})
+        self.assertEqual(request.call_count, 1)
+
+    def test_put_lancar_repete_em_429(self) -> None:
+        request = self.respostas(resposta(429), resposta(200))
+
+        self.assertEqual(self.cliente.put(URL_LANCAR, {}).status_code, 200)
+        self.assertEqual(request.call_count, 2)
+
+    def test_put_lancar_repete_em_connect_timeout(self) -> None:
+        request = self.respostas(requests.exceptions.ConnectTimeout(), resposta(200))
+
+        self.assertEqual(self.cliente.put(URL_LANCAR, {}).status_code, 200)
+        self.assertEqual(request.call_count, 2)
+
+    def test_put_idempotente_repete_em_read_timeout_e_5xx(self) -> None:
+        request = self.respostas(requests.exceptions.ReadTimeout(), resposta(502), resposta(200))
+
+        self.assertEqual(self.cliente.put(URL_LANCAR, {}, idempotente=True).status_code, 200)
+        self.assertEqual(request.call_count, 3)
+
+    def test_get_desiste_depois_das_tentativas(self) -> None:
+        request = self.respostas(*[resposta(500)] * 5)
+
+        self.assertEqual(self.cliente.get("https://api/despesas", {}).status_code, 500)
+        # A primeira mais `tentativas` repetições
+        self.assertEqual(request.call_count, 4)
+
+    def test_status_nao_retentavel_volta_direto(self) -> None:
+        request = self.respostas(resposta(404))
+
+        self.assertEqual(self.cliente.get("https://api/despesas", {}).status_code, 404)
+        self.assertEqual(request.call_count, 1)
+        self.sleep.assert_not_called()
+
+    def test_espera_do_retry_after(self) -> None:
+        self.respostas(resposta(429, retry_after="7"), resposta(200))
+
+        self.cliente.put(URL_LANCAR, {})
+
+        self.sleep.assert_called_once_with(7.0)
+
+
+class TestPoliticaRetentativa(unittest.TestCase):
+
+    def test_retry_after_em_segundos(self) -> None:
+        self.assertEqual(PoliticaRetentativa().espera(0, resposta(429, "12")), 12.0)
+
+    def test_retry_after_como_data_http(self) -> None:
+        espera = PoliticaRetentativa().espera(0, resposta(429, formatdate(time.time() + 20, usegmt=True)))
+
+        self.assertTrue(18 <= espera <= 20, espera)
+
+    def test_retry_after_limitado_a_espera_maxima(self) -> None:
+        politica = PoliticaRetentativa(espera_maxima=30)
+
+        self.assertEqual(politica.espera(0, resposta(429, "600")), 30)
+        self.assertEqual(politica.espera(0, resposta(429, formatdate(time.time() + 3600, usegmt=True))), 30)
+
+    def test_retry_after_no_passado_ou_invalido(self) -> None:
+        politica = PoliticaRetentativa(espera_base=1, espera_maxima=30)
+
+        self.assertEqual(politica.espera(0, resposta(429, formatdate(time.time() - 60, usegmt=True))), 0.0)
+        # Valor ilegível cai no backoff exponencial: no máximo espera_base * 2 ** tentativa
+        self.assertLessEqual(politica.espera(2, resposta(429, "amanhã")), 4)
+
+    def test_backoff_limitado_a_espera_maxima(self) -> None:
+        politica = PoliticaRetentativa(espera_base=1, espera_maxima=5)
+
+        self.assertTrue(all(politica.espera(10, None) <= 5 for _ in range(50)))
+
+
+class TestLimitadorConcorrencia(unittest.TestCase):
+
+    def usar(self, limitador: LimitadorConcorrencia, estrangulado: bool) -> None:
+        limitador.adquirir()
+        limitador.liberar(estrangulado)
+
+    def test_429_corta_pela_metade(self) -> None:
+        limitador = LimitadorConcorrencia(8)
+
+        self.usar(limitador, True)
+        self.assertEqual(limitador.limite, 4)
+        self.usar(limitador, True)
+        self.assertEqual(limitador.limite, 2)
+
+    def test_nunca_abaixo_de_um(self) -> None:
+        limitador = LimitadorConcorrencia(2)
+
+        for _ in range(5):
+            self.usar(limitador, True)
+
+        self.assertEqual(limitador.limite, 1)
+
+    def test_recupera_um_a_cada_limite_sucessos(self) -> None:
+        limitador = LimitadorConcorrencia(8)
+        self.usar(limitador, True)
+        self.assertEqual(limitador.limite, 4)
+
+        # +1/limite por sucesso: 4 sucessos levam o limite de 4 para perto de 5
+        for _ in range(4):
+            self.usar(limitador, False)
+
+        self.assertEqual(int(limitador.limite), 4)
+        self.assertAlmostEqual(limitador.limite, 4.9, places=1)
+        self.usar(limitador, False)
+        self.assertEqual(int(limitador.limite), 5)
+
+    def test_recuperacao_para_no_maximo(self) -> None:
+        limitador = LimitadorConcorrencia(3)
+
+        for _ in range(20):
+            self.usar(limitador, False)
+
+        self.assertEqual(limitador.limite, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import argparse
+import unittest
+from datetime import date
+from unittest import mock
+
+from main import aplicar_opcoes_execucao, argumento_competencia, calcular_competencia, competencias_restantes
+
+
+class TestCompetencia(unittest.TestCase):
+
+    def hoje(self, dia: date) -> mock._patch:
+        return mock.patch("main.date", mock.Mock(today=mock.Mock(return_value=dia)))
+
+    def test_atual_vira_no_dia_15(self) -> None:
+        with self.hoje(date(2026, 10, 14)):
+            self.assertEqual(calcular_competencia({})["mes"], 10)
+        with self.hoje(date(2026, 10, 15)):
+            self.assertEqual(calcular_competencia({})["mes"], 11)
+        with self.hoje(date(2026, 12, 20)):
+            competencia = calcular_competencia({"[EXECUCAO]": {"competencia": ""}})
+        self.assertEqual((competencia["mes"], competencia["ano"]), (1, 2027))
+
+    def test_competencia_fixa(self) -> None:
+        with self.hoje(date(2026, 10, 20)):
+            competencia = calcular_competencia({"[EXECUCAO]": {"competencia": "2026-03"}})
+
+        self.assertEqual(competencia, {"mes": 3, "ano": 2026,
+                                       "data_inicial": "3/1/2026", "data_final": "3/30/2026"})
+        self.assertEqual([c["mes"] for c in competencias_restantes(competencia)], list(range(3, 13)))
+
+    def test_competencia_invalida(self) -> None:
+        with self.assertRaises(ValueError):
+            calcular_competencia({"[EXECUCAO]": {"competencia": "03/2026"}})
+        with self.assertRaises(argparse.ArgumentTypeError):
+            argumento_competencia("2026-13")
+        self.assertEqual(argumento_competencia("2026-3"), "2026-03")
+
+    def test_linha_de_comando_sobrepoe_config(self) -> None:
+        config = {"[EXECUCAO]": {"competencia": "2026-03"}}
+        aplicar_opcoes_execucao(config, True, "2026-07")
+
+        self.assertEqual(calcular_competencia(config)["mes"], 7)
+        self.assertNotIn("historico_duplicados", config["[EXECUCAO]"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+
+from correspondencia import FORM_ALTERAR, FORM_LANCAR, REGRA_ATIVOS, REGRA_VAZIOS, IndiceCorrespondencia, normalizar_valor
+
+
+def despesa(valor: str, debito: str, desp: str = "", despm: str = "", produto: str = "IPTU", contrato: str = "") -> dict:
+    return {"vl_valor_imod": valor, "id_debito_imod": debito, "id_despesa_desp": desp,
+            "id_despesa_despm": despm, "st_descricao_prd": produto, "id_contrato_con": contrato}
+
+
+class TestNormalizarValor(unittest.TestCase):
+
+    def test_formatos_do_mesmo_valor(self) -> None:
+        self.assertEqual(normalizar_valor("94.2"), normalizar_valor("94.20"))
+        self.assertEqual(normalizar_valor(94.2), normalizar_valor(" 94.20 "))
+
+    def test_valor_nao_numerico(self) -> None:
+        self.assertIsNone(normalizar_valor("R$ 94,20"))
+
+
+class TestIndiceCorrespondencia(unittest.TestCase):
+
+    def test_alterar_com_id_da_despesa(self) -> None:
+        indice = IndiceCorrespondencia([despesa("94.20", "2", desp="10", despm="20")])
+
+        correspondencia = indice.corresponder("94.2", REGRA_ATIVOS)
+
+        self.assertEqual(correspondencia.tipo_form, FORM_ALTERAR)
+        self.assertEqual(correspondencia.despesa["id_despesa_desp"], "10")
+
+    def test_lancar_so_com_despm(self) -> None:
+        indice = IndiceCorrespondencia([despesa("94.20", "2", despm="20")])
+
+        self.assertEqual(indice.corresponder("94.20", REGRA_ATIVOS).tipo_form, FORM_LANCAR)
+
+    def test_vazio_exige_despm_para_alterar(self) -> None:
+        indice = IndiceCorrespondencia([despesa("50.00", "1", desp="10")])
+
+        correspondencia = indice.corresponder("50.00", REGRA_VAZIOS)
+
+        self.assertIsNone(correspondencia.tipo_form)
+        self.assertEqual(correspondencia.mensagem, ["Vazio Sem id lançamento"])
+
+    def test_prefere_o_debito_certo_a_primeira_despesa(self) -> None:
+        # Antes do índice, a primeira despesa com o valor decidia: aqui seria "débito errado"
+        indice = IndiceCorrespondencia([
+            despesa("94.20", "1", desp="10", despm="11"),
+            despesa("94.20", "2", desp="20", despm="21"),
+        ])
+
+        correspondencia = indice.corresponder("94.20", REGRA_ATIVOS)
+
+        self.assertEqual(correspondencia.tipo_form, FORM_ALTERAR)
+        self.assertEqual(correspondencia.despesa["id_despesa_desp"], "20")
+
+    def test_so_debito_do_lado_errado(self) -> None:
+        indice = IndiceCorrespondencia([despesa("94.20", "1", desp="10", despm="11")])
+
+        correspondencia = indice.corresponder("94.20", REGRA_ATIVOS)
+
+        self.assertIsNone(correspondencia.despesa)
+        self.assertEqual(correspondencia.mensagem, [REGRA_ATIVOS.mensagem_debito])
+
+    def test_mensagem_por_despesa_sem_correspondencia(self) -> None:
+        indice = IndiceCorrespondencia([
+            despesa("80.00", "2", desp="10"),
+            despesa("94.20", "2", produto="TAXA LIXO"),
+        ])
+
+        correspondencia = indice.corresponder("94.20", REGRA_ATIVOS)
+
+        self.assertEqual(correspondencia.mensagem, ["Valor lançamento incorreto", "Sem lançamento"])
+
+    def test_indice_da_competencia_separa_os_donos(self) -> None:
+        indice = IndiceCorrespondencia([
+            despesa("94.20", "2", desp="10", despm="11", contrato="A"),
+            despesa("94.20", "2", desp="20", despm="21", contrato="B"),
+        ], chave_dono=lambda d: d["id_contrato_con"])
+
+        self.assertTrue(indice.possui("B"))
+        self.assertFalse(indice.possui("C"))
+        self.assertEqual(indice.corresponder("94.20", REGRA_ATIVOS, "B").despesa["id_despesa_desp"], "20")
+        self.assertEqual(indice.corresponder("94.20", REGRA_ATIVOS, "C").mensagem, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,158 @@
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+from diario import DiarioExecucao, LancamentoNaoConfirmado
+from correspondencia import FORM_ALTERAR, FORM_LANCAR
+from metricas import Metricas
+from main import enviar_put
+
+
+class TestDiarioExecucao(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self._temporario = tempfile.TemporaryDirectory()
+        self.pasta = Path(self._temporario.name)
+        self.caminho = self.pasta / "diario.jsonl"
+
+        self.pdf = self.pasta / "I0000001.pdf"
+        self.pdf.write_bytes(b"%PDF carne 1")
+        self.outro = self.pasta / "I0000002.pdf"
+        self.outro.write_bytes(b"%PDF carne 2")
+
+    def tearDown(self) -> None:
+        self._temporario.cleanup()
+
+    def linhas(self) -> list[str]:
+        return self.caminho.read_text(encoding="utf-8").splitlines()
+
+    def test_retoma_put_enviado_sem_confirmacao(self) -> None:
+        diario = DiarioExecucao("2026-10", self.caminho)
+        diario.registrar(self.pdf, "extraido", ["10/10/2026", "816...", "94.20"])
+        diario.registrar(self.pdf, "correspondido", {"id_despesa_desp": "10"})
+        diario.registrar(self.pdf, "put_enviado")
+        # Queda aqui: o PUT pode ou não ter chegado à API
+        diario.fechar()
+
+        retomado = DiarioExecucao("2026-10", self.caminho)
+        estado = retomado.estado(self.pdf)
+        retomado.fechar()
+
+        self.assertIn("put_enviado", estado)
+        self.assertNotIn("put_feito", estado)
+        self.assertEqual(estado["correspondido"], {"id_despesa_desp": "10"})
+
+    def test_compacta_ao_abrir_sem_os_pdfs_movidos(self) -> None:
+        diario = DiarioExecucao("2026-10", self.caminho)
+        diario.registrar(self.pdf, "extraido", ["a"])
+        diario.registrar(self.pdf, "movido", "OK")
+        diario.registrar(self.outro, "extraido", ["b"])
+        diario.fechar()
+        self.assertEqual(len(self.linhas()), 3)
+
+        DiarioExecucao("2026-10", self.caminho).fechar()
+
+        self.assertEqual(len(self.linhas()), 1)
+        self.assertIn("I0000002.pdf", self.linhas()[0])
+
+    def test_compactar_com_o_diario_aberto(self) -> None:
+        diario = DiarioExecucao("2026-10", self.caminho)
+        diario.registrar(self.pdf, "extraido", ["a"])
+        diario.registrar(self.pdf, "movido", "OK")
+        diario.registrar(self.outro, "put_enviado")
+
+        diario.compactar()
+        diario.registrar(self.outro, "put_feito")
+        diario.fechar()
+
+        self.assertEqual(len(self.linhas()), 2)
+        retomado = DiarioExecucao("2026-10", self.caminho)
+        self.assertEqual(set(retomado.estado(self.outro)), {"put_enviado", "put_feito"})
+        self.assertEqual(retomado.estado(self.pdf), {})
+        retomado.fechar()
+
+    def test_ignora_linha_cortada_no_fim(self) -> None:
+        diario = DiarioExecucao("2026-10", self.caminho)
+        diario.registrar(self.pdf, "put_enviado")
+        diario.fechar()
+        with open(self.caminho, "a", encoding="utf-8") as file:
+            file.write('{"chave": "2026-10|I0000001.pdf|')
+
+        retomado = DiarioExecucao("2026-10", self.caminho)
+        self.assertIn("put_enviado", retomado.estado(self.pdf))
+        retomado.fechar()
+
+    def test_conteudo_diferente_comeca_do_zero(self) -> None:
+        diario = DiarioExecucao("2026-10", self.caminho)
+        diario.registrar(self.pdf, "put_enviado")
+        diario.fechar()
+
+        # Outro carnê salvo com o mesmo nome
+        self.pdf.write_bytes(b"%PDF outro conteudo")
+        retomado = DiarioExecucao("2026-10", self.caminho)
+        self.assertEqual(retomado.estado(self.pdf), {})
+        retomado.fechar()
+
+    def test_outra_competencia_comeca_do_zero(self) -> None:
+        diario = DiarioExecucao("2026-10", self.caminho)
+        diario.registrar(self.pdf, "put_enviado")
+        diario.fechar()
+
+        retomado = DiarioExecucao("2026-11", self.caminho)
+        self.assertEqual(retomado.estado(self.pdf), {})
+        retomado.fechar()
+
+
+class TestRetomadaPut(unittest.TestCase):
+    """enviar_put ao retomar um pdf interrompido no meio do PUT."""
+
+    def setUp(self) -> None:
+        self._temporario = tempfile.TemporaryDirectory()
+        pasta = Path(self._temporario.name)
+        self.caminho = pasta / "diario.jsonl"
+        self.pdf = pasta / "I0000001.pdf"
+        self.pdf.write_bytes(b"%PDF carne 1")
+        self.enviados: list[str] = []
+
+    def tearDown(self) -> None:
+        self._temporario.cleanup()
+
+    def retomar(self, *etapas: str) -> SimpleNamespace:
+        diario = DiarioExecucao("2026-10", self.caminho)
+        for etapa in etapas:
+            diario.registrar(self.pdf, etapa)
+        diario.fechar()
+
+        ctx = SimpleNamespace(diario=DiarioExecucao("2026-10", self.caminho), metricas=Metricas())
+        self.addCleanup(ctx.diario.fechar)
+        return ctx
+
+    def enviar(self, *args: str) -> None:
+        self.enviados.append(args[0])
+
+    def test_lancamento_nao_confirmado_nao_e_reenviado(self) -> None:
+        ctx = self.retomar("put_enviado")
+
+        with self.assertRaises(LancamentoNaoConfirmado):
+            enviar_put(ctx, self.pdf, FORM_LANCAR, self.enviar, "lancar")
+        self.assertEqual(self.enviados, [])
+
+    def test_alteracao_nao_confirmada_e_reenviada(self) -> None:
+        ctx = self.retomar("put_enviado")
+
+        enviar_put(ctx, self.pdf, FORM_ALTERAR, self.enviar, "alterar")
+
+        self.assertEqual(self.enviados, ["alterar"])
+        self.assertIn("put_feito", ctx.diario.estado(self.pdf))
+
+    def test_put_confirmado_nao_e_repetido(self) -> None:
+        ctx = self.retomar("put_enviado", "put_feito")
+
+        enviar_put(ctx, self.pdf, FORM_LANCAR, self.enviar, "lancar")
+
+        self.assertEqual(self.enviados, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
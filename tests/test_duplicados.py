@@ -0,0 +1,127 @@
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+from banco_local import BancoLocal
+from duplicados import Deduplicador, criar_deduplicador, ignorar_historico, prioridade_original
+from filas import FILA_ATIVOS
+from metricas import Metricas
+from plano import ItemPlano
+from main import planejar_fila
+
+BARRAS = "81670000001 2 94200097000 3 12345678901 4 23456789012 5"
+OUTRAS_BARRAS = "81670000001 2 94200097000 3 99999999999 4 88888888888 5"
+
+
+def plano_put(pdf: Path, dados_pdf: tuple, ctx: SimpleNamespace, fila: object) -> ItemPlano:
+    return ItemPlano(str(pdf), "", FILA_ATIVOS.nome, pdf.stem.upper(), id_dono="1",
+                     dados_pdf=list(dados_pdf), tipo_form="lancar")
+
+
+class TestDeduplicador(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self._temporario = tempfile.TemporaryDirectory()
+        self.pasta = Path(self._temporario.name)
+
+    def tearDown(self) -> None:
+        self._temporario.cleanup()
+
+    def test_mesmo_conteudo_com_outro_nome(self) -> None:
+        deduplicador = Deduplicador("2026-10")
+        original = self.pasta / "I0000001.pdf"
+        copia = self.pasta / "I0000001 (1).pdf"
+
+        self.assertIsNone(deduplicador.original(original, "h1", ""))
+        self.assertEqual(deduplicador.original(copia, "h1", ""), original.name)
+        self.assertEqual(deduplicador.grupos(), {original: [original, copia]})
+
+    def test_mesmo_codigo_de_barras_com_bytes_diferentes(self) -> None:
+        deduplicador = Deduplicador("2026-10")
+        primeiro = self.pasta / "I0000001.pdf"
+        baixado_de_novo = self.pasta / "I0000001_novo.pdf"
+
+        self.assertIsNone(deduplicador.original(primeiro, "h1", BARRAS))
+        self.assertEqual(deduplicador.original(
+            baixado_de_novo, "h2", BARRAS.replace(" ", "")), primeiro.name)
+        # Outro carnê: nem o hash nem o código de barras coincidem
+        self.assertIsNone(deduplicador.original(self.pasta / "I0000002.pdf", "h3", OUTRAS_BARRAS))
+
+    def test_codigo_de_barras_curto_nao_conta(self) -> None:
+        deduplicador = Deduplicador("2026-10")
+
+        self.assertIsNone(deduplicador.original(self.pasta / "A.pdf", "h1", "123"))
+        self.assertIsNone(deduplicador.original(self.pasta / "B.pdf", "h2", "123"))
+
+    def test_historico_no_banco(self) -> None:
+        banco = BancoLocal(self.pasta / "banco.db")
+        banco.registrar_resultados("exec-1", [], [("2026-10", "h1", "", "I0000001.pdf")])
+
+        deduplicador = Deduplicador("2026-10", banco)
+        self.assertEqual(deduplicador.original(self.pasta / "I0000001 (1).pdf", "h1", ""), "I0000001.pdf")
+        # O hash só vale na mesma competência
+        self.assertIsNone(Deduplicador("2026-11", banco).original(self.pasta / "X.pdf", "h1", ""))
+        # Fora da janela de dias do histórico
+        self.assertIsNone(Deduplicador("2026-10", banco, dias_historico=-1).original(
+            self.pasta / "Y.pdf", "h1", ""))
+        banco.fechar()
+
+    def test_ignorar_historico_mantem_copias_do_lote(self) -> None:
+        banco = BancoLocal(self.pasta / "banco.db")
+        banco.registrar_resultados("exec-1", [], [("2026-10", "h1", "", "I0000001.pdf")])
+        config: dict = {}
+        ignorar_historico(config)
+
+        deduplicador = criar_deduplicador(config, "2026-10", banco)
+        assert deduplicador is not None
+        self.assertIsNone(deduplicador.original(self.pasta / "I0000001.pdf", "h1", ""))
+        self.assertEqual(deduplicador.original(self.pasta / "I0000001 (1).pdf", "h1", ""), "I0000001.pdf")
+        banco.fechar()
+
+    def test_prioridade_original(self) -> None:
+        nomes = ["I0000001 (2).pdf", "i0000001.pdf", "I0000001 (1).pdf", "I0000001.pdf"]
+        ordenados = sorted((Path(nome) for nome in nomes), key=prioridade_original)
+
+        self.assertEqual([pdf.name for pdf in ordenados],
+                         ["I0000001.pdf", "i0000001.pdf", "I0000001 (1).pdf", "I0000001 (2).pdf"])
+
+
+class TestReescolherOriginais(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self._temporario = tempfile.TemporaryDirectory()
+        self.pasta = Path(self._temporario.name)
+        self.filas = {self.pasta: FILA_ATIVOS}
+        self.ctx = SimpleNamespace(inquilino="", metricas=Metricas())
+
+    def tearDown(self) -> None:
+        self._temporario.cleanup()
+
+    def planejar(self, ordem: list[str]) -> dict[str, ItemPlano]:
+        extraidos = [(self.pasta / nome, "h1", ("10/10/2026", BARRAS, "94.20")) for nome in ordem]
+
+        with mock.patch("main.planejar_pdf", side_effect=plano_put) as planejar_pdf:
+            itens = planejar_fila(extraidos, self.filas, self.ctx, 1, Deduplicador("2026-10"))
+
+        # Só um pdf do carnê chega a consultar a API
+        self.assertEqual(planejar_pdf.call_count, 1)
+        return {Path(item.pdf).name: item for item in itens}
+
+    def test_original_independe_da_ordem_de_extracao(self) -> None:
+        nomes = ["I0000001.pdf", "I0000001 (1).pdf", "I0000001 (2).pdf"]
+
+        for ordem in (nomes, list(reversed(nomes)), [nomes[1], nomes[0], nomes[2]]):
+            with self.subTest(ordem=ordem):
+                itens = self.planejar(ordem)
+
+                self.assertEqual(itens["I0000001.pdf"].tipo_form, "lancar")
+                self.assertEqual(itens["I0000001.pdf"].duplicado_de, "")
+                for copia in nomes[1:]:
+                    self.assertEqual(itens[copia].duplicado_de, "I0000001.pdf")
+                    self.assertIsNone(itens[copia].tipo_form)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from pypdf import PdfReader
+
+from benchmark import gerar_carne_pdf, linha_digitavel_arrecadacao
+from extracao import _extrair_pagina_texto
+from extracao_rapida import _vencimento, extrair_pagina_rapida, modulo_10, modulo_11, textos_da_pagina, validar_linha_digitavel
+
+
+def linha_arrecadacao(codigo_sem_dv: str) -> str:
+    """Linha digitável de 48 dígitos a partir dos 43 dígitos do código (sem o DV geral)."""
+
+    modulo = modulo_10 if codigo_sem_dv[2] in "67" else modulo_11
+    codigo = codigo_sem_dv[:3] + str(modulo(codigo_sem_dv)) + codigo_sem_dv[3:]
+    return "".join(codigo[i:i + 11] + str(modulo(codigo[i:i + 11])) for i in range(0, 44, 11))
+
+
+def blocos(linha: str) -> tuple[str, ...]:
+    return tuple(parte for i in range(0, 48, 12) for parte in (linha[i:i + 11], linha[i + 11]))
+
+
+class TestModulos(unittest.TestCase):
+
+    def test_modulo_10(self) -> None:
+        # Pesos 2, 1, 2... da direita; produtos de dois dígitos somam os dígitos
+        self.assertEqual(modulo_10("01230067896"), 3)
+        self.assertEqual(modulo_10("0"), 0)
+        self.assertEqual(modulo_10("5"), 9)
+
+    def test_modulo_11(self) -> None:
+        self.assertEqual(modulo_11("12345"), 5)
+        # Resto 0 ou 1 dá DV 0
+        self.assertEqual(modulo_11("0"), 0)
+        self.assertEqual(modulo_11("6"), 0)
+
+
+class TestValidarLinhaDigitavel(unittest.TestCase):
+
+    def test_modulo_10_valor_efetivo(self) -> None:
+        linha = linha_digitavel_arrecadacao("94.20", 7).replace(" ", "")
+
+        self.assertEqual(validar_linha_digitavel(blocos(linha)), linha)
+
+    def test_modulo_11(self) -> None:
+        linha = linha_arrecadacao("818" + "0000000942" + "0" * 30)
+
+        self.assertEqual(validar_linha_digitavel(blocos(linha)), linha)
+
+    def test_dv_de_bloco_errado(self) -> None:
+        linha = linha_arrecadacao("816" + "0000000942" + "1" * 30)
+        errada = linha[:11] + str((int(linha[11]) + 1) % 10) + linha[12:]
+
+        self.assertIsNone(validar_linha_digitavel(blocos(errada)))
+
+    def test_dv_geral_errado(self) -> None:
+        # Troca o DV geral e recalcula o DV do primeiro bloco: só o DV geral denuncia
+        linha = linha_arrecadacao("818" + "0000000942" + "2" * 30)
+        bloco = linha[:3] + str((int(linha[3]) + 1) % 10) + linha[4:11]
+        errada = bloco + str(modulo_11(bloco)) + linha[12:]
+
+        self.assertIsNone(validar_linha_digitavel(blocos(errada)))
+
+    def test_fora_da_arrecadacao(self) -> None:
+        # Terceiro dígito 5 não é identificador de valor conhecido; boleto bancário não começa com 8
+        self.assertIsNone(validar_linha_digitavel(blocos(linha_arrecadacao("815" + "0" * 40))))
+        self.assertIsNone(validar_linha_digitavel(blocos(linha_arrecadacao("216" + "0" * 40))))
+
+
+class TestVencimento(unittest.TestCase):
+
+    def test_data_rotulada(self) -> None:
+        self.assertEqual(_vencimento(["Emissão 01/01/2026", "Vencimento", "10/02/2026"]), "10/02/2026")
+
+    def test_rotulo_com_duas_datas_e_ambiguo(self) -> None:
+        self.assertIsNone(_vencimento(["Vencimento", "Emissão", "10/02/2026", "01/01/2026"]))
+
+    def test_unica_data_sem_rotulo(self) -> None:
+        self.assertEqual(_vencimento(["10/02/2026", "IPTU 10/02/2026"]), "10/02/2026")
+        self.assertIsNone(_vencimento(["10/02/2026", "11/02/2026"]))
+
+    def test_data_invalida_nao_conta(self) -> None:
+        self.assertEqual(_vencimento(["31/02/2026", "10/02/2026"]), "10/02/2026")
+
+
+class TestExtrairPaginaRapida(unittest.TestCase):
+
+    def test_textos_do_content_stream(self) -> None:
+        conteudo = rb"BT (Vencimento\072) Tj [(10/02/) -20 (2026)] TJ <3934> Tj ET"
+
+        self.assertEqual(textos_da_pagina(conteudo), ["Vencimento:", "10/02/2026", "94"])
+
+    def test_carne_igual_ao_extract_text(self) -> None:
+        with tempfile.TemporaryDirectory() as pasta:
+            caminho = Path(pasta) / "I0000001.pdf"
+            linha = linha_digitavel_arrecadacao("1094.20", 3)
+            gerar_carne_pdf(caminho, [("10/02/2026", "1.094,20", linha)])
+
+            pagina = PdfReader(caminho).pages[0]
+
+            self.assertEqual(extrair_pagina_rapida(pagina),
+                             ("10/02/2026", linha.replace(" ", ""), "1094.20"))
+            self.assertEqual(extrair_pagina_rapida(pagina), _extrair_pagina_texto(pagina))
+
+
+if __name__ == "__main__":
+    unittest.main()
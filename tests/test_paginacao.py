@@ -0,0 +1,84 @@
+import threading
+import unittest
+from types import SimpleNamespace
+from typing import Any
+
+import requests
+
+from paginacao import buscar_todas_paginas
+
+
+class ClienteListagem:
+    """Cliente falso: `total` itens em páginas de `itensPorPagina`; `falhas` diz o status de páginas com erro."""
+
+    def __init__(self, total: int, paginas_simultaneas: int = 3, falhas: dict[int, int] | None = None) -> None:
+        self.total = total
+        self.paginas_simultaneas = paginas_simultaneas
+        self.falhas = falhas or {}
+        self.paginas: list[int] = []
+        self._lock = threading.Lock()
+
+    def get(self, url: str, headers: dict, params: dict[str, Any]) -> SimpleNamespace:
+        pagina, por_pagina = params["pagina"], params["itensPorPagina"]
+        with self._lock:
+            self.paginas.append(pagina)
+
+        if pagina in self.falhas:
+            return SimpleNamespace(status_code=self.falhas[pagina], json=lambda: None)
+
+        inicio = (pagina - 1) * por_pagina
+        itens = [{"id": i} for i in range(inicio, min(inicio + por_pagina, self.total))]
+        return SimpleNamespace(status_code=200, json=lambda: {"data": itens})
+
+
+def buscar(cliente: ClienteListagem) -> list[int]:
+    itens = buscar_todas_paginas(cliente, "https://api/contratos", {},  # type: ignore[arg-type]
+                                 {"itensPorPagina": 10, "pagina": 1})
+    return [item["id"] for item in itens]
+
+
+class TestBuscarTodasPaginas(unittest.TestCase):
+
+    def test_so_a_primeira_pagina(self) -> None:
+        cliente = ClienteListagem(7)
+
+        self.assertEqual(buscar(cliente), list(range(7)))
+        self.assertEqual(cliente.paginas, [1])
+
+    def test_total_multiplo_de_itens_por_pagina(self) -> None:
+        # A última página cheia só se sabe última pela seguinte, vazia
+        cliente = ClienteListagem(30)
+
+        self.assertEqual(buscar(cliente), list(range(30)))
+        self.assertIn(4, cliente.paginas)
+
+    def test_pagina_curta_no_meio_da_janela(self) -> None:
+        cliente = ClienteListagem(25, paginas_simultaneas=4)
+
+        self.assertEqual(buscar(cliente), list(range(25)))
+        # Páginas 2 a 5 na mesma janela: a 3 é a última; a 4 e a 5, se chegaram a sair, são descartadas
+        self.assertTrue({1, 2, 3} <= set(cliente.paginas) <= {1, 2, 3, 4, 5})
+
+    def test_varias_janelas(self) -> None:
+        cliente = ClienteListagem(95, paginas_simultaneas=2)
+
+        self.assertEqual(buscar(cliente), list(range(95)))
+
+    def test_erro_em_pagina_especulativa_depois_da_ultima(self) -> None:
+        cliente = ClienteListagem(25, paginas_simultaneas=4, falhas={4: 500, 5: 404})
+
+        self.assertEqual(buscar(cliente), list(range(25)))
+
+    def test_erro_antes_da_ultima_pagina(self) -> None:
+        cliente = ClienteListagem(45, paginas_simultaneas=2, falhas={3: 503})
+
+        with self.assertRaises(requests.exceptions.HTTPError):
+            buscar(cliente)
+
+    def test_erro_na_primeira_pagina(self) -> None:
+        with self.assertRaises(requests.exceptions.HTTPError):
+            buscar(ClienteListagem(5, falhas={1: 401}))
+
+
+if __name__ == "__main__":
+    unittest.main()
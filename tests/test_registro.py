@@ -0,0 +1,70 @@
+import logging as log
+import os
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from registro import config_log_atual, encerrar_log, fila_log_filhos, iniciar_log, iniciar_log_filho
+
+
+def logar_no_filho(mensagem: str) -> int:
+    log.info(mensagem)
+    return os.getpid()
+
+
+class TestLogDosProcessosFilhos(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self._temporario = tempfile.TemporaryDirectory()
+        self.arquivo = Path(self._temporario.name) / "app.log"
+        self.nivel = log.getLogger().level
+
+    def tearDown(self) -> None:
+        # Volta ao log padrão (sem arquivo no diretório temporário) para os demais testes
+        encerrar_log()
+        for handler in list(log.getLogger().handlers):
+            log.getLogger().removeHandler(handler)
+        log.getLogger().setLevel(self.nivel)
+        self._temporario.cleanup()
+
+    def test_filhos_escrevem_pelo_listener_do_pai(self) -> None:
+        # Mesmo método de início do pool de extração (fork no Linux, spawn no Windows)
+        iniciar_log({"arquivo": str(self.arquivo), "rotacao": "nenhuma"})
+
+        with ProcessPoolExecutor(max_workers=2, initializer=iniciar_log_filho,
+                                 initargs=(config_log_atual(), fila_log_filhos())) as executor:
+            pids = set(executor.map(logar_no_filho, [f"pdf {i}" for i in range(6)]))
+
+        encerrar_log()
+
+        self.assertNotIn(os.getpid(), pids)
+        linhas = self.arquivo.read_text(encoding="utf-8")
+        for i in range(6):
+            self.assertIn(f"| INFO     | pdf {i}", linhas)
+
+    def test_filho_sem_fila_nao_grava(self) -> None:
+        iniciar_log_filho({"nivel": "DEBUG"})
+
+        self.assertEqual(log.getLogger().handlers, [])
+        self.assertEqual(log.getLogger().level, log.DEBUG)
+
+    def test_rotacao_com_filhos(self) -> None:
+        iniciar_log({"arquivo": str(self.arquivo), "rotacao": "tamanho", "tamanho_max_mb": 0.001, "backups": 50})
+
+        with ProcessPoolExecutor(max_workers=2, initializer=iniciar_log_filho,
+                                 initargs=(config_log_atual(), fila_log_filhos())) as executor:
+            list(executor.map(logar_no_filho, [f"linha {i:03d} " + "x" * 100 for i in range(60)]))
+
+        encerrar_log()
+
+        # Só o processo principal escreve: nenhuma linha se perde na troca de arquivo
+        arquivos = sorted(self.arquivo.parent.glob("app.log*"))
+        self.assertGreater(len(arquivos), 1)
+        conteudo = "".join(arquivo.read_text(encoding="utf-8") for arquivo in arquivos)
+        for i in range(60):
+            self.assertIn(f"linha {i:03d} ", conteudo)
+
+
+if __name__ == "__main__":
+    unittest.main()
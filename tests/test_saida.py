@@ -0,0 +1,95 @@
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from saida import GerenciadorSaida, IndicePasta
+
+
+class TestIndicePasta(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self._temporario = tempfile.TemporaryDirectory()
+        self.pasta = Path(self._temporario.name) / "ok"
+        self.pasta.mkdir()
+
+    def tearDown(self) -> None:
+        self._temporario.cleanup()
+
+    def test_contador_segue_o_maior_ja_visto(self) -> None:
+        for nome in ("I0000001 - OK.pdf", "I0000001 - OK (5).pdf"):
+            (self.pasta / nome).write_bytes(b"%PDF")
+        indice = IndicePasta(self.pasta)
+
+        self.assertEqual(indice.reservar("I0000002 - OK", ".pdf").name, "I0000002 - OK.pdf")
+        self.assertEqual(indice.reservar("I0000001 - OK", ".pdf").name, "I0000001 - OK (6).pdf")
+        self.assertEqual(indice.reservar("I0000001 - OK", ".pdf").name, "I0000001 - OK (7).pdf")
+
+    def test_reserva_concorrente(self) -> None:
+        (self.pasta / "I0000001 - OK.pdf").write_bytes(b"%PDF")
+        indice = IndicePasta(self.pasta)
+        reservados: list[Path] = []
+        largada = threading.Barrier(8)
+
+        def reservar() -> None:
+            largada.wait()
+            for _ in range(50):
+                destino = indice.reservar("I0000001 - OK", ".pdf")
+                reservados.append(destino)
+
+        threads = [threading.Thread(target=reservar) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(reservados), 400)
+        self.assertEqual(len(set(reservados)), 400)
+        self.assertNotIn(self.pasta / "I0000001 - OK.pdf", reservados)
+
+
+class TestGerenciadorSaida(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self._temporario = tempfile.TemporaryDirectory()
+        self.raiz = Path(self._temporario.name)
+        self.entrada = self.raiz / "entrada"
+        self.entrada.mkdir()
+        self.saida = self.raiz / "ok"
+        self.gerenciador = GerenciadorSaida()
+
+    def tearDown(self) -> None:
+        self._temporario.cleanup()
+
+    def pdf(self, nome: str) -> Path:
+        caminho = self.entrada / nome
+        caminho.write_bytes(b"%PDF " + nome.encode())
+        return caminho
+
+    def test_arquivo_criado_por_fora_depois_da_listagem(self) -> None:
+        self.gerenciador.mover(self.pdf("a.pdf"), "I0000001 - OK", self.saida)
+        # Outro processo coloca a próxima cópia na pasta depois que ela foi indexada
+        (self.saida / "I0000001 - OK (1).pdf").write_bytes(b"%PDF de fora")
+
+        destino = self.gerenciador.mover(self.pdf("b.pdf"), "I0000001 - OK", self.saida)
+
+        self.assertEqual(destino.name, "I0000001 - OK (2).pdf")
+        self.assertEqual((self.saida / "I0000001 - OK (1).pdf").read_bytes(), b"%PDF de fora")
+        self.assertEqual(destino.read_bytes(), b"%PDF b.pdf")
+
+    def test_libera_nome_quando_o_move_falha(self) -> None:
+        origem = self.pdf("a.pdf")
+
+        with mock.patch("saida.shutil.move", side_effect=PermissionError("em uso")):
+            with self.assertRaises(PermissionError):
+                self.gerenciador.mover(origem, "I0000001 - OK", self.saida)
+
+        self.assertTrue(origem.exists())
+        destino = self.gerenciador.mover(origem, "I0000001 - OK", self.saida)
+        self.assertEqual(destino.name, "I0000001 - OK.pdf")
+        self.assertFalse(origem.exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from typing import Iterator
+from unittest import mock
+
+from varredura import FiltroEntrada, VarreduraEntrada
+
+
+class ScandirRastreado:
+    """os.scandir que anota quais listagens foram abertas e fechadas."""
+
+    scandir = os.scandir
+
+    def __init__(self, abertas: list[str], fechadas: list[str], diretorio: str | Path) -> None:
+        self.diretorio = str(diretorio)
+        self.fechadas = fechadas
+        self.entradas = self.scandir(diretorio)
+        abertas.append(self.diretorio)
+
+    def __enter__(self) -> "ScandirRastreado":
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.entradas.close()
+        self.fechadas.append(self.diretorio)
+
+    def __iter__(self) -> Iterator[os.DirEntry]:
+        return iter(self.entradas)
+
+
+class TestVarreduraEntrada(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self._temporario = tempfile.TemporaryDirectory()
+        self.pasta = Path(self._temporario.name)
+        self.ativos = self.pasta / "ativos"
+        self.vazios = self.pasta / "vazios"
+        self.ativos.mkdir()
+        self.vazios.mkdir()
+
+    def tearDown(self) -> None:
+        self._temporario.cleanup()
+
+    def criar(self, pasta: Path, nome: str, conteudo: bytes = b"%PDF", idade: float = 3600) -> Path:
+        caminho = pasta / nome
+        caminho.write_bytes(conteudo)
+        mtime = time.time() - idade
+        os.utime(caminho, (mtime, mtime))
+        return caminho
+
+    def test_filtra_extensao_tamanho_e_estabilidade(self) -> None:
+        pronto = self.criar(self.ativos, "I0000001.pdf")
+        maiusculo = self.criar(self.ativos, "I0000002.PDF")
+        self.criar(self.ativos, "vazio.pdf", b"")
+        self.criar(self.ativos, "recente.pdf", idade=0)
+        self.criar(self.ativos, "notas.txt")
+        (self.ativos / "pasta.pdf").mkdir()
+
+        varredura = VarreduraEntrada(FiltroEntrada(segundos_estabilidade=60))
+        pdfs = set(varredura.pdfs(self.ativos))
+
+        self.assertEqual(pdfs, {pronto, maiusculo})
+        self.assertEqual(varredura.em_copia, 2)
+
+    def test_tamanho_minimo(self) -> None:
+        self.criar(self.ativos, "pequeno.pdf", b"%PDF")
+        grande = self.criar(self.ativos, "grande.pdf", b"%PDF" * 100)
+
+        varredura = VarreduraEntrada(FiltroEntrada(tamanho_minimo_bytes=100))
+
+        self.assertEqual(list(varredura.pdfs(self.ativos)), [grande])
+        self.assertEqual(varredura.em_copia, 1)
+
+    def test_pasta_inexistente(self) -> None:
+        with self.assertRaises(FileNotFoundError):
+            list(VarreduraEntrada(FiltroEntrada()).pdfs(self.pasta / "nao_existe"))
+
+    def test_lote_alterna_pastas_e_respeita_tamanho(self) -> None:
+        for i in range(3):
+            self.criar(self.ativos, f"A{i}.pdf")
+            self.criar(self.vazios, f"V{i}.pdf")
+
+        varredura = VarreduraEntrada(FiltroEntrada(tamanho_lote=4))
+        filas = [fila for _, fila in varredura.lote({str(self.ativos): "ativos", str(self.vazios): "vazios"})]
+
+        self.assertEqual(filas, ["ativos", "vazios", "ativos", "vazios"])
+        self.assertTrue(varredura.lote_completo)
+
+    def test_listagens_fechadas(self) -> None:
+        for i in range(3):
+            self.criar(self.ativos, f"A{i}.pdf")
+            self.criar(self.vazios, f"V{i}.pdf")
+        pastas = {str(self.ativos): "ativos", str(self.vazios): "vazios"}
+
+        for filtro, consumir in ((FiltroEntrada(tamanho_lote=3), None), (FiltroEntrada(), 1)):
+            with self.subTest(filtro=filtro, consumir=consumir):
+                abertas: list[str] = []
+                fechadas: list[str] = []
+                with mock.patch("varredura.os.scandir",
+                                side_effect=lambda diretorio: ScandirRastreado(abertas, fechadas, diretorio)):
+                    lote = VarreduraEntrada(filtro).lote(pastas)
+                    if consumir is None:
+                        list(lote)
+                    else:
+                        next(lote)
+                        # Consumidor que desiste no meio (ex.: extração interrompida)
+                        lote.close()
+
+                self.assertTrue(abertas)
+                self.assertEqual(sorted(fechadas), sorted(abertas))
+
+
+if __name__ == "__main__":
+    unittest.main()